@@ -35,9 +35,10 @@ async function apiRequest<T>(
 // API methods
 export const api = {
   // Upload file
-  async uploadFile(file: File): Promise<FileUploadResponse> {
+  async uploadFile(file: File, append: boolean = false): Promise<FileUploadResponse> {
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('append', String(append));
     
     return apiRequest<FileUploadResponse>('/upload', {
       method: 'POST',
@@ -56,20 +57,105 @@ export const api = {
     });
   },
   
-  // Get database schema
-  async getSchema(): Promise<DatabaseSchemaResponse> {
-    return apiRequest<DatabaseSchemaResponse>('/schema');
-  },
-  
-  // Generate insights
-  async generateInsights(request: InsightsRequest): Promise<InsightsResponse> {
-    return apiRequest<InsightsResponse>('/insights', {
+  // Process query with streamed SQL tokens and result pages (Server-Sent Events)
+  async processQueryStream(
+    request: QueryRequest,
+    onToken: (text: string) => void,
+    onRepair?: (error: string) => void
+  ): Promise<QueryResponse> {
+    const response = await fetch(`${API_BASE_URL}/query/stream`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
       },
       body: JSON.stringify(request)
     });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const result: QueryResponse = {
+      sql: '',
+      results: [],
+      columns: [],
+      row_count: 0,
+      execution_time_ms: 0,
+      attempts: 1,
+      repair_time_ms: 0,
+      truncated: false
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        const eventLine = frame.split('\n').find(line => line.startsWith('event: '));
+        const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+        if (!eventLine || !dataLine) continue;
+
+        const event = eventLine.slice('event: '.length) as QueryStreamEvent;
+        const data = JSON.parse(dataLine.slice('data: '.length));
+
+        if (event === 'token') {
+          onToken(data.text);
+        } else if (event === 'sql') {
+          result.sql = data.sql;
+          result.attempts = data.attempt;
+        } else if (event === 'repair') {
+          onRepair?.(data.error);
+        } else if (event === 'results') {
+          result.columns = data.columns;
+          result.results.push(...data.results);
+        } else if (event === 'done') {
+          result.row_count = data.row_count;
+          result.execution_time_ms = data.execution_time_ms;
+          result.attempts = data.attempts;
+          result.repair_time_ms = data.repair_time_ms;
+          result.truncated = data.truncated;
+        } else if (event === 'error') {
+          result.error = data.error;
+          result.error_code = data.error_code ?? undefined;
+        }
+      }
+    }
+
+    return result;
+  },
+
+  // Get database schema
+  async getSchema(): Promise<DatabaseSchemaResponse> {
+    return apiRequest<DatabaseSchemaResponse>('/schema');
+  },
+  
+  // Generate insights (GET, so the browser revalidates cached results by ETag)
+  async generateInsights(request: InsightsRequest): Promise<InsightsResponse> {
+    const params = new URLSearchParams();
+    for (const column of request.column_names ?? []) {
+      params.append('column_names', column);
+    }
+    if (request.approximate) {
+      params.set('approximate', 'true');
+    }
+    if (request.distribution) {
+      params.set('distribution', 'true');
+    }
+    const query = params.toString();
+    return apiRequest<InsightsResponse>(
+      `/insights/${encodeURIComponent(request.table_name)}${query ? `?${query}` : ''}`
+    );
   },
 
   // Generate query
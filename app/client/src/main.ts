@@ -25,9 +25,21 @@ function initializeQueryInput() {
     queryButton.innerHTML = '<span class="loading"></span>';
 
     try {
-      const response = await api.processQuery({
+      // Show SQL as it is generated instead of waiting for the full response
+      const sqlDisplay = document.getElementById('sql-display') as HTMLDivElement;
+      const resultsSection = document.getElementById('results-section') as HTMLElement;
+      let partialSql = '';
+      resultsSection.style.display = 'block';
+
+      const response = await api.processQueryStream({
         query,
         llm_provider: 'openai'  // Default to OpenAI
+      }, (text) => {
+        partialSql += text;
+        sqlDisplay.textContent = partialSql;
+      }, () => {
+        // The server is regenerating failed SQL; start the display over
+        partialSql = '';
       });
 
       displayResults(response, query);
@@ -176,6 +188,11 @@ function displayResults(response: QueryResponse, query: string) {
     const table = createResultsTable(response.results, response.columns);
     resultsContainer.innerHTML = '';
     resultsContainer.appendChild(table);
+    if (response.truncated) {
+      const notice = document.createElement('p');
+      notice.textContent = `Showing the first ${response.row_count} rows; the result was truncated.`;
+      resultsContainer.appendChild(notice);
+    }
   }
   
   // Initialize toggle button
@@ -6,13 +6,14 @@ interface FileUploadResponse {
   table_schema: Record<string, string>;
   row_count: number;
   sample_data: Record<string, any>[];
+  indexes: string[];
   error?: string;
 }
 
 // Query Types
 interface QueryRequest {
   query: string;
-  llm_provider: "openai" | "anthropic";
+  llm_provider: "openai" | "anthropic" | "stub";
   table_name?: string;
 }
 
@@ -22,9 +23,15 @@ interface QueryResponse {
   columns: string[];
   row_count: number;
   execution_time_ms: number;
+  attempts: number;
+  repair_time_ms: number;
+  truncated: boolean;
   error?: string;
+  error_code?: "budget_exceeded";
 }
 
+type QueryStreamEvent = "token" | "sql" | "repair" | "results" | "done" | "error";
+
 // Database Schema Types
 interface ColumnInfo {
   name: string;
@@ -46,10 +53,16 @@ interface DatabaseSchemaResponse {
   error?: string;
 }
 
+interface DeleteTableResponse {
+  message: string;
+}
+
 // Insights Types
 interface InsightsRequest {
   table_name: string;
   column_names?: string[];
+  approximate?: boolean;
+  distribution?: boolean;
 }
 
 interface ColumnInsight {
@@ -61,6 +74,12 @@ interface ColumnInsight {
   max_value?: any;
   avg_value?: number;
   most_common?: Record<string, any>[];
+  approximate: boolean;
+  unique_values_error?: number;
+  most_common_error?: number;
+  quantiles?: Record<string, number>;
+  quantile_sample_size?: number;
+  histogram?: { lower: number; upper: number; count: number }[];
 }
 
 interface InsightsResponse {
@@ -81,6 +100,68 @@ interface GenerateQueryResponse {
   error?: string;
 }
 
+// Index Advisor Types
+interface IndexInfo {
+  name: string;
+  columns: string[];
+  auto_created: boolean;
+  created_at?: string;
+  hits: number;
+  size_bytes?: number;
+}
+
+interface IndexRecommendation {
+  column: string;
+  full_scans: number;
+  sql: string;
+}
+
+interface TableIndexStats {
+  table_name: string;
+  full_scans: number;
+  recommendations: IndexRecommendation[];
+  indexes: IndexInfo[];
+  index_bytes: number;
+}
+
+interface IndexAdvisorResponse {
+  tables: TableIndexStats[];
+  auto_create: boolean;
+  error?: string;
+}
+
+// Slow Query Log Types
+interface SlowQueryEntry {
+  fingerprint: string;
+  sql: string;
+  plan?: string;
+  row_count: number;
+  execution_ms: number;
+  llm_ms?: number;
+  total_ms?: number;
+  error?: string;
+  created_at: string;
+}
+
+interface SlowQueryFingerprint {
+  fingerprint: string;
+  count: number;
+  total_ms: number;
+  avg_ms: number;
+  max_ms: number;
+  avg_rows: number;
+  last_seen: string;
+  sample_sql: string;
+  plan?: string;
+}
+
+interface SlowQueryLogResponse {
+  threshold_ms: number;
+  fingerprints: SlowQueryFingerprint[];
+  recent: SlowQueryEntry[];
+  error?: string;
+}
+
 // Health Check Types
 interface HealthCheckResponse {
   status: "ok" | "error";
@@ -88,4 +169,34 @@ interface HealthCheckResponse {
   tables_count: number;
   version: string;
   uptime_seconds: number;
+}
+
+interface LivenessResponse {
+  status: "ok";
+  uptime_seconds: number;
+}
+
+interface DatabaseProbe {
+  connected: boolean;
+  tables_count: number;
+  probe_ms: number;
+  age_seconds: number;
+  error?: string;
+}
+
+interface ProviderHealth {
+  provider: string;
+  circuit_open: boolean;
+  error_rate: number;
+  p95_ms?: number;
+  samples: number;
+}
+
+interface ReadinessResponse {
+  status: "ready" | "not_ready";
+  reasons: string[];
+  database: DatabaseProbe;
+  queue_depths: Record<string, number>;
+  pool_connections: Record<string, number>;
+  providers: ProviderHealth[];
 }
\ No newline at end of file
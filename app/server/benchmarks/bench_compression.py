@@ -0,0 +1,85 @@
+"""
+Benchmark response compression for large /api/query results: wire size, server time and transfer time.
+
+The SQL pipeline is stubbed as in bench_query_response.py, so the response
+is the real server app's JSON for synthetic orders rows. For each encoding,
+the request goes through the real middleware stack with that Accept-Encoding.
+The report shows the bytes on the wire, the median request time (serialization
+plus compression) and the estimated time to move those bytes over a few link
+speeds.
+
+Usage (from app/server):
+    uv run python benchmarks/bench_compression.py --rows 10000 50000 --repeat 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+from bench_query_response import build_rows  # noqa: E402
+from core.compression import get_available_encodings  # noqa: E402
+
+# Link speeds in megabits per second
+LINKS = {"3G (1.6 Mbps)": 1.6, "DSL (10 Mbps)": 10, "Wi-Fi (50 Mbps)": 50}
+
+
+def time_encoding(client: TestClient, encoding: str, repeat: int) -> tuple:
+    """Median milliseconds per request and the bytes on the wire"""
+    payload = {"query": "show all orders", "llm_provider": "openai"}
+    headers = {"Accept-Encoding": encoding}
+    samples = []
+    size = 0
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        with client.stream("POST", "/api/query", json=payload, headers=headers) as response:
+            size = len(b"".join(response.iter_raw()))
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding", "identity") == encoding
+    # The first request warms up
+    return statistics.median(samples[1:]), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # The server logs every request at INFO
+    logging.disable(logging.INFO)
+    client = TestClient(server.app)
+    encodings = ["identity"] + get_available_encodings()
+
+    for count in args.rows:
+        rows = build_rows(count)
+        outcome = {
+            'sql': "SELECT * FROM orders",
+            'result': {'results': rows, 'columns': list(rows[0]), 'error': None, 'truncated': False},
+            'execution_time_ms': 12.5,
+            'attempts': 1,
+            'repair_time_ms': 0,
+        }
+        print(f"\n{count} rows")
+        print(f"{'encoding':>10}{'size (KB)':>12}{'server (ms)':>13}" + "".join(f"{name:>18}" for name in LINKS))
+        with patch.object(server, 'get_database_schema', return_value={'tables': {}}), \
+                patch.object(server, 'find_prompt_examples', return_value=[]), \
+                patch.object(server, 'generate_and_execute_sql', return_value=outcome):
+            for encoding in encodings:
+                elapsed, size = time_encoding(client, encoding, args.repeat)
+                transfers = "".join(
+                    f"{elapsed + size * 8 / (mbps * 1e6) * 1000:>16.0f}ms" for mbps in LINKS.values()
+                )
+                print(f"{encoding:>10}{size / 1024:>12.0f}{elapsed:>13.1f}{transfers}")
+
+
+if __name__ == "__main__":
+    main()
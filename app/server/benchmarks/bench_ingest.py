@@ -0,0 +1,216 @@
+"""
+Ingest microbenchmarks: time each upload converter phase across formats, shapes and sizes.
+
+Each case is one dataset shape in one format at one row count:
+- orders-csv, orders-json, events-jsonl: the shapes of the sample data
+- wide-csv: 200 flat columns of mixed types
+- sparse-jsonl: each record sets 5 of 100 optional fields
+- deep-jsonl: records nested 8 levels deep with a list at every level
+
+The dataset is written to a file in a temporary directory first. A fresh
+Python process then reads it and runs the real converter, so the peak RSS of
+one case does not leak into the next. Phase times come from the
+request_phase_duration_seconds histogram the converters already record:
+decode, flatten, dataframe, write, index, stats and metadata. A phase a
+converter does not have is reported as 0. The CSV parser decodes and builds
+the DataFrame in one call, so that time is counted under dataframe.
+
+The report gives rows/s, MB/s, per-phase seconds and peak RSS for every case.
+It prints as a table and is written as JSON to --output, so runs can be
+compared across releases.
+
+Usage (from app/server):
+    uv run python benchmarks/bench_ingest.py
+    uv run python benchmarks/bench_ingest.py --sizes 1k,100k,1m --datasets deep-jsonl,sparse-jsonl
+    uv run python benchmarks/bench_ingest.py --sizes 10m --repeat 1 --output ingest-10m.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from datasets import (  # noqa: E402
+    iter_deep,
+    iter_events,
+    iter_orders,
+    iter_sparse,
+    iter_wide,
+    write_csv,
+    write_json,
+    write_jsonl,
+)
+
+PHASES = ("decode", "flatten", "dataframe", "write", "index", "stats", "metadata")
+
+# name -> (row generator, writer, file extension)
+DATASETS: Dict[str, Tuple[Callable[[int], Iterator[Dict[str, Any]]], Callable, str]] = {
+    "orders-csv": (iter_orders, write_csv, "csv"),
+    "orders-json": (iter_orders, write_json, "json"),
+    "events-jsonl": (iter_events, write_jsonl, "jsonl"),
+    "wide-csv": (iter_wide, write_csv, "csv"),
+    "sparse-jsonl": (iter_sparse, write_jsonl, "jsonl"),
+    "deep-jsonl": (iter_deep, write_jsonl, "jsonl"),
+}
+
+
+def parse_size(text: str) -> int:
+    """Row counts like 1000, 10k or 10m"""
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(path: str, extension: str) -> Dict[str, Any]:
+    """Convert one dataset file in this process and report its phase times and memory"""
+    logging.disable(logging.WARNING)
+
+    from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite, convert_jsonl_to_sqlite
+    from core.metrics import phase_duration
+
+    converter = {
+        "csv": convert_csv_to_sqlite,
+        "json": convert_json_to_sqlite,
+        "jsonl": convert_jsonl_to_sqlite,
+    }[extension]
+    with open(path, "rb") as f:
+        content = f.read()
+    baseline_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    result = converter(content, "bench")
+    total = time.perf_counter() - start
+
+    return {
+        "total_s": total,
+        "phases_s": {phase: phase_duration.sum(f"ingest_{phase}") for phase in PHASES},
+        "row_count": result["row_count"],
+        "columns": len(result["schema"]),
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(dataset: str, rows: int, repeat: int, workdir: str) -> Dict[str, Any]:
+    generate, write, extension = DATASETS[dataset]
+    path = os.path.join(workdir, f"{dataset}-{rows}.{extension}")
+    with open(path, "w", newline="") as f:
+        write(generate(rows), f)
+    size_mb = os.path.getsize(path) / 1e6
+
+    runs = []
+    for attempt in range(repeat):
+        # Every run gets an empty db/ so replace never has an old table to drop
+        run_dir = os.path.join(workdir, f"run-{attempt}")
+        os.makedirs(os.path.join(run_dir, "db"))
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-case", path],
+            cwd=run_dir, capture_output=True, text=True, check=False
+        )
+        shutil.rmtree(run_dir, ignore_errors=True)
+        if completed.returncode != 0:
+            raise SystemExit(f"{dataset} with {rows} rows failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.splitlines()[-1]))
+    os.remove(path)
+
+    total = statistics.median(run["total_s"] for run in runs)
+    return {
+        "dataset": dataset,
+        "format": extension,
+        "rows": runs[0]["row_count"],
+        "columns": runs[0]["columns"],
+        "size_mb": size_mb,
+        "total_s": total,
+        "rows_per_s": rows / total,
+        "mb_per_s": size_mb / total,
+        "phases_s": {phase: statistics.median(run["phases_s"][phase] for run in runs) for phase in PHASES},
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "ingest_rss_mb": max(run["peak_rss_mb"] - run["baseline_rss_mb"] for run in runs),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    import pandas
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1k,10k,100k", help="Comma-separated row counts, e.g. 1k,1m,10m")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help=f"Comma-separated subset of {', '.join(DATASETS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; times are medians")
+    parser.add_argument("--output", default="ingest_report.json", help="Where to write the JSON report")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.run_case.rsplit(".", 1)[1])))
+        return
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    datasets = [name.strip() for name in args.datasets.split(",")]
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        parser.error(f"Unknown datasets: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="nlsql-ingest-")
+    results = []
+    print(f"{'dataset':<14}{'rows':>10}{'cols':>6}{'MB':>9}{'total s':>9}{'rows/s':>11}{'MB/s':>7}"
+          + "".join(f"{phase:>10}" for phase in PHASES) + f"{'RSS MB':>9}")
+    try:
+        for rows in sizes:
+            for dataset in datasets:
+                result = measure(dataset, rows, args.repeat, workdir)
+                results.append(result)
+                print(f"{dataset:<14}{result['rows']:>10}{result['columns']:>6}{result['size_mb']:>9.1f}"
+                      f"{result['total_s']:>9.2f}{result['rows_per_s']:>11.0f}{result['mb_per_s']:>7.1f}"
+                      + "".join(f"{result['phases_s'][phase]:>10.3f}" for phase in PHASES)
+                      + f"{result['ingest_rss_mb']:>9.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "benchmark": "ingest",
+        "environment": environment(),
+        "config": {"sizes": sizes, "datasets": datasets, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRSS MB is the peak growth during conversion. Report written to {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark typical join and filter queries with and without ingest-time indexes.
+
+Builds scaled-up users, products and orders tables modeled on the files in
+app/client/public/sample-data. The orders rows also get customer_id and
+product_id columns so the usual LLM joins exist. Each table is loaded through
+the real upload converters twice: once with INGEST_AUTO_INDEX=false and once
+with it enabled. The run reports ingest time and the median latency of each
+query in both databases.
+
+Selective joins and filters gain the most. Whole-table aggregations have
+little to gain, and can get slightly slower when the planner prefers an index
+nested loop over its own automatic index.
+
+Usage (from app/server):
+    uv run python benchmarks/bench_ingest_indexes.py --orders 200000 --repeat 5
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite  # noqa: E402
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Seattle", "Boston", "Denver"]
+CATEGORIES = ["Electronics", "Furniture", "Clothing", "Books", "Sports", "Home & Garden"]
+SHIPPING_METHODS = ["Standard", "Express", "Premium"]
+DELIVERY_STATUSES = ["Delivered", "Pending", "In Transit", "Cancelled"]
+
+QUERIES = {
+    "join users by city": (
+        "SELECT COUNT(*) FROM orders o JOIN users u ON o.customer_id = u.id WHERE u.city = 'Denver'"
+    ),
+    "revenue per category": (
+        "SELECT p.category, SUM(o.order_amount) FROM orders o "
+        "JOIN products p ON o.product_id = p.product_id GROUP BY p.category"
+    ),
+    "orders of one customer": (
+        "SELECT * FROM orders WHERE customer_id = 4242 ORDER BY order_date"
+    ),
+    "pending orders in a month": (
+        "SELECT COUNT(*) FROM orders WHERE delivery_status = 'Pending' "
+        "AND order_date BETWEEN '2024-03-01' AND '2024-03-31'"
+    ),
+    "top customers": (
+        "SELECT u.name, SUM(o.order_amount) AS total FROM users u "
+        "JOIN orders o ON o.customer_id = u.id WHERE o.order_date >= '2024-06-01' "
+        "GROUP BY u.id ORDER BY total DESC LIMIT 10"
+    ),
+}
+
+
+def build_users(count: int, rng: random.Random) -> bytes:
+    users = [
+        {
+            "id": i,
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "signup_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "age": rng.randint(18, 80),
+            "city": rng.choice(CITIES),
+        }
+        for i in range(1, count + 1)
+    ]
+    return json.dumps(users).encode()
+
+
+def build_products(count: int, rng: random.Random) -> bytes:
+    out = io.StringIO()
+    out.write("product_id,product_name,category,price,stock_quantity,last_restocked\n")
+    for i in range(1, count + 1):
+        out.write(
+            f"{i},Product {i},{rng.choice(CATEGORIES)},{rng.uniform(5, 2000):.2f},"
+            f"{rng.randint(0, 500)},2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n"
+        )
+    return out.getvalue().encode()
+
+
+def build_orders(count: int, users: int, products: int, rng: random.Random) -> bytes:
+    out = io.StringIO()
+    out.write("order_id,customer_id,product_id,customer_name,product_category,order_amount,"
+              "shipping_method,order_date,delivery_status\n")
+    for i in range(1, count + 1):
+        customer = rng.randint(1, users)
+        out.write(
+            f"{i},{customer},{rng.randint(1, products)},User {customer},{rng.choice(CATEGORIES)},"
+            f"{rng.uniform(5, 500):.2f},{rng.choice(SHIPPING_METHODS)},"
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},{rng.choice(DELIVERY_STATUSES)}\n"
+        )
+    return out.getvalue().encode()
+
+
+def load_database(workdir: str, auto_index: bool, data: dict) -> dict:
+    """Load the tables through the upload converters; returns ingest seconds and index names"""
+    os.environ["INGEST_AUTO_INDEX"] = "true" if auto_index else "false"
+    os.makedirs(os.path.join(workdir, "db"), exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        indexes = []
+        indexes += convert_json_to_sqlite(data["users"], "users")["indexes"]
+        indexes += convert_csv_to_sqlite(data["products"], "products")["indexes"]
+        indexes += convert_csv_to_sqlite(data["orders"], "orders")["indexes"]
+        return {"ingest_seconds": time.perf_counter() - start, "indexes": indexes}
+    finally:
+        os.chdir(previous)
+
+
+def time_query(db_path: str, sql: str, repeat: int) -> float:
+    """Median wall-clock milliseconds to run and fetch a query"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql).fetchall()  # warm the page cache
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data = {
+        "users": build_users(args.users, rng),
+        "products": build_products(args.products, rng),
+        "orders": build_orders(args.orders, args.users, args.products, rng),
+    }
+
+    with tempfile.TemporaryDirectory() as baseline_dir, tempfile.TemporaryDirectory() as indexed_dir:
+        baseline = load_database(baseline_dir, auto_index=False, data=data)
+        indexed = load_database(indexed_dir, auto_index=True, data=data)
+
+        print(f"orders={args.orders} users={args.users} products={args.products} repeat={args.repeat}")
+        print(f"ingest: {baseline['ingest_seconds']:.2f}s without indexes, "
+              f"{indexed['ingest_seconds']:.2f}s with {len(indexed['indexes'])} indexes")
+        print(f"indexes: {', '.join(indexed['indexes'])}")
+        print()
+        print(f"{'query':<28}{'no index (ms)':>15}{'indexed (ms)':>15}{'speedup':>10}")
+        for name, sql in QUERIES.items():
+            before = time_query(os.path.join(baseline_dir, "db", "database.db"), sql, args.repeat)
+            after = time_query(os.path.join(indexed_dir, "db", "database.db"), sql, args.repeat)
+            print(f"{name:<28}{before:>15.2f}{after:>15.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
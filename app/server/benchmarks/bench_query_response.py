@@ -0,0 +1,117 @@
+"""
+Benchmark large-result /api/query responses: default FastAPI serialization vs the fast path.
+
+The SQL pipeline is replaced by a stub returning synthetic rows shaped like the
+sample orders data, so only response building and serialization are measured.
+Two apps are compared with FastAPI's TestClient:
+
+- before: the previous handler. It builds a validated QueryResponse and
+  returns it, so FastAPI re-validates it against response_model and encodes
+  it with jsonable_encoder + json.
+- after:  the real server app. It uses QueryResponse.model_construct and
+  core.responses.model_response, which encodes with orjson.
+
+Usage (from app/server):
+    uv run python benchmarks/bench_query_response.py --rows 10000 50000 --repeat 5
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+from core.data_models import QueryRequest, QueryResponse  # noqa: E402
+
+CATEGORIES = ["Electronics", "Furniture", "Clothing", "Books", "Sports", "Home & Garden"]
+STATUSES = ["Delivered", "Pending", "In Transit", "Cancelled"]
+
+
+def build_rows(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "order_id": i,
+            "customer_name": f"User {rng.randint(1, 20000)}",
+            "product_category": rng.choice(CATEGORIES),
+            "order_amount": round(rng.uniform(5, 500), 2),
+            "shipping_method": rng.choice(["Standard", "Express", "Premium"]),
+            "order_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "delivery_status": rng.choice(STATUSES),
+            "discount": None if i % 7 else 0.1,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def build_legacy_app(outcome: dict) -> FastAPI:
+    """The /api/query response path before the fast path"""
+    app = FastAPI()
+
+    @app.post("/api/query", response_model=QueryResponse)
+    async def process_natural_language_query(request: QueryRequest) -> QueryResponse:
+        result = outcome['result']
+        return QueryResponse(
+            sql=outcome['sql'],
+            results=result['results'],
+            columns=result['columns'],
+            row_count=len(result['results']),
+            execution_time_ms=outcome['execution_time_ms'],
+            attempts=outcome['attempts'],
+            repair_time_ms=outcome['repair_time_ms'],
+            truncated=result.get('truncated', False)
+        )
+
+    return app
+
+
+def time_requests(client: TestClient, repeat: int) -> tuple:
+    """Median milliseconds per request and the response size"""
+    payload = {"query": "show all orders", "llm_provider": "openai"}
+    size = len(client.post("/api/query", json=payload).content)  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post("/api/query", json=payload)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return statistics.median(samples), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # The server logs every request at INFO
+    logging.disable(logging.INFO)
+
+    print(f"{'rows':>8}{'size (MB)':>12}{'before (ms)':>14}{'after (ms)':>13}{'speedup':>10}")
+    for count in args.rows:
+        rows = build_rows(count)
+        outcome = {
+            'sql': "SELECT * FROM orders",
+            'result': {'results': rows, 'columns': list(rows[0]), 'error': None, 'truncated': False},
+            'execution_time_ms': 12.5,
+            'attempts': 1,
+            'repair_time_ms': 0,
+        }
+        with patch.object(server, 'get_database_schema', return_value={'tables': {}}), \
+                patch.object(server, 'find_prompt_examples', return_value=[]), \
+                patch.object(server, 'generate_and_execute_sql', return_value=outcome):
+            before, size = time_requests(TestClient(build_legacy_app(outcome)), args.repeat)
+            after, _ = time_requests(TestClient(server.app), args.repeat)
+        print(f"{count:>8}{size / 1e6:>12.2f}{before:>14.1f}{after:>13.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
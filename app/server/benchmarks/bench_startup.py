@@ -0,0 +1,119 @@
+"""
+Startup benchmark: import time of server.py and time to the first healthy /api/health response.
+
+Every measurement runs in a fresh Python process, since a warm process has
+everything imported already. Two modes are compared:
+- lazy: the server as shipped. pandas, numpy and the provider SDKs load on
+  first use or on the background preload (see core/lazy_imports.py).
+- eager: the same server, but with those modules imported first. This is
+  what startup cost before they were deferred.
+
+Import time is measured inside the child around "import server", plus the
+up-front imports in eager mode. The child also reports which heavy modules
+were loaded by then. Time to first healthy response is measured by the
+parent, from spawning uvicorn until /api/health answers with status "ok". It
+includes interpreter start, imports, app startup and binding the port. The
+server runs in a temporary directory with an empty db/.
+
+Usage (from app/server):
+    uv run python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+HEAVY_MODULES = ("pandas", "numpy", "openai", "anthropic")
+EAGER_IMPORTS = "import pandas, numpy, openai, anthropic, core.file_processor, core.insights; "
+
+IMPORT_SCRIPT = (
+    "import sys, time, json; sys.path.insert(0, {server_dir!r}); "
+    "start = time.perf_counter(); {eager}import server; elapsed = time.perf_counter() - start; "
+    "print(json.dumps({{'import_s': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))"
+)
+SERVE_SCRIPT = (
+    "import sys; sys.path.insert(0, {server_dir!r}); {eager}"
+    "import uvicorn; uvicorn.run('server:app', host='127.0.0.1', port={port}, log_level='warning')"
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(eager: bool, workdir: str) -> Dict:
+    script = IMPORT_SCRIPT.format(server_dir=SERVER_DIR, eager=EAGER_IMPORTS if eager else "", heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", script], cwd=workdir, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def measure_first_healthy(eager: bool, workdir: str, timeout: float) -> float:
+    port = free_port()
+    script = SERVE_SCRIPT.format(server_dir=SERVER_DIR, eager=EAGER_IMPORTS if eager else "", port=port)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", script], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    response = client.get(f"http://127.0.0.1:{port}/api/health")
+                    if response.status_code == 200 and response.json().get("status") == "ok":
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise SystemExit(f"Server did not become healthy within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per measurement; times are medians")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a healthy response")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="nlsql-startup-")
+    os.makedirs(os.path.join(workdir, "db"))
+    results: Dict[str, Dict] = {}
+    try:
+        for mode in ("eager", "lazy"):
+            eager = mode == "eager"
+            imports: List[Dict] = [measure_import(eager, workdir) for _ in range(args.repeat)]
+            healthy = [measure_first_healthy(eager, workdir, args.timeout) for _ in range(args.repeat)]
+            results[mode] = {
+                "import_s": statistics.median(run["import_s"] for run in imports),
+                "first_healthy_s": statistics.median(healthy),
+                "loaded": imports[0]["loaded"],
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'mode':<7}{'import server (s)':>19}{'first healthy (s)':>20}  heavy modules loaded by import")
+    for mode, result in results.items():
+        loaded = ", ".join(result["loaded"]) or "none"
+        print(f"{mode:<7}{result['import_s']:>19.3f}{result['first_healthy_s']:>20.3f}  {loaded}")
+    saved = results["eager"]["first_healthy_s"] - results["lazy"]["first_healthy_s"]
+    print(f"\nDeferring heavy imports saves {saved:.2f}s before the first healthy response (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
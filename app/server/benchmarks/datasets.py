@@ -0,0 +1,140 @@
+"""
+Synthetic datasets for the benchmarks, shaped like the files in app/client/public/sample-data.
+
+Every generator is seeded, so the same size always produces the same bytes.
+"""
+
+import csv
+import io
+import json
+import random
+from typing import Any, Dict, Iterator, TextIO
+
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Seattle", "Boston", "Denver"]
+CATEGORIES = ["Electronics", "Furniture", "Clothing", "Books", "Sports", "Home & Garden"]
+SHIPPING_METHODS = ["Standard", "Express", "Premium"]
+DELIVERY_STATUSES = ["Delivered", "Pending", "In Transit", "Cancelled"]
+EVENT_TYPES = ["page_view", "add_to_cart", "checkout", "search", "login"]
+DEVICES = ["desktop", "mobile", "tablet"]
+
+
+def iter_orders(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Flat order rows with numeric, categorical and date columns"""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        yield {
+            "order_id": i,
+            "customer_id": rng.randint(1, max(count // 10, 1)),
+            "product_category": rng.choice(CATEGORIES),
+            "order_amount": round(rng.uniform(5, 500), 2),
+            "quantity": rng.randint(1, 5),
+            "shipping_method": rng.choice(SHIPPING_METHODS),
+            "order_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "delivery_status": rng.choice(DELIVERY_STATUSES),
+            "city": rng.choice(CITIES),
+        }
+
+
+def iter_events(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Nested event records: a user object, a context object and a short list of items"""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        yield {
+            "event_id": i,
+            "event_type": rng.choice(EVENT_TYPES),
+            "timestamp": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+            "user": {"id": rng.randint(1, max(count // 20, 1)), "city": rng.choice(CITIES)},
+            "context": {"device": rng.choice(DEVICES), "session": {"duration_s": rng.randint(5, 3600)}},
+            "items": [
+                {"sku": f"SKU-{rng.randint(1, 500)}", "price": round(rng.uniform(1, 200), 2)}
+                for _ in range(rng.randint(0, 3))
+            ],
+        }
+
+
+def iter_wide(count: int, columns: int = 200, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Flat rows with many columns, cycling through integer, float and short text values"""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        row: Dict[str, Any] = {"id": i}
+        for c in range(1, columns):
+            kind = c % 3
+            if kind == 0:
+                row[f"int_{c}"] = rng.randint(0, 10000)
+            elif kind == 1:
+                row[f"float_{c}"] = round(rng.uniform(0, 1000), 3)
+            else:
+                row[f"text_{c}"] = rng.choice(CATEGORIES)
+        yield row
+
+
+def iter_sparse(count: int, fields: int = 100, present: int = 5, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Records that each carry a few of many optional fields, so most flattened columns are NULL"""
+    rng = random.Random(seed)
+    names = [f"attr_{f}" for f in range(fields)]
+    for i in range(1, count + 1):
+        row: Dict[str, Any] = {"id": i}
+        for name in rng.sample(names, present):
+            row[name] = rng.choice((rng.randint(0, 1000), rng.choice(CITIES)))
+        yield row
+
+
+def iter_deep(count: int, depth: int = 8, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Records nested depth levels deep, with a two-element list at every level"""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        node: Dict[str, Any] = {"value": rng.randint(0, 1000), "label": rng.choice(EVENT_TYPES)}
+        for level in range(depth, 0, -1):
+            node = {
+                f"level_{level}": node,
+                "tags": [rng.choice(DEVICES), rng.choice(DEVICES)],
+                "weight": round(rng.uniform(0, 1), 4),
+            }
+        node["id"] = i
+        yield node
+
+
+def write_csv(rows: Iterator[Dict[str, Any]], stream: TextIO) -> None:
+    """CSV with a header row taken from the first record"""
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(stream, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def write_json(rows: Iterator[Dict[str, Any]], stream: TextIO) -> None:
+    """A JSON array of records, written one record at a time"""
+    stream.write("[")
+    for i, row in enumerate(rows):
+        stream.write(", " if i else "")
+        stream.write(json.dumps(row))
+    stream.write("]")
+
+
+def write_jsonl(rows: Iterator[Dict[str, Any]], stream: TextIO) -> None:
+    """One JSON record per line"""
+    for row in rows:
+        stream.write(json.dumps(row) + "\n")
+
+
+def build_csv(rows: Iterator[Dict[str, Any]]) -> bytes:
+    """CSV bytes with a header row taken from the first record"""
+    buffer = io.StringIO()
+    write_csv(rows, buffer)
+    return buffer.getvalue().encode()
+
+
+def build_json(rows: Iterator[Dict[str, Any]]) -> bytes:
+    """A JSON array of records"""
+    buffer = io.StringIO()
+    write_json(rows, buffer)
+    return buffer.getvalue().encode()
+
+
+def build_jsonl(rows: Iterator[Dict[str, Any]]) -> bytes:
+    """One JSON record per line"""
+    buffer = io.StringIO()
+    write_jsonl(rows, buffer)
+    return buffer.getvalue().encode()
@@ -0,0 +1,330 @@
+"""
+Load-test the API in-process: a scripted request mix at a target concurrency against server:app.
+
+The run works in a temporary directory, so the server's db/ files stay
+separate from the real ones. It does the following:
+1. Generates synthetic orders (CSV) and events (nested JSONL) datasets and
+   uploads them.
+2. Serves server:app with uvicorn on a background thread.
+3. Sends a seeded, weighted mix of requests over real HTTP with httpx:
+   - upload: a small CSV into scratch tables
+   - query: /api/query with the LLM stub and fixture SQL
+   - schema: /api/schema
+   - insights: /api/insights
+4. Reports per-operation p50/p95/p99 latency, error counts, requests/sec and
+   peak RSS. The RSS is for the whole process, so it includes the server and
+   the client.
+
+With --workers above 1, the server instead runs as a child process with that
+many uvicorn workers in multi-worker mode (see core/coordination.py), so
+throughput can be compared across worker counts. Peak RSS then covers only
+the client.
+
+With --save-baseline the report is also written as JSON. With --baseline it is
+compared against a saved report, and the script exits with status 1 when any
+p95 latency rises or any throughput falls by more than --tolerance.
+
+Usage (from app/server):
+    uv run python benchmarks/load_test.py --rows 50000 --concurrency 8 --requests 400
+    uv run python benchmarks/load_test.py --workers 4 --concurrency 16
+    uv run python benchmarks/load_test.py --save-baseline load_baseline.json
+    uv run python benchmarks/load_test.py --baseline load_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, SERVER_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from core.llm_router import percentile as nearest_rank  # noqa: E402
+from datasets import build_csv, build_jsonl, iter_events, iter_orders  # noqa: E402
+
+# Questions answered by the LLM stub from these fixtures
+QUERY_FIXTURES = {
+    "how many orders are there": "SELECT COUNT(*) AS count FROM orders",
+    "revenue by category": (
+        "SELECT product_category, SUM(order_amount) AS revenue FROM orders "
+        "GROUP BY product_category ORDER BY revenue DESC"
+    ),
+    "pending orders in denver": (
+        "SELECT * FROM orders WHERE delivery_status = 'Pending' AND city = 'Denver' LIMIT 200"
+    ),
+    "orders of customer 42": "SELECT * FROM orders WHERE customer_id = 42 ORDER BY order_date",
+    "events per device": (
+        "SELECT context__device, COUNT(*) AS events FROM events GROUP BY context__device"
+    ),
+    "recent checkouts": (
+        "SELECT event_id, user__id, timestamp FROM events WHERE event_type = 'checkout' "
+        "ORDER BY timestamp DESC LIMIT 100"
+    ),
+}
+
+DEFAULT_MIX = "query=6,schema=2,insights=1,upload=1"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"query", "schema", "insights", "upload"}
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return nearest_rank(values, fraction) or 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app: Any) -> Tuple[uvicorn.Server, str]:
+    """Serve the app on a background thread; returns the server and its base URL"""
+    port = free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def start_worker_processes(workers: int, workdir: str) -> Tuple[subprocess.Popen, str]:
+    """Serve the app with several uvicorn workers in a child process; returns it and its base URL"""
+    port = free_port()
+    script = (
+        f"import sys; sys.path.insert(0, {os.path.abspath(SERVER_DIR)!r}); "
+        "from core.coordination import prepare_database_for_workers; prepare_database_for_workers(); "
+        f"import uvicorn; uvicorn.run('server:app', host='127.0.0.1', port={port}, workers={workers}, "
+        "log_level='warning', access_log=False)"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", script], cwd=workdir, env={**os.environ, "WEB_CONCURRENCY": str(workers)},
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    with httpx.Client(timeout=1.0) as client:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                if client.get(f"{base_url}/api/health").json().get("status") == "ok":
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    process.terminate()
+    raise SystemExit("Workers did not become healthy within 60s")
+
+
+def build_request(operation: str, index: int, scratch_csv: bytes) -> Dict[str, Any]:
+    """httpx request arguments for one scripted operation"""
+    rng = random.Random(index)
+    if operation == "query":
+        question = rng.choice(sorted(QUERY_FIXTURES))
+        return {"method": "POST", "url": "/api/query", "json": {"query": question, "llm_provider": "stub"}}
+    if operation == "schema":
+        return {"method": "GET", "url": "/api/schema"}
+    if operation == "insights":
+        table = rng.choice(["orders", "events"])
+        return {"method": "POST", "url": "/api/insights", "json": {"table_name": table}}
+    return {
+        "method": "POST",
+        "url": "/api/upload",
+        "files": {"file": (f"scratch_{index % 4}.csv", scratch_csv, "text/csv")},
+    }
+
+
+async def run_mix(base_url: str, operations: List[str], concurrency: int, scratch_csv: bytes) -> Dict[str, Any]:
+    """Run the scripted operations with a fixed number of concurrent workers"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+    for item in enumerate(operations):
+        queue.put_nowait(item)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            index, operation = queue.get_nowait()
+            request = build_request(operation, index, scratch_csv)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                failed = response.status_code != 200 or response.json().get("error") is not None
+            except httpx.HTTPError:
+                failed = True
+            latencies[operation].append((time.perf_counter() - start) * 1000)
+            if failed:
+                errors[operation] += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed_s": elapsed,
+        "operations": {
+            operation: {
+                "count": len(samples),
+                "errors": errors[operation],
+                "p50_ms": percentile(samples, 0.50),
+                "p95_ms": percentile(samples, 0.95),
+                "p99_ms": percentile(samples, 0.99),
+                "rps": len(samples) / elapsed,
+            }
+            for operation, samples in sorted(latencies.items())
+        },
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond the tolerance, as printable lines"""
+    regressions = []
+    for operation, stats in report["operations"].items():
+        base = baseline.get("operations", {}).get(operation)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{operation}: p95 {base['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+        if base["rps"] and stats["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{operation}: {base['rps']:.1f} -> {stats['rps']:.1f} requests/s")
+    if baseline.get("total_rps") and report["total_rps"] < baseline["total_rps"] * (1 - tolerance):
+        regressions.append(f"total: {baseline['total_rps']:.1f} -> {report['total_rps']:.1f} requests/s")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000, help="Rows in the seeded orders table")
+    parser.add_argument("--event-rows", type=int, default=None, help="Rows in the seeded events table (default rows / 5)")
+    parser.add_argument("--upload-rows", type=int, default=1000, help="Rows per scripted upload")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (above 1 runs them in a child process)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="Synthetic LLM stub latency per call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save-baseline", help="Write the report as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a report saved with --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary databases for inspection")
+    args = parser.parse_args()
+    save_path = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    mix = parse_mix(args.mix)
+
+    workdir = tempfile.mkdtemp(prefix="nlsql-load-")
+    fixtures_path = os.path.join(workdir, "stub_fixtures.json")
+    with open(fixtures_path, "w") as f:
+        json.dump(QUERY_FIXTURES, f)
+    os.environ.update({
+        "LLM_PROVIDER": "stub",
+        "LLM_STUB_FIXTURES": fixtures_path,
+        "LLM_STUB_LATENCY_MS": str(args.llm_latency_ms),
+    })
+    # Every db/ path the server uses is relative to the working directory
+    os.chdir(workdir)
+    logging.disable(logging.WARNING)
+
+    if args.workers > 1:
+        workers, base_url = start_worker_processes(args.workers, workdir)
+    else:
+        import server as server_module
+
+        api, base_url = start_server(server_module.app)
+    print(f"Serving server:app with {args.workers} worker(s) at {base_url} (working directory {workdir})")
+
+    event_rows = args.event_rows if args.event_rows is not None else max(args.rows // 5, 1)
+    datasets = {
+        "orders.csv": build_csv(iter_orders(args.rows)),
+        "events.jsonl": build_jsonl(iter_events(event_rows)),
+    }
+    with httpx.Client(base_url=base_url, timeout=600) as client:
+        for filename, content in datasets.items():
+            start = time.perf_counter()
+            body = client.post("/api/upload", files={"file": (filename, content)}).json()
+            if body.get("error"):
+                raise SystemExit(f"Seeding {filename} failed: {body['error']}")
+            print(f"Seeded {filename}: {body['row_count']} rows, {len(content) / 1e6:.1f} MB "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(args.seed)
+    operations = rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+    scratch_csv = build_csv(iter_orders(args.upload_rows, seed=args.seed))
+    result = asyncio.run(run_mix(base_url, operations, args.concurrency, scratch_csv))
+    if args.workers > 1:
+        workers.terminate()
+        workers.wait()
+    else:
+        api.should_exit = True
+    if not args.keep_workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "config": {
+            "rows": args.rows, "event_rows": event_rows, "upload_rows": args.upload_rows,
+            "requests": args.requests, "concurrency": args.concurrency, "workers": args.workers, "mix": mix,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "operations": result["operations"],
+        "total_rps": args.requests / result["elapsed_s"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    print(f"\n{'operation':<10}{'count':>7}{'errors':>8}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}{'req/s':>9}")
+    for operation, stats in report["operations"].items():
+        print(f"{operation:<10}{stats['count']:>7}{stats['errors']:>8}{stats['p50_ms']:>11.1f}"
+              f"{stats['p95_ms']:>11.1f}{stats['p99_ms']:>11.1f}{stats['rps']:>9.1f}")
+    print(f"\n{args.requests} requests in {result['elapsed_s']:.2f}s: {report['total_rps']:.1f} requests/s, "
+          f"peak RSS {report['peak_rss_mb']:.0f} MB")
+
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {save_path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Ingest-time column profiling and automatic indexing.
+
+Uploaded tables are written without indexes, but some columns are obvious
+targets for the joins and filters the LLM writes:
+
+- keys:       columns named id, *_id, *_key, *_code or *_uuid
+- dates:      columns named *date*, *time*, *_at, *_on, or holding ISO-8601 dates
+- categories: text columns with few distinct values relative to the row count
+
+After the bulk load, each candidate gets a single-column index and the table
+is ANALYZEd so the planner knows how selective each index is. Building the
+indexes after loading is much cheaper than maintaining them during inserts.
+
+Configuration (environment variables):
+- INGEST_AUTO_INDEX              "false" disables ingest-time indexes (default true)
+- INGEST_INDEX_MIN_ROWS          Tables smaller than this get no indexes (default 1000)
+- INGEST_INDEX_MAX_PER_TABLE     Indexes created per table (default 6)
+- INGEST_INDEX_MAX_CATEGORIES    Distinct values allowed for a categorical index (default 100)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from .index_advisor import create_column_index
+from .sql_security import execute_query_safely, SQLSecurityError
+
+logger = logging.getLogger(__name__)
+
+# Name prefix of indexes created at ingest
+INGEST_INDEX_PREFIX = "ingest_ix_"
+
+KEY_COLUMN_PATTERN = re.compile(r"^id$|_id$|^id_|_key$|_code$|_uuid$")
+DATE_COLUMN_PATTERN = re.compile(r"(?:^|_)(?:date|datetime|time|timestamp)(?:$|_)|_at$|_on$")
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2})?.*)?$")
+
+# Values sampled per column to recognise ISO-8601 date text
+DATE_SAMPLE_SIZE = 20
+
+# Candidate kinds in the order they win index slots
+KIND_PRIORITY = {"key": 0, "date": 1, "category": 2}
+
+
+def get_ingest_index_settings() -> Dict[str, Any]:
+    """
+    Ingest-time index settings from the environment
+    """
+    return {
+        'enabled': os.environ.get("INGEST_AUTO_INDEX", "true").lower() == "true",
+        'min_rows': int(os.environ.get("INGEST_INDEX_MIN_ROWS", "1000")),
+        'max_per_table': int(os.environ.get("INGEST_INDEX_MAX_PER_TABLE", "6")),
+        'max_categories': int(os.environ.get("INGEST_INDEX_MAX_CATEGORIES", "100")),
+    }
+
+
+def looks_like_dates(values: pd.Series) -> bool:
+    """
+    Whether a sample of non-null text values are all ISO-8601 dates
+    """
+    sample = values.dropna().head(DATE_SAMPLE_SIZE)
+    return not sample.empty and all(isinstance(v, str) and ISO_DATE_PATTERN.match(v) for v in sample)
+
+
+def profile_columns(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-column distinct count, null count and kind ('key', 'date', 'category' or None)
+    """
+    row_count = len(df)
+    settings = get_ingest_index_settings()
+    profile = {}
+
+    for column in df.columns:
+        values = df[column]
+        distinct = int(values.nunique(dropna=True))
+        name = str(column).lower()
+
+        kind = None
+        if KEY_COLUMN_PATTERN.search(name):
+            kind = "key"
+        elif (
+            DATE_COLUMN_PATTERN.search(name)
+            or pd.api.types.is_datetime64_any_dtype(values)
+            or (values.dtype == object and looks_like_dates(values))
+        ):
+            kind = "date"
+        elif (
+            values.dtype == object
+            and 1 < distinct <= settings['max_categories']
+            and distinct <= row_count // 10
+        ):
+            kind = "category"
+
+        profile[column] = {
+            'distinct_count': distinct,
+            'null_count': int(values.isna().sum()),
+            'kind': kind,
+        }
+
+    return profile
+
+
+def select_index_candidates(profile: Dict[str, Dict[str, Any]], max_indexes: int) -> List[str]:
+    """
+    Columns worth indexing, keys first, then dates, then categories
+    """
+    candidates = [
+        (KIND_PRIORITY[info['kind']], -info['distinct_count'], column)
+        for column, info in profile.items()
+        if info['kind'] is not None and info['distinct_count'] > 1
+    ]
+    return [column for *_, column in sorted(candidates)[:max_indexes]]
+
+
+def index_ingested_table(conn: sqlite3.Connection, table_name: str, df: pd.DataFrame) -> List[str]:
+    """
+    Profile a freshly loaded table and build indexes on its likely key, date and
+    categorical columns. Returns the names of the created indexes.
+    """
+    settings = get_ingest_index_settings()
+    if not settings['enabled'] or len(df) < settings['min_rows']:
+        return []
+
+    profile = profile_columns(df)
+    created = []
+    for column in select_index_candidates(profile, settings['max_per_table']):
+        try:
+            created.append(create_column_index(conn, table_name, column, INGEST_INDEX_PREFIX))
+        except SQLSecurityError as e:
+            logger.warning(f"[WARNING] Skipping ingest index on {table_name}.{column}: {str(e)}")
+
+    if created:
+        # Give the planner selectivity statistics for the new indexes
+        execute_query_safely(conn, "ANALYZE {table}", identifier_params={'table': table_name})
+        conn.commit()
+        logger.info(f"[INFO] Created ingest indexes on {table_name}: {', '.join(created)}")
+
+    return created
@@ -0,0 +1,370 @@
+"""
+Per-column statistics computed at ingest and kept in a stats store.
+
+Insights are usually requested right after an upload, so the ingest path
+computes each column's statistics from the DataFrame it is loading. The
+statistics are null count, numeric min/max/sum, distinct count and top
+values. /api/insights can then answer from the store in O(columns) instead
+of scanning the table again.
+
+Each column also keeps mergeable sketches: a HyperLogLog for distinct counts
+and a Count-Min top-k for frequent values. An append-mode upload computes
+stats for the new rows and merges them in. After a merge, null counts and
+numeric stats are still exact, but distinct counts and top-value counts
+become sketch estimates.
+
+The table's MAX(rowid) is stored with its stats. A table changed outside the
+upload path no longer matches it, so stale stats are never served.
+
+Statistics live in a small SQLite database kept apart from user data.
+
+Configuration (environment variables):
+- COLUMN_STATS_ENABLED     "false" disables ingest-time stats (default true)
+- COLUMN_STATS_DB          Stats database path (default db/column_stats.db)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from .sketches import CountMinSketch, HyperLogLog, TopKSketch, hash_values
+from .sql_security import execute_query_safely
+
+logger = logging.getLogger(__name__)
+
+# Number of most common values reported per column
+TOP_VALUES_COUNT = 5
+
+
+def is_column_stats_enabled() -> bool:
+    """
+    Whether uploads compute and persist column statistics
+    """
+    return os.environ.get("COLUMN_STATS_ENABLED", "true").lower() == "true"
+
+
+def to_stats_value(value: Any) -> Any:
+    """
+    A DataFrame value as SQLite stores it: numpy scalars become Python numbers,
+    booleans become 0/1, timestamps become text
+    """
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def compute_column_stats(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Exact statistics plus mergeable sketches for every column of a DataFrame
+    """
+    stats = {}
+    for column in df.columns:
+        series = df[column]
+        values = series.dropna()
+        numeric = (
+            pd.api.types.is_numeric_dtype(series)
+            and not pd.api.types.is_bool_dtype(series)
+        ) or values.empty
+
+        hashes = hash_values(values.to_numpy())
+        distinct = HyperLogLog()
+        distinct.add_hashes(hashes)
+        frequent = TopKSketch(TOP_VALUES_COUNT)
+        frequent.add(values.to_numpy(), hashes)
+
+        counts = values.value_counts()
+        stats[column] = {
+            'row_count': len(series),
+            'null_count': len(series) - len(values),
+            'numeric': numeric,
+            'numeric_count': len(values) if numeric else 0,
+            'value_sum': float(values.sum()) if numeric and not values.empty else None,
+            'min_value': to_stats_value(values.min()) if numeric and not values.empty else None,
+            'max_value': to_stats_value(values.max()) if numeric and not values.empty else None,
+            'unique_values': len(counts),
+            'most_common': [
+                {"value": to_stats_value(value), "count": int(count)}
+                for value, count in counts.head(TOP_VALUES_COUNT).items()
+            ],
+            'exact': True,
+            'distinct': distinct,
+            'frequent': frequent,
+        }
+    return stats
+
+
+def merge_column_stats(existing: Dict[str, Any], added: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Combine the stats of a table's old rows and appended rows. Returns None when
+    the appended values change the column's kind and the stats cannot be merged.
+    """
+    if existing['numeric'] != added['numeric'] and added['numeric_count'] + existing['numeric_count'] > 0:
+        return None
+
+    def combine(left, right, pick):
+        candidates = [value for value in (left, right) if value is not None]
+        return pick(candidates) if candidates else None
+
+    distinct = existing['distinct']
+    distinct.merge(added['distinct'])
+    frequent = existing['frequent']
+    frequent.merge(added['frequent'])
+
+    return {
+        'row_count': existing['row_count'] + added['row_count'],
+        'null_count': existing['null_count'] + added['null_count'],
+        'numeric': existing['numeric'] and added['numeric'],
+        'numeric_count': existing['numeric_count'] + added['numeric_count'],
+        'value_sum': combine(existing['value_sum'], added['value_sum'], sum),
+        'min_value': combine(existing['min_value'], added['min_value'], min),
+        'max_value': combine(existing['max_value'], added['max_value'], max),
+        'unique_values': distinct.estimate(),
+        'most_common': [
+            {"value": to_stats_value(entry['value']), "count": entry['count']}
+            for entry in frequent.top()
+        ],
+        'exact': False,
+        'distinct': distinct,
+        'frequent': frequent,
+    }
+
+
+def get_max_rowid(conn: sqlite3.Connection, table_name: str) -> Optional[int]:
+    """
+    Largest rowid in a table; an O(log n) fingerprint of appends and reloads
+    """
+    return execute_query_safely(
+        conn,
+        "SELECT MAX(rowid) FROM {table}",
+        identifier_params={'table': table_name}
+    ).fetchone()[0]
+
+
+class ColumnStatsStore:
+    """Persistent per-column statistics, replaced or merged as tables are uploaded."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS column_stats (
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                max_rowid INTEGER,
+                row_count INTEGER NOT NULL,
+                null_count INTEGER NOT NULL,
+                numeric INTEGER NOT NULL,
+                numeric_count INTEGER NOT NULL,
+                value_sum REAL,
+                min_value,
+                max_value,
+                unique_values INTEGER NOT NULL,
+                most_common TEXT NOT NULL,
+                exact INTEGER NOT NULL,
+                distinct_sketch BLOB NOT NULL,
+                count_min_sketch BLOB NOT NULL,
+                top_candidates TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (table_name, column_name)
+            )
+        """)
+        return conn
+
+    def save(self, table_name: str, max_rowid: Optional[int], stats: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace a table's stats
+        """
+        updated_at = datetime.now().isoformat()
+        rows = []
+        for position, (column, entry) in enumerate(stats.items()):
+            frequent = entry['frequent']
+            rows.append((
+                table_name, column, position, max_rowid,
+                entry['row_count'], entry['null_count'],
+                int(entry['numeric']), entry['numeric_count'],
+                entry['value_sum'], entry['min_value'], entry['max_value'],
+                entry['unique_values'], json.dumps(entry['most_common'], default=str),
+                int(entry['exact']),
+                entry['distinct'].to_bytes(), frequent.counts.to_bytes(),
+                json.dumps(
+                    [[value_hash, to_stats_value(value)] for value_hash, value in frequent.candidates.items()],
+                    default=str
+                ),
+                updated_at,
+            ))
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM column_stats WHERE table_name = ?", (table_name,))
+                conn.executemany(
+                    "INSERT INTO column_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def load(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        A table's stats as {'max_rowid', 'columns': {column: stats}}, or None if none are stored
+        """
+        if not os.path.exists(self.db_path):
+            return None
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT column_name, max_rowid, row_count, null_count, numeric, numeric_count,
+                           value_sum, min_value, max_value, unique_values, most_common, exact,
+                           distinct_sketch, count_min_sketch, top_candidates
+                    FROM column_stats WHERE table_name = ? ORDER BY position
+                    """,
+                    (table_name,)
+                ).fetchall()
+            finally:
+                conn.close()
+        if not rows:
+            return None
+
+        columns = {}
+        for row in rows:
+            frequent = TopKSketch(TOP_VALUES_COUNT)
+            frequent.counts = CountMinSketch.from_bytes(row[13], frequent.counts.depth)
+            frequent.candidates = {value_hash: value for value_hash, value in json.loads(row[14])}
+            columns[row[0]] = {
+                'row_count': row[2],
+                'null_count': row[3],
+                'numeric': bool(row[4]),
+                'numeric_count': row[5],
+                'value_sum': row[6],
+                'min_value': row[7],
+                'max_value': row[8],
+                'unique_values': row[9],
+                'most_common': json.loads(row[10]),
+                'exact': bool(row[11]),
+                'distinct': HyperLogLog.from_bytes(row[12]),
+                'frequent': frequent,
+            }
+        return {'max_rowid': rows[0][1], 'columns': columns}
+
+    def delete(self, table_name: str) -> None:
+        """
+        Forget a table's stats
+        """
+        if not os.path.exists(self.db_path):
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM column_stats WHERE table_name = ?", (table_name,))
+                conn.commit()
+            finally:
+                conn.close()
+
+
+# Shared store used by uploads and insights
+column_stats = ColumnStatsStore(os.environ.get("COLUMN_STATS_DB", "db/column_stats.db"))
+
+
+def load_fresh_column_stats(table_name: str, max_rowid: Optional[int]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Stored stats for a table if they still describe it (given its current MAX(rowid)), else None
+    """
+    if not is_column_stats_enabled():
+        return None
+    stored = column_stats.load(table_name)
+    if stored is None or stored['max_rowid'] != max_rowid:
+        return None
+    return stored['columns']
+
+
+def record_ingested_table_stats(
+    conn: sqlite3.Connection,
+    table_name: str,
+    df: pd.DataFrame,
+    append: bool = False
+) -> None:
+    """
+    Store stats for a freshly loaded table, or merge an appended DataFrame into the
+    table's stats. Stats problems never fail the upload; unmergeable stats are dropped.
+    """
+    if not is_column_stats_enabled():
+        return
+    try:
+        max_rowid = get_max_rowid(conn, table_name)
+        if not append:
+            column_stats.save(table_name, max_rowid, compute_column_stats(df))
+            return
+
+        stored = column_stats.load(table_name)
+        # The stats must describe exactly the rows that were there before this append
+        if stored is None or stored['max_rowid'] != (max_rowid or 0) - len(df) or not set(df.columns) <= set(stored['columns']):
+            column_stats.delete(table_name)
+            return
+
+        added = compute_column_stats(df.reindex(columns=list(stored['columns'])))
+        merged = {}
+        for column, existing in stored['columns'].items():
+            merged[column] = merge_column_stats(existing, added[column])
+            if merged[column] is None:
+                logger.info(f"[INFO] Column kind of {table_name}.{column} changed; dropping its stats")
+                column_stats.delete(table_name)
+                return
+        column_stats.save(table_name, max_rowid, merged)
+    except Exception as e:
+        logger.warning(f"[WARNING] Column stats update failed for {table_name}: {str(e)}")
+        try:
+            column_stats.delete(table_name)
+        except Exception:
+            pass
+
+
+def forget_table_stats(table_name: str) -> None:
+    """
+    Drop a deleted table's stats; stats problems never fail the deletion
+    """
+    try:
+        column_stats.delete(table_name)
+    except Exception as e:
+        logger.warning(f"[WARNING] Column stats delete failed for {table_name}: {str(e)}")
+
+
+def build_stats_insight_fields(stats: Dict[str, Any], numeric_type: bool) -> Dict[str, Any]:
+    """
+    ColumnInsight fields for one column's stored stats
+    """
+    fields = {
+        'unique_values': stats['unique_values'],
+        'null_count': stats['null_count'],
+        'min_value': None,
+        'max_value': None,
+        'avg_value': None,
+        'most_common': stats['most_common'] or None,
+        'approximate': not stats['exact'],
+        'unique_values_error': None if stats['exact'] else stats['distinct'].relative_error,
+        'most_common_error': None if stats['exact'] else stats['frequent'].counts.error_bound,
+    }
+    if numeric_type and stats['numeric_count']:
+        fields['min_value'] = stats['min_value']
+        fields['max_value'] = stats['max_value']
+        fields['avg_value'] = stats['value_sum'] / stats['numeric_count']
+    return fields
+
@@ -0,0 +1,245 @@
+"""
+Negotiated response compression (zstd, brotli, gzip) as ASGI middleware.
+
+The encoding comes from the request's Accept-Encoding. The client's q-values
+decide first, and ties go to the first entry in RESPONSE_COMPRESSION_ENCODINGS.
+brotli and zstd are used only when their packages are installed; gzip is
+always available.
+
+- Complete bodies smaller than RESPONSE_COMPRESSION_MIN_SIZE are sent as is.
+  Larger ones are compressed in one shot at a level chosen by size. Small
+  payloads get a high ratio, and multi-MB results get fast levels, so
+  compression time never outweighs the transfer time it saves.
+- Streaming bodies (e.g. /api/query/stream Server-Sent Events) go through a
+  streaming compressor. It is flushed after every chunk, so each event still
+  reaches the client immediately.
+
+Only text-like content types are compressed. Responses that already carry a
+Content-Encoding are left alone.
+
+Configuration (environment variables):
+- RESPONSE_COMPRESSION_ENABLED     "false" disables compression (default true)
+- RESPONSE_COMPRESSION_MIN_SIZE    Smallest complete body compressed, in bytes (default 1024)
+- RESPONSE_COMPRESSION_ENCODINGS   Server preference order (default zstd,br,gzip)
+"""
+
+import gzip
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on installed packages
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on installed packages
+    zstandard = None
+
+# (largest body in bytes, gzip level, brotli quality, zstd level)
+COMPRESSION_LEVELS = [
+    (64 * 1024, 6, 6, 9),
+    (1024 * 1024, 6, 5, 6),
+    (8 * 1024 * 1024, 4, 4, 3),
+    (float("inf"), 1, 1, 1),
+]
+
+# Levels for streaming bodies, whose total size is unknown
+STREAMING_LEVELS = (5, 4, 3)
+
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def get_available_encodings() -> List[str]:
+    """
+    Encodings this process can produce
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def get_compression_settings() -> Dict[str, Any]:
+    """
+    Compression middleware settings from the environment
+    """
+    preferred = os.environ.get("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    available = get_available_encodings()
+    return {
+        'enabled': os.environ.get("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true",
+        'minimum_size': int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", "1024")),
+        'encodings': [e.strip() for e in preferred.split(",") if e.strip() in available],
+    }
+
+
+def negotiate_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    Best encoding for an Accept-Encoding header: highest q-value, then server preference
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best: Optional[Tuple[float, int, str]] = None
+    for rank, encoding in enumerate(encodings):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q <= 0:
+            continue
+        candidate = (q, -rank, encoding)
+        if best is None or candidate > best:
+            best = candidate
+    return best[2] if best else None
+
+
+def get_compression_level(encoding: str, size: int) -> int:
+    """
+    Compression level for a complete body of the given size
+    """
+    column = {"gzip": 1, "br": 2, "zstd": 3}[encoding]
+    for levels in COMPRESSION_LEVELS:
+        if size <= levels[0]:
+            return levels[column]
+    return COMPRESSION_LEVELS[-1][column]
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    """
+    One-shot compression of a complete body
+    """
+    level = get_compression_level(encoding, len(body))
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+class StreamCompressor:
+    """Incremental compressor that flushes after every chunk."""
+
+    def __init__(self, encoding: str):
+        gzip_level, brotli_quality, zstd_level = STREAMING_LEVELS
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 31: zlib stream with a gzip header
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses with the negotiated encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings if encodings is not None else get_available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Per-response state: holds the start message until the first body chunk decides."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor: Optional[StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self._passthrough:
+            await self._send(message)
+            return
+        if self._compressor is not None:
+            await self._send_compressed_chunk(message)
+            return
+
+        # First body chunk: decide for the whole response
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self._start["headers"])
+        content_type = headers.get("content-type", "")
+        if (
+            "content-encoding" in headers
+            or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            self._passthrough = True
+            await self._send(self._start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            # Streaming: total length unknown, compress and flush chunk by chunk
+            del headers["Content-Length"]
+            self._compressor = StreamCompressor(self.encoding)
+            await self._send(self._start)
+            await self._send_compressed_chunk(message)
+            return
+
+        compressed = compress_body(self.encoding, body)
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(self._start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_compressed_chunk(self, message: Message) -> None:
+        more_body = message.get("more_body", False)
+        chunk = self._compressor.compress(message.get("body", b""))
+        if not more_body:
+            chunk += self._compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
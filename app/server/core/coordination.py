@@ -0,0 +1,171 @@
+"""
+Coordination between uvicorn worker processes: a single writer and shared cache versions.
+
+`python server.py` with WEB_CONCURRENCY above 1 starts that many workers
+without reload. Each worker has its own in-process caches, and all of them
+write db/database.db. Two mechanisms keep them consistent:
+
+- Single writer. Uploads, table deletion and auto-created indexes run under
+  writer_lock(). That is a thread lock plus an exclusive flock on
+  INGEST_LOCK_PATH, so one worker writes at a time. The others wait their
+  turn instead of failing with "database is locked" once SQLite's busy
+  timeout runs out. Time spent waiting is recorded as the writer_wait phase.
+- Shared cache versions. A worker that changes a table bumps the table's
+  row in the cache_versions table of COORDINATION_DB. Caches such as
+  InsightsCache include that version in their validity check, so every
+  worker drops entries for the changed table. Reading a version is usually
+  a single PRAGMA data_version on a persistent connection. The table itself
+  is only re-read after another worker has committed a change.
+
+Before starting the workers, the user database is switched to WAL, so
+queries keep reading while one worker ingests.
+
+With a single worker (the default), the lock is process-local and cache
+versions stay in memory.
+
+Configuration (environment variables):
+- WEB_CONCURRENCY     Worker processes for `python server.py` (default 1; above 1 turns reload off)
+- COORDINATION_DB     Shared cache version database (default db/coordination.db)
+- INGEST_LOCK_PATH    Cross-process writer lock file (default db/ingest.lock)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .metrics import observe_phase
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_worker_count() -> int:
+    """
+    Worker processes the server runs with (WEB_CONCURRENCY, default 1)
+    """
+    return max(int(os.environ.get("WEB_CONCURRENCY", "1")), 1)
+
+
+def is_multi_worker() -> bool:
+    return get_worker_count() > 1
+
+
+class WriterLock:
+    """Serializes writes to the user database across threads and, optionally, processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, cross_process: bool = True) -> Iterator[None]:
+        started = time.perf_counter()
+        with self._lock:
+            if not cross_process or fcntl is None:
+                observe_phase("writer_wait", time.perf_counter() - started)
+                yield
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                observe_phase("writer_wait", time.perf_counter() - started)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CacheVersions:
+    """Per-scope version counters in SQLite, shared by every worker process."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_versions (
+                    scope TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, scope: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            # data_version only changes when another connection commits
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._versions = dict(conn.execute("SELECT scope, version FROM cache_versions").fetchall())
+                self._data_version = data_version
+            return self._versions.get(scope, 0)
+
+    def bump(self, scope: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO cache_versions (scope, version) VALUES (?, 1) "
+                "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+                (scope,)
+            )
+            conn.commit()
+            version = conn.execute("SELECT version FROM cache_versions WHERE scope = ?", (scope,)).fetchone()[0]
+            self._versions[scope] = version
+            return version
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._data_version = None
+
+
+# Shared by everything in this worker that writes the user database or versions a cache
+writer = WriterLock(os.environ.get("INGEST_LOCK_PATH", "db/ingest.lock"))
+cache_versions = CacheVersions(os.environ.get("COORDINATION_DB", "db/coordination.db"))
+
+
+def writer_lock():
+    """
+    Context manager held while writing the user database; cross-process only with several workers
+    """
+    return writer.hold(cross_process=is_multi_worker())
+
+
+def table_scope(table_name: str) -> str:
+    return f"table:{table_name}"
+
+
+def prepare_database_for_workers(db_path: str = "db/database.db") -> None:
+    """
+    Switch the user database to WAL once, before the workers start, so reads continue during ingest
+    """
+    with writer.hold():
+        conn = sqlite3.connect(db_path)
+        try:
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        finally:
+            conn.close()
+    logger.info(f"[INFO] {db_path} journal mode: {mode}")
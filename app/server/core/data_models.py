@@ -12,12 +12,13 @@ class FileUploadResponse(BaseModel):
     table_schema: Dict[str, str]  # column_name: data_type
     row_count: int
     sample_data: List[Dict[str, Any]]
+    indexes: List[str] = []  # Indexes built on likely key/date/category columns at ingest
     error: Optional[str] = None
 
 # Query Models  
 class QueryRequest(BaseModel):
     query: str = Field(..., description="Natural language query")
-    llm_provider: Literal["openai", "anthropic"] = "openai"
+    llm_provider: Literal["openai", "anthropic", "stub"] = "openai"
     table_name: Optional[str] = None  # If querying specific table
 
 class QueryResponse(BaseModel):
@@ -26,7 +27,11 @@ class QueryResponse(BaseModel):
     columns: List[str]
     row_count: int
     execution_time_ms: float
+    attempts: int = 1  # SQL generations, including repairs of failed SQL
+    repair_time_ms: float = 0
+    truncated: bool = False  # Rows beyond SQL_MAX_RESULT_ROWS were dropped
     error: Optional[str] = None
+    error_code: Optional[Literal["budget_exceeded"]] = None
 
 # Database Schema Models
 class ColumnInfo(BaseModel):
@@ -49,10 +54,15 @@ class DatabaseSchemaResponse(BaseModel):
     total_tables: int
     error: Optional[str] = None
 
+class DeleteTableResponse(BaseModel):
+    message: str
+
 # Insights Models
 class InsightsRequest(BaseModel):
     table_name: str
     column_names: Optional[List[str]] = None  # If None, analyze all columns
+    approximate: bool = False  # Sketch distinct counts and top values in one bounded-memory pass
+    distribution: bool = False  # Quantiles and histograms for numeric columns
 
 class ColumnInsight(BaseModel):
     column_name: str
@@ -63,6 +73,12 @@ class ColumnInsight(BaseModel):
     max_value: Optional[Any] = None
     avg_value: Optional[float] = None
     most_common: Optional[List[Dict[str, Any]]] = None
+    approximate: bool = False
+    unique_values_error: Optional[float] = None  # Relative standard error of unique_values (approximate mode)
+    most_common_error: Optional[int] = None  # most_common counts overstate by at most this much, 99% confidence (approximate mode)
+    quantiles: Optional[Dict[str, float]] = None  # p50/p90/p99 (distribution mode)
+    quantile_sample_size: Optional[int] = None  # Set when quantiles come from a reservoir sample of this many values
+    histogram: Optional[List[Dict[str, Any]]] = None  # Equal-width bins: {lower, upper, count}
 
 class InsightsResponse(BaseModel):
     table_name: str
@@ -79,6 +95,61 @@ class GenerateQueryResponse(BaseModel):
     tables_used: List[str]
     error: Optional[str] = None
 
+# Index Advisor Models
+class IndexInfo(BaseModel):
+    name: str
+    columns: List[str]
+    auto_created: bool  # Created by the index advisor
+    created_at: Optional[datetime] = None
+    hits: int  # Query plans that searched through this index
+    size_bytes: Optional[int] = None  # None when SQLite lacks the dbstat table
+
+class IndexRecommendation(BaseModel):
+    column: str
+    full_scans: int
+    sql: str
+
+class TableIndexStats(BaseModel):
+    table_name: str
+    full_scans: int
+    recommendations: List[IndexRecommendation]
+    indexes: List[IndexInfo]
+    index_bytes: int
+
+class IndexAdvisorResponse(BaseModel):
+    tables: List[TableIndexStats]
+    auto_create: bool
+    error: Optional[str] = None
+
+# Slow Query Log Models
+class SlowQueryEntry(BaseModel):
+    fingerprint: str  # SQL with literals replaced, shared by queries of the same shape
+    sql: str
+    plan: Optional[str] = None  # EXPLAIN QUERY PLAN summary
+    row_count: int
+    execution_ms: float
+    llm_ms: Optional[float] = None  # SQL generation time (not measured for streamed queries)
+    total_ms: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+
+class SlowQueryFingerprint(BaseModel):
+    fingerprint: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    avg_rows: float
+    last_seen: datetime
+    sample_sql: str  # Most recent query with this fingerprint
+    plan: Optional[str] = None
+
+class SlowQueryLogResponse(BaseModel):
+    threshold_ms: float
+    fingerprints: List[SlowQueryFingerprint]  # Top fingerprints by total execution time
+    recent: List[SlowQueryEntry]  # Newest first
+    error: Optional[str] = None
+
 # Health Check Models
 class HealthCheckRequest(BaseModel):
     pass
@@ -88,4 +159,30 @@ class HealthCheckResponse(BaseModel):
     database_connected: bool
     tables_count: int
     version: str = "1.0.0"
-    uptime_seconds: float
\ No newline at end of file
+    uptime_seconds: float
+
+class LivenessResponse(BaseModel):
+    status: Literal["ok"]
+    uptime_seconds: float
+
+class DatabaseProbe(BaseModel):
+    connected: bool
+    tables_count: int
+    probe_ms: float
+    age_seconds: float  # Since the last background probe
+    error: Optional[str] = None
+
+class ProviderHealth(BaseModel):
+    provider: str
+    circuit_open: bool
+    error_rate: float
+    p95_ms: Optional[float] = None
+    samples: int
+
+class ReadinessResponse(BaseModel):
+    status: Literal["ready", "not_ready"]
+    reasons: List[str]  # Why the worker is not ready; empty when ready
+    database: DatabaseProbe
+    queue_depths: Dict[str, int]  # Background tasks waiting per queue, plus requests in flight
+    pool_connections: Dict[str, int]  # Insights read-only connections by state
+    providers: List[ProviderHealth]
@@ -3,13 +3,17 @@ import pandas as pd
 import sqlite3
 import io
 import re
-from typing import Dict, Any, Set
+from typing import Dict, Any, List, Set, Tuple
 from .sql_security import (
     execute_query_safely,
     validate_identifier,
     SQLSecurityError
 )
 from .constants import NESTED_DELIMITER, LIST_INDEX_DELIMITER
+from .column_profiler import index_ingested_table
+from .column_stats import record_ingested_table_stats
+from .insights import invalidate_table_insights
+from .metrics import time_phase
 
 def sanitize_table_name(table_name: str) -> str:
     """
@@ -40,55 +44,76 @@ def sanitize_table_name(table_name: str) -> str:
     
     return sanitized
 
-def convert_csv_to_sqlite(csv_content: bytes, table_name: str) -> Dict[str, Any]:
+def describe_ingested_table(conn: sqlite3.Connection, table_name: str) -> Tuple[Dict[str, str], List[Dict[str, Any]], int]:
     """
-    Convert CSV file content to SQLite table
+    Schema, first five rows and row count of a freshly ingested table
+    """
+    # Get schema information using safe query execution
+    cursor_info = execute_query_safely(
+        conn,
+        "PRAGMA table_info({table})",
+        identifier_params={'table': table_name}
+    )
+    columns_info = cursor_info.fetchall()
+    
+    schema = {}
+    for col in columns_info:
+        schema[col[1]] = col[2]  # column_name: data_type
+    
+    # Get sample data using safe query execution
+    cursor_sample = execute_query_safely(
+        conn,
+        "SELECT * FROM {table} LIMIT 5",
+        identifier_params={'table': table_name}
+    )
+    sample_rows = cursor_sample.fetchall()
+    column_names = [col[1] for col in columns_info]
+    sample_data = [dict(zip(column_names, row)) for row in sample_rows]
+    
+    # Get row count using safe query execution
+    cursor_count = execute_query_safely(
+        conn,
+        "SELECT COUNT(*) FROM {table}",
+        identifier_params={'table': table_name}
+    )
+    row_count = cursor_count.fetchone()[0]
+    
+    return schema, sample_data, row_count
+
+def convert_csv_to_sqlite(csv_content: bytes, table_name: str, append: bool = False) -> Dict[str, Any]:
+    """
+    Convert CSV file content to SQLite table (append=True adds rows to an existing table)
     """
     try:
         # Sanitize table name
         table_name = sanitize_table_name(table_name)
         
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv(io.BytesIO(csv_content))
-        
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
+        # Read CSV into pandas DataFrame (the C parser decodes and builds columns in one pass)
+        with time_phase("ingest_dataframe"):
+            df = pd.read_csv(io.BytesIO(csv_content))
+            
+            # Clean column names
+            df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
         
         # Connect to SQLite database
         conn = sqlite3.connect("db/database.db")
         
         # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
+        with time_phase("ingest_write"):
+            df.to_sql(table_name, conn, if_exists='append' if append else 'replace', index=False)
+        
+        # Index likely join/filter columns now that the bulk load is done
+        with time_phase("ingest_index"):
+            indexes = index_ingested_table(conn, table_name, df)
+        
+        # Precompute column statistics for insights, merging them on append
+        with time_phase("ingest_stats"):
+            record_ingested_table_stats(conn, table_name, df, append)
+        invalidate_table_insights(table_name)
+        
+        # Read back the schema, sample rows and row count for the response
+        with time_phase("ingest_metadata"):
+            schema, sample_data, row_count = describe_ingested_table(conn, table_name)
         
         conn.close()
         
@@ -96,22 +121,24 @@ def convert_csv_to_sqlite(csv_content: bytes, table_name: str) -> Dict[str, Any]
             'table_name': table_name,
             'schema': schema,
             'row_count': row_count,
-            'sample_data': sample_data
+            'sample_data': sample_data,
+            'indexes': indexes
         }
         
     except Exception as e:
         raise Exception(f"Error converting CSV to SQLite: {str(e)}")
 
-def convert_json_to_sqlite(json_content: bytes, table_name: str) -> Dict[str, Any]:
+def convert_json_to_sqlite(json_content: bytes, table_name: str, append: bool = False) -> Dict[str, Any]:
     """
-    Convert JSON file content to SQLite table
+    Convert JSON file content to SQLite table (append=True adds rows to an existing table)
     """
     try:
         # Sanitize table name
         table_name = sanitize_table_name(table_name)
         
         # Parse JSON
-        data = json.loads(json_content.decode('utf-8'))
+        with time_phase("ingest_decode"):
+            data = json.loads(json_content.decode('utf-8'))
         
         # Ensure it's a list of objects
         if not isinstance(data, list):
@@ -121,46 +148,31 @@ def convert_json_to_sqlite(json_content: bytes, table_name: str) -> Dict[str, An
             raise ValueError("JSON array is empty")
         
         # Convert to pandas DataFrame
-        df = pd.DataFrame(data)
-        
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
+        with time_phase("ingest_dataframe"):
+            df = pd.DataFrame(data)
+            
+            # Clean column names
+            df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
         
         # Connect to SQLite database
         conn = sqlite3.connect("db/database.db")
         
         # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
+        with time_phase("ingest_write"):
+            df.to_sql(table_name, conn, if_exists='append' if append else 'replace', index=False)
+        
+        # Index likely join/filter columns now that the bulk load is done
+        with time_phase("ingest_index"):
+            indexes = index_ingested_table(conn, table_name, df)
+        
+        # Precompute column statistics for insights, merging them on append
+        with time_phase("ingest_stats"):
+            record_ingested_table_stats(conn, table_name, df, append)
+        invalidate_table_insights(table_name)
+        
+        # Read back the schema, sample rows and row count for the response
+        with time_phase("ingest_metadata"):
+            schema, sample_data, row_count = describe_ingested_table(conn, table_name)
         
         conn.close()
         
@@ -168,7 +180,8 @@ def convert_json_to_sqlite(json_content: bytes, table_name: str) -> Dict[str, An
             'table_name': table_name,
             'schema': schema,
             'row_count': row_count,
-            'sample_data': sample_data
+            'sample_data': sample_data,
+            'indexes': indexes
         }
         
     except Exception as e:
@@ -233,13 +246,14 @@ def discover_jsonl_fields(jsonl_content: bytes) -> Set[str]:
     
     return all_fields
 
-def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str) -> Dict[str, Any]:
+def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str, append: bool = False) -> Dict[str, Any]:
     """
     Convert JSONL file content to SQLite table with flattened structure.
     
     Args:
         jsonl_content: The raw JSONL file content
         table_name: Name for the SQLite table
+        append: Add rows to an existing table instead of replacing it
         
     Returns:
         Dict containing table info, schema, row count, and sample data
@@ -248,79 +262,65 @@ def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str) -> Dict[str,
         # Sanitize table name
         table_name = sanitize_table_name(table_name)
         
-        # First pass: discover all possible fields
-        all_fields = discover_jsonl_fields(jsonl_content)
+        # Decode every line once; the flatten and DataFrame phases reuse the parsed objects
+        with time_phase("ingest_decode"):
+            try:
+                lines = jsonl_content.decode('utf-8').strip().split('\n')
+            except UnicodeDecodeError:
+                raise ValueError("File is not valid UTF-8 encoded text")
+            
+            json_objects = []
+            for line_num, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    json_objects.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_num}: {str(e)}")
+        
+        # Flatten nested objects and collect every field, in first-seen order
+        with time_phase("ingest_flatten"):
+            flattened_objects = [flatten_json_object(json_obj) for json_obj in json_objects]
+            all_fields = {}
+            for flattened in flattened_objects:
+                all_fields.update(dict.fromkeys(flattened))
         
         if not all_fields:
             raise ValueError("No valid JSON objects found in JSONL file")
         
-        # Second pass: process each line and create consistent records
-        content = jsonl_content.decode('utf-8')
-        lines = content.strip().split('\n')
-        
-        records = []
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-                
-            try:
-                json_obj = json.loads(line)
-                flattened = flatten_json_object(json_obj)
-                
-                # Create record with all fields, filling missing ones with None
-                record = {}
-                for field in all_fields:
-                    record[field] = flattened.get(field, None)
-                
-                records.append(record)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON on line {line_num}: {str(e)}")
-        
-        if not records:
-            raise ValueError("No valid records found in JSONL file")
-        
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(records)
-        
-        # Clean column names for SQLite compatibility
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
+        with time_phase("ingest_dataframe"):
+            # Create records with all fields, filling missing ones with None
+            records = [
+                {field: flattened.get(field, None) for field in all_fields}
+                for flattened in flattened_objects
+            ]
+            
+            # Convert to pandas DataFrame
+            df = pd.DataFrame(records)
+            
+            # Clean column names for SQLite compatibility
+            df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
         
         # Connect to SQLite database
         conn = sqlite3.connect("db/database.db")
         
         # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
+        with time_phase("ingest_write"):
+            df.to_sql(table_name, conn, if_exists='append' if append else 'replace', index=False)
+        
+        # Index likely join/filter columns now that the bulk load is done
+        with time_phase("ingest_index"):
+            indexes = index_ingested_table(conn, table_name, df)
+        
+        # Precompute column statistics for insights, merging them on append
+        with time_phase("ingest_stats"):
+            record_ingested_table_stats(conn, table_name, df, append)
+        invalidate_table_insights(table_name)
+        
+        # Read back the schema, sample rows and row count for the response
+        with time_phase("ingest_metadata"):
+            schema, sample_data, row_count = describe_ingested_table(conn, table_name)
         
         conn.close()
         
@@ -328,7 +328,8 @@ def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str) -> Dict[str,
             'table_name': table_name,
             'schema': schema,
             'row_count': row_count,
-            'sample_data': sample_data
+            'sample_data': sample_data,
+            'indexes': indexes
         }
         
     except Exception as e:
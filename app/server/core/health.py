@@ -0,0 +1,180 @@
+"""
+Liveness and readiness served from memory, with a database probe refreshed in the background.
+
+Orchestrator probes arrive every second or so from several sources. Each one
+used to open a SQLite connection and list sqlite_master. Now a daemon thread
+probes the database every HEALTH_PROBE_INTERVAL_SECONDS, and the endpoints
+answer from the last result:
+- GET /api/health          The original response, built from the cached probe
+- GET /api/health/live     Liveness: the process is serving. Never touches the database.
+- GET /api/health/ready    Readiness, answered with 200 or 503. It is ready when:
+    - the last probe succeeded and is at most HEALTH_MAX_PROBE_AGE_SECONDS old
+    - no background queue (index advisor, slow-query log) holds more than
+      HEALTH_MAX_QUEUE_DEPTH tasks
+  The body also reports requests in flight, the insights connection pool and
+  each LLM provider's circuit state. Providers do not gate readiness: schema,
+  upload and insights keep working without an LLM.
+
+Probes are only logged when the database state changes.
+
+Configuration (environment variables):
+- HEALTH_PROBE_INTERVAL_SECONDS    Seconds between database probes (default 5)
+- HEALTH_MAX_PROBE_AGE_SECONDS     Oldest probe readiness accepts (default 30)
+- HEALTH_MAX_QUEUE_DEPTH           Background queue depth above which the worker is not ready (default 100)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .index_advisor import index_advisor
+from .llm_router import router
+from .metrics import db_pool_connections, requests_in_flight
+from .slow_query_log import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Background database probe plus the readiness checks built on it."""
+
+    def __init__(
+        self,
+        db_path: str = "db/database.db",
+        interval_seconds: float = 5.0,
+        max_probe_age_seconds: float = 30.0,
+        max_queue_depth: int = 100
+    ):
+        self.db_path = db_path
+        self.interval_seconds = interval_seconds
+        self.max_probe_age_seconds = max_probe_age_seconds
+        self.max_queue_depth = max_queue_depth
+        self._lock = threading.Lock()
+        self._probe: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "HealthMonitor":
+        return cls(
+            interval_seconds=float(os.environ.get("HEALTH_PROBE_INTERVAL_SECONDS", "5")),
+            max_probe_age_seconds=float(os.environ.get("HEALTH_MAX_PROBE_AGE_SECONDS", "30")),
+            max_queue_depth=int(os.environ.get("HEALTH_MAX_QUEUE_DEPTH", "100")),
+        )
+
+    def probe(self) -> Dict[str, Any]:
+        """
+        Check the database now and cache the result
+        """
+        started = time.perf_counter()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                tables_count = conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+                ).fetchone()[0]
+            finally:
+                conn.close()
+            result = {'connected': True, 'tables_count': tables_count, 'error': None}
+        except Exception as e:
+            result = {'connected': False, 'tables_count': 0, 'error': str(e)}
+        result['probe_ms'] = (time.perf_counter() - started) * 1000
+        result['checked_at'] = time.monotonic()
+
+        with self._lock:
+            previous, self._probe = self._probe, result
+        if previous is None or previous['connected'] != result['connected']:
+            if result['connected']:
+                logger.info(f"[INFO] Health probe: database connected, {result['tables_count']} tables")
+            else:
+                logger.warning(f"[WARNING] Health probe: database unavailable: {result['error']}")
+        return result
+
+    def last_probe(self) -> Dict[str, Any]:
+        """
+        The cached probe; probes synchronously only if none has run yet
+        """
+        with self._lock:
+            probe = self._probe
+        return probe if probe is not None else self.probe()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"[WARNING] Health probe failed: {str(e)}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-probe", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=1)
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Readiness from the cached probe and in-memory queue, pool and provider state
+        """
+        probe = self.last_probe()
+        age = time.monotonic() - probe['checked_at']
+        queue_depths = {
+            'index_advisor': index_advisor.queue_depth(),
+            'slow_query_log': slow_query_log.queue_depth(),
+            'requests_in_flight': int(requests_in_flight.value()),
+        }
+        pool_connections = {
+            state: int(count)
+            for (pool, state), count in db_pool_connections.snapshot().items()
+            if pool == "insights"
+        }
+        providers: List[Dict[str, Any]] = [
+            {
+                'provider': provider,
+                'circuit_open': stats['circuit_open'],
+                'error_rate': stats['error_rate'],
+                'p95_ms': stats['p95_ms'],
+                'samples': stats['samples'],
+            }
+            for provider, stats in sorted(router.snapshot().items())
+        ]
+
+        reasons = []
+        if not probe['connected']:
+            reasons.append(f"database unavailable: {probe['error']}")
+        if age > self.max_probe_age_seconds:
+            reasons.append(f"database probe is {age:.0f}s old")
+        for queue in ('index_advisor', 'slow_query_log'):
+            if queue_depths[queue] > self.max_queue_depth:
+                reasons.append(f"{queue} queue depth {queue_depths[queue]} exceeds {self.max_queue_depth}")
+
+        return {
+            'ready': not reasons,
+            'reasons': reasons,
+            'database': {
+                'connected': probe['connected'],
+                'tables_count': probe['tables_count'],
+                'probe_ms': probe['probe_ms'],
+                'age_seconds': age,
+                'error': probe['error'],
+            },
+            'queue_depths': queue_depths,
+            'pool_connections': pool_connections,
+            'providers': providers,
+        }
+
+
+# Shared monitor started by the server's lifespan
+health_monitor = HealthMonitor.from_env()
@@ -0,0 +1,450 @@
+"""
+Query plan analysis and index advisor.
+
+Uploaded tables start without indexes, so LLM-generated filters and joins
+often scan whole tables. After a query succeeds, its EXPLAIN QUERY PLAN is
+captured on a background thread. Full scans of large tables are matched
+against the columns the query compares in WHERE/ON clauses, and each
+unindexed column becomes a recommended index. Plans that search through an
+index count as hits for that index.
+
+In auto-create mode, a recommendation is built as an index once it has been
+seen often enough. Every table has a cap on how many indexes it may get this
+way. Per-table full scans, recommendations, index hits and index disk usage
+are available from snapshot().
+
+Configuration (environment variables):
+- INDEX_ADVISOR_ENABLED          "false" disables plan capture (default true)
+- INDEX_ADVISOR_MIN_ROWS         Tables smaller than this are never flagged (default 10000)
+- INDEX_ADVISOR_AUTO_CREATE      "true" builds recommended indexes in the background (default false)
+- INDEX_ADVISOR_MIN_SCANS        Full scans needed before an index is auto-created (default 3)
+- INDEX_ADVISOR_MAX_PER_TABLE    Auto-created indexes allowed per table (default 5)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.coordination import writer_lock
+from core.sql_lexer import analyze_sql, unquote_identifier, WORD, QUOTED_IDENTIFIER, OPERATOR
+from core.sql_security import (
+    execute_query_safely,
+    escape_identifier,
+    get_safe_table_list,
+    install_read_only_authorizer,
+    SQLSecurityError
+)
+
+logger = logging.getLogger(__name__)
+
+# Name prefix of indexes created by the advisor
+AUTO_INDEX_PREFIX = "auto_ix_"
+
+COMPARISON_OPERATORS = {"=", "==", "<", ">", "<=", ">=", "<>", "!="}
+COMPARISON_KEYWORDS = {"IN", "BETWEEN", "LIKE", "GLOB", "IS"}
+
+# Keywords that start the predicate clauses whose columns are index candidates
+PREDICATE_CLAUSE_KEYWORDS = {"WHERE", "ON"}
+
+# Keywords that end a predicate clause
+CLAUSE_KEYWORDS = {
+    "SELECT", "FROM", "JOIN", "GROUP", "ORDER", "LIMIT", "HAVING", "UNION",
+    "INTERSECT", "EXCEPT", "WINDOW", "OFFSET", "USING",
+}
+
+# Words that can follow a table name but are not aliases
+NON_ALIAS_KEYWORDS = CLAUSE_KEYWORDS | PREDICATE_CLAUSE_KEYWORDS | {
+    "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "OUTER", "NATURAL", "INDEXED", "NOT", "AS",
+}
+
+PLAN_PATTERN = re.compile(r"^(SCAN|SEARCH) (\S+)(?: AS \S+)?(?: USING (?:COVERING |AUTOMATIC (?:COVERING |PARTIAL )?)?INDEX (\S+))?")
+
+
+def parse_table_aliases(sql: str) -> Dict[str, str]:
+    """
+    Map every table name and alias after FROM/JOIN/comma to its table, lowercased
+    """
+    analysis = analyze_sql(sql)
+    tokens = [t for t in analysis.tokens if t.type != "comment"]
+    tables = {name.lower() for name in analysis.tables}
+    aliases: Dict[str, str] = {}
+
+    for index, token in enumerate(tokens):
+        if token.type not in (WORD, QUOTED_IDENTIFIER):
+            continue
+        name = unquote_identifier(token.value).lower()
+        if name not in tables:
+            continue
+        previous = tokens[index - 1].value.upper() if index else ""
+        if previous not in ("FROM", "JOIN", ","):
+            continue
+
+        aliases[name] = name
+        position = index + 1
+        if position < len(tokens) and tokens[position].value.upper() == "AS":
+            position += 1
+        if position < len(tokens) and tokens[position].type in (WORD, QUOTED_IDENTIFIER):
+            alias = unquote_identifier(tokens[position].value)
+            if alias.upper() not in NON_ALIAS_KEYWORDS:
+                aliases[alias.lower()] = name
+
+    return aliases
+
+
+def extract_predicate_columns(sql: str) -> List[Tuple[Optional[str], str]]:
+    """
+    (qualifier, column) pairs compared in WHERE and ON clauses, lowercased
+    """
+    tokens = [t for t in analyze_sql(sql).tokens if t.type != "comment"]
+    columns: List[Tuple[Optional[str], str]] = []
+    in_predicate = False
+
+    for index, token in enumerate(tokens):
+        upper = token.value.upper() if token.type == WORD else None
+        if upper in PREDICATE_CLAUSE_KEYWORDS:
+            in_predicate = True
+            continue
+        if upper in CLAUSE_KEYWORDS:
+            in_predicate = False
+            continue
+        if not in_predicate or token.type not in (WORD, QUOTED_IDENTIFIER):
+            continue
+
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        if following is not None and following.value in ("(", "."):
+            continue  # function call, or a qualifier handled with its column
+
+        qualifier = None
+        if index >= 2 and tokens[index - 1].value == "." and tokens[index - 2].type in (WORD, QUOTED_IDENTIFIER):
+            qualifier = unquote_identifier(tokens[index - 2].value).lower()
+            before = tokens[index - 3] if index >= 3 else None
+        else:
+            before = tokens[index - 1] if index else None
+
+        compared_after = following is not None and (
+            (following.type == OPERATOR and following.value in COMPARISON_OPERATORS)
+            or following.value.upper() in COMPARISON_KEYWORDS
+            or (following.value.upper() == "NOT" and index + 2 < len(tokens)
+                and tokens[index + 2].value.upper() in COMPARISON_KEYWORDS)
+        )
+        compared_before = before is not None and before.type == OPERATOR and before.value in COMPARISON_OPERATORS
+
+        if compared_after or compared_before:
+            columns.append((qualifier, unquote_identifier(token.value).lower()))
+
+    return columns
+
+
+def parse_query_plan(plan_rows: List[Tuple]) -> List[Dict[str, Any]]:
+    """
+    Table accesses from EXPLAIN QUERY PLAN rows: {'kind', 'target', 'index'}
+    """
+    accesses = []
+    for row in plan_rows:
+        match = PLAN_PATTERN.match(row[3])
+        if match:
+            accesses.append({'kind': match.group(1), 'target': match.group(2), 'index': match.group(3)})
+    return accesses
+
+
+def build_index_name(prefix: str, table_name: str, column_name: str) -> str:
+    """
+    Deterministic, identifier-safe index name for a single-column index
+    """
+    return re.sub(r"\W+", "_", f"{prefix}{table_name}_{column_name}").lower()
+
+
+def create_column_index(conn: sqlite3.Connection, table_name: str, column_name: str, prefix: str) -> str:
+    """
+    Create a single-column index if it does not exist and return its name.
+
+    Raises:
+        SQLSecurityError: If the table or column name is not a valid identifier
+    """
+    index_name = build_index_name(prefix, table_name, column_name)
+    execute_query_safely(
+        conn,
+        "CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})",
+        identifier_params={'index': index_name, 'table': table_name, 'column': column_name},
+        allow_ddl=True
+    )
+    return index_name
+
+
+def count_auto_indexes(conn: sqlite3.Connection, table_name: str) -> int:
+    """
+    Indexes the advisor has created on a table, read from sqlite_master
+    """
+    return conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = ? COLLATE NOCASE "
+        "AND name LIKE ? ESCAPE '\\'",
+        (table_name, AUTO_INDEX_PREFIX.replace("_", "\\_") + "%")
+    ).fetchone()[0]
+
+
+def quote_schema_identifier(identifier: str) -> str:
+    """
+    Quote a name read back from sqlite_master (e.g. sqlite_autoindex_users_1), which
+    is trusted but may not pass validate_identifier
+    """
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def get_indexed_columns(conn: sqlite3.Connection, table_name: str) -> Dict[str, List[str]]:
+    """
+    Index name -> indexed columns for a table
+    """
+    indexes = {}
+    for row in execute_query_safely(conn, "PRAGMA index_list({table})", identifier_params={'table': table_name}).fetchall():
+        index_name = row[1]
+        info = conn.execute(f"PRAGMA index_info({quote_schema_identifier(index_name)})").fetchall()
+        indexes[index_name] = [col[2] for col in info]
+    return indexes
+
+
+class IndexAdvisor:
+    """Captures query plans, recommends indexes and optionally creates them."""
+
+    def __init__(
+        self,
+        db_path: str = "db/database.db",
+        min_rows: int = 10000,
+        auto_create: bool = False,
+        min_scans: int = 3,
+        max_per_table: int = 5,
+    ):
+        self.db_path = db_path
+        self.min_rows = min_rows
+        self.auto_create = auto_create
+        self.min_scans = min_scans
+        self.max_per_table = max_per_table
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0                                           # analyses submitted and not finished
+        self._full_scans: Counter = Counter()                       # table -> full scans seen
+        self._recommendations: Dict[str, Counter] = defaultdict(Counter)  # table -> column -> scans
+        self._index_hits: Counter = Counter()                       # index name -> plans using it
+        self._created: Dict[str, str] = {}                          # index name -> created_at
+
+    @classmethod
+    def from_env(cls) -> "IndexAdvisor":
+        return cls(
+            min_rows=int(os.environ.get("INDEX_ADVISOR_MIN_ROWS", "10000")),
+            auto_create=os.environ.get("INDEX_ADVISOR_AUTO_CREATE", "false").lower() == "true",
+            min_scans=int(os.environ.get("INDEX_ADVISOR_MIN_SCANS", "3")),
+            max_per_table=int(os.environ.get("INDEX_ADVISOR_MAX_PER_TABLE", "5")),
+        )
+
+    def reset(self) -> None:
+        """Forget all collected statistics."""
+        with self._lock:
+            self._full_scans.clear()
+            self._recommendations.clear()
+            self._index_hits.clear()
+            self._created.clear()
+
+    def _estimate_rows(self, conn: sqlite3.Connection, table_name: str) -> int:
+        # MAX(rowid) is a B-tree lookup; fall back to COUNT(*) for WITHOUT ROWID tables
+        try:
+            row = execute_query_safely(conn, "SELECT MAX(rowid) FROM {table}", identifier_params={'table': table_name}).fetchone()
+        except sqlite3.OperationalError:
+            row = execute_query_safely(conn, "SELECT COUNT(*) FROM {table}", identifier_params={'table': table_name}).fetchone()
+        return row[0] or 0
+
+    def analyze(self, sql: str) -> List[Dict[str, str]]:
+        """
+        Capture the plan of an executed query, update statistics and return the
+        indexes it would benefit from as [{'table', 'column'}]
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # The query text is user-controlled: explain it under the same read-only rules it ran with
+            install_read_only_authorizer(conn)
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            conn.set_authorizer(None)
+
+            accesses = parse_query_plan(plan)
+            aliases = parse_table_aliases(sql)
+            predicates = extract_predicate_columns(sql)
+
+            recommended = []
+            with self._lock:
+                for access in accesses:
+                    if access['index']:
+                        self._index_hits[access['index']] += 1
+
+            user_tables = {name.lower() for name in get_safe_table_list(conn)}
+            for access in accesses:
+                if access['kind'] != "SCAN" or access['index']:
+                    continue
+                table_name = aliases.get(access['target'].lower(), access['target'].lower())
+                if table_name not in user_tables:
+                    continue
+                if self._estimate_rows(conn, table_name) < self.min_rows:
+                    continue
+
+                table_columns = {
+                    row[1].lower(): row[1]
+                    for row in execute_query_safely(conn, "PRAGMA table_info({table})", identifier_params={'table': table_name}).fetchall()
+                }
+                leading_columns = {columns[0].lower() for columns in get_indexed_columns(conn, table_name).values() if columns}
+
+                candidates = []
+                for qualifier, column in predicates:
+                    if qualifier is not None and aliases.get(qualifier) != table_name:
+                        continue
+                    if column not in table_columns or column in leading_columns or column in candidates:
+                        continue
+                    candidates.append(column)
+
+                with self._lock:
+                    self._full_scans[table_name] += 1
+                    for column in candidates:
+                        self._recommendations[table_name][table_columns[column]] += 1
+                recommended.extend({'table': table_name, 'column': table_columns[c]} for c in candidates)
+
+            if self.auto_create:
+                self._create_due_indexes(conn, recommended)
+            return recommended
+        finally:
+            conn.close()
+
+    def _create_due_indexes(self, conn: sqlite3.Connection, recommended: List[Dict[str, str]]) -> None:
+        for recommendation in recommended:
+            table_name, column_name = recommendation['table'], recommendation['column']
+            with self._lock:
+                scans = self._recommendations[table_name][column_name]
+            if scans < self.min_scans:
+                continue
+            try:
+                with writer_lock():
+                    # Counted under the writer lock, so indexes built by other workers count too
+                    if count_auto_indexes(conn, table_name) >= self.max_per_table:
+                        continue
+                    index_name = create_column_index(conn, table_name, column_name, AUTO_INDEX_PREFIX)
+                    conn.commit()
+            except (SQLSecurityError, sqlite3.Error) as e:
+                logger.warning(f"[WARNING] Index creation failed for {table_name}.{column_name}: {str(e)}")
+                continue
+            with self._lock:
+                self._created[index_name] = datetime.now().isoformat()
+                self._recommendations[table_name].pop(column_name, None)
+            logger.info(f"[INFO] Created index {index_name} on {table_name}({column_name})")
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-advisor")
+            return self._executor
+
+    def queue_depth(self) -> int:
+        """
+        Plan analyses queued or running on the background thread
+        """
+        with self._lock:
+            return self._pending
+
+    def _task_done(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def observe(self, sql: str) -> None:
+        """
+        Analyze an executed query on the background thread
+        """
+        def run() -> None:
+            try:
+                self.analyze(sql)
+            except Exception as e:
+                logger.warning(f"[WARNING] Query plan analysis failed: {str(e)}")
+
+        executor = self._get_executor()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._task_done)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-table full scans, pending recommendations and indexes with hits and disk usage
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            try:
+                index_sizes = dict(conn.execute(
+                    "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+                ).fetchall())
+            except sqlite3.OperationalError:
+                index_sizes = {}  # SQLite built without the dbstat virtual table
+
+            tables = {}
+            for table_name in get_safe_table_list(conn):
+                key = table_name.lower()
+                with self._lock:
+                    full_scans = self._full_scans.get(key, 0)
+                    recommendations = dict(self._recommendations.get(key, {}))
+                    hits = dict(self._index_hits)
+                    created = dict(self._created)
+
+                indexes = []
+                for index_name, columns in get_indexed_columns(conn, table_name).items():
+                    indexes.append({
+                        'name': index_name,
+                        'columns': columns,
+                        'auto_created': index_name.startswith(AUTO_INDEX_PREFIX),
+                        'created_at': created.get(index_name),
+                        'hits': hits.get(index_name, 0),
+                        'size_bytes': index_sizes.get(index_name),
+                    })
+
+                tables[table_name] = {
+                    'full_scans': full_scans,
+                    'recommendations': [
+                        {
+                            'column': column,
+                            'full_scans': scans,
+                            'sql': f"CREATE INDEX {build_index_name(AUTO_INDEX_PREFIX, key, column)} "
+                                   f"ON {escape_identifier(table_name)} ({escape_identifier(column)})",
+                        }
+                        for column, scans in sorted(recommendations.items(), key=lambda item: -item[1])
+                    ],
+                    'indexes': indexes,
+                    'index_bytes': sum(index['size_bytes'] or 0 for index in indexes),
+                }
+            return tables
+        finally:
+            conn.close()
+
+
+def is_index_advisor_enabled() -> bool:
+    """
+    Whether executed queries are analyzed (INDEX_ADVISOR_ENABLED, default true)
+    """
+    return os.environ.get("INDEX_ADVISOR_ENABLED", "true").lower() == "true"
+
+
+# Shared advisor used by the query endpoints
+index_advisor = IndexAdvisor.from_env()
+
+
+def observe_executed_query(sql: str) -> None:
+    """
+    Queue plan analysis for a successfully executed query; advisor problems never fail the query
+    """
+    if not sql or not is_index_advisor_enabled():
+        return
+    try:
+        index_advisor.observe(sql)
+    except Exception as e:
+        logger.warning(f"[WARNING] Index advisor failed: {str(e)}")
@@ -0,0 +1,16 @@
+"""
+Entry points into the pandas- and numpy-backed modules, imported on first use (see core/lazy_imports.py).
+
+server.py calls the upload converters, column statistics and insights
+through these names. pandas and numpy load with the first upload, insights
+request or table deletion, not when the server starts.
+"""
+
+from .lazy_imports import LazyCallable
+
+convert_csv_to_sqlite = LazyCallable("core.file_processor", "convert_csv_to_sqlite")
+convert_json_to_sqlite = LazyCallable("core.file_processor", "convert_json_to_sqlite")
+convert_jsonl_to_sqlite = LazyCallable("core.file_processor", "convert_jsonl_to_sqlite")
+generate_insights = LazyCallable("core.insights", "generate_insights")
+invalidate_table_insights = LazyCallable("core.insights", "invalidate_table_insights")
+forget_table_stats = LazyCallable("core.column_stats", "forget_table_stats")
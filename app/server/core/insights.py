@@ -1,22 +1,513 @@
+"""
+Column insights for the insights panel.
+
+Statistics for all requested columns come from a handful of table scans
+rather than several queries per column:
+
+1. One counting pass reads every requested column and counts values batch by
+   batch in memory. That gives null counts, distinct counts and top values.
+2. One aggregate pass computes the row count and numeric MIN/MAX/AVG.
+
+A column with more than MAX_COUNTED_DISTINCT distinct values stops being
+counted in memory. Its null and distinct counts move into the aggregate pass.
+Its top values come from a LIMIT query when every value is distinct, and
+from a GROUP BY otherwise.
+
+Tables uploaded through the API usually have statistics precomputed at ingest
+(see core/column_stats.py), and those answer without scanning. Exact requests
+only use them while they are still exact, that is, before any append.
+
+Distribution mode adds quantiles (p50/p90/p99) and a fixed-bin histogram for
+numeric columns. Each column's numeric values are streamed into NumPy arrays
+with a typed fetch (CAST to REAL), so no ORDER BY/OFFSET query per quantile is
+needed. Histogram bins span the column's known MIN/MAX and are always exact.
+Quantiles are exact up to INSIGHTS_MAX_EXACT_VALUES values. Past that they
+come from a uniform reservoir sample of INSIGHTS_RESERVOIR_SIZE values.
+
+Work that is independent per column (SQL top values for uncounted columns,
+distribution scans) runs on a thread pool with a pool of read-only
+connections, INSIGHTS_PARALLELISM wide. Results are cached per request until
+the table's version changes (see InsightsCache). With several workers, table
+versions are shared through core/coordination.py.
+
+Approximate mode replaces the counting pass with one streaming pass that
+builds sketches in bounded memory, whatever the cardinality. HyperLogLog
+estimates distinct counts and a Count-Min top-k sketch finds frequent
+values. Null counts and numeric stats stay exact. Each insight reports the
+sketches' error bounds.
+"""
+
+import os
+import queue
 import sqlite3
-from typing import List, Optional
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
 from core.data_models import ColumnInsight
+from .coordination import CacheVersions, cache_versions, is_multi_worker, table_scope
+from .metrics import db_pool_connections, db_pool_wait, record_cache_lookup
+from .column_stats import (
+    TOP_VALUES_COUNT,
+    build_stats_insight_fields,
+    get_max_rowid,
+    load_fresh_column_stats
+)
+from .sketches import (
+    COUNT_MIN_DEPTH,
+    COUNT_MIN_WIDTH,
+    HLL_PRECISION,
+    HyperLogLog,
+    ReservoirSample,
+    TopKSketch,
+    hash_values
+)
 from .sql_security import (
     execute_query_safely,
     validate_identifier,
     SQLSecurityError
 )
 
-def generate_insights(table_name: str, column_names: Optional[List[str]] = None) -> List[ColumnInsight]:
+NUMERIC_TYPES = ['INTEGER', 'REAL', 'NUMERIC']
+
+# Aggregate expressions per SELECT (SQLite allows 2000 result columns by default)
+MAX_AGGREGATES_PER_SCAN = 500
+
+# Distinct values counted in memory per column before falling back to SQL
+MAX_COUNTED_DISTINCT = 50000
+
+# Rows fetched per batch in the counting pass
+COUNT_BATCH_SIZE = 10000
+
+# Quantiles reported in distribution mode
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def get_histogram_bins() -> int:
+    """
+    Number of equal-width histogram bins in distribution mode
+    """
+    return int(os.environ.get("INSIGHTS_HISTOGRAM_BINS", "20"))
+
+
+def get_max_exact_values() -> int:
+    """
+    Values per column held in memory for exact quantiles before sampling
+    """
+    return int(os.environ.get("INSIGHTS_MAX_EXACT_VALUES", "1000000"))
+
+
+def get_reservoir_size() -> int:
+    """
+    Reservoir sample size for quantiles of larger columns
+    """
+    return int(os.environ.get("INSIGHTS_RESERVOIR_SIZE", "100000"))
+
+
+def build_identifier_params(table_name: str, column_names: List[str]) -> Dict[str, str]:
+    """
+    identifier_params for a query over {table} and columns {c0}, {c1}, ...
+    """
+    params = {'table': table_name}
+    for index, column in enumerate(column_names):
+        params[f"c{index}"] = column
+    return params
+
+
+def count_column_values(
+    conn: sqlite3.Connection,
+    table_name: str,
+    column_names: List[str]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    null_count, unique_values and most_common for several columns from one pass
+    over the table. Columns exceeding MAX_COUNTED_DISTINCT map to None.
+    """
+    identifier_params = build_identifier_params(table_name, column_names)
+    select_list = ", ".join(f"{{c{index}}}" for index in range(len(column_names)))
+    cursor = execute_query_safely(
+        conn,
+        f"SELECT {select_list} FROM {{table}}",
+        identifier_params=identifier_params
+    )
+
+    counters: List[Optional[Counter]] = [Counter() for _ in column_names]
+    while True:
+        rows = cursor.fetchmany(COUNT_BATCH_SIZE)
+        if not rows:
+            break
+        # Transpose the batch so each counter is updated in C
+        for index, values in enumerate(zip(*rows)):
+            counter = counters[index]
+            if counter is None:
+                continue
+            counter.update(values)
+            if len(counter) > MAX_COUNTED_DISTINCT:
+                counters[index] = None
+
+    counts = {}
+    for col_name, counter in zip(column_names, counters):
+        if counter is None:
+            counts[col_name] = None
+            continue
+        null_count = counter.pop(None, 0)
+        counts[col_name] = {
+            'null_count': null_count,
+            'unique_values': len(counter),
+            'most_common': [
+                {"value": value, "count": count}
+                for value, count in counter.most_common(TOP_VALUES_COUNT)
+            ],
+        }
+    return counts
+
+
+def sketch_column_values(
+    conn: sqlite3.Connection,
+    table_name: str,
+    column_names: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Exact null counts plus sketched unique_values and most_common for several
+    columns from one streaming pass, with the sketches' error bounds
+    """
+    identifier_params = build_identifier_params(table_name, column_names)
+    select_list = ", ".join(f"{{c{index}}}" for index in range(len(column_names)))
+    cursor = execute_query_safely(
+        conn,
+        f"SELECT {select_list} FROM {{table}}",
+        identifier_params=identifier_params
+    )
+
+    null_counts = [0] * len(column_names)
+    distinct = [HyperLogLog(HLL_PRECISION) for _ in column_names]
+    frequent = [TopKSketch(TOP_VALUES_COUNT, COUNT_MIN_WIDTH, COUNT_MIN_DEPTH) for _ in column_names]
+    while True:
+        rows = cursor.fetchmany(COUNT_BATCH_SIZE)
+        if not rows:
+            break
+        for index, values in enumerate(zip(*rows)):
+            non_null = [value for value in values if value is not None]
+            null_counts[index] += len(values) - len(non_null)
+            hashes = hash_values(non_null)
+            distinct[index].add_hashes(hashes)
+            frequent[index].add(non_null, hashes)
+
+    sketches = {}
+    for index, col_name in enumerate(column_names):
+        sketches[col_name] = {
+            'null_count': null_counts[index],
+            'unique_values': distinct[index].estimate(),
+            'unique_values_error': distinct[index].relative_error,
+            'most_common': frequent[index].top(),
+            'most_common_error': frequent[index].counts.error_bound,
+        }
+    return sketches
+
+
+def compute_column_aggregates(
+    conn: sqlite3.Connection,
+    table_name: str,
+    numeric_columns: List[str],
+    uncounted_columns: List[str]
+) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """
+    Row count, MIN/MAX/AVG of numeric columns, and null/distinct counts of columns
+    the counting pass gave up on, in one scan per MAX_AGGREGATES_PER_SCAN expressions
+    """
+    column_names = list(dict.fromkeys(numeric_columns + uncounted_columns))
+    placeholders = {name: f"{{c{index}}}" for index, name in enumerate(column_names)}
+
+    expressions: List[Tuple[str, str, str]] = []  # (column, stat, SQL template)
+    for col_name in numeric_columns:
+        expressions.append((col_name, 'min_value', f"MIN({placeholders[col_name]})"))
+        expressions.append((col_name, 'max_value', f"MAX({placeholders[col_name]})"))
+        expressions.append((col_name, 'avg_value', f"AVG({placeholders[col_name]})"))
+    for col_name in uncounted_columns:
+        expressions.append((col_name, 'null_count', f"COUNT(*) - COUNT({placeholders[col_name]})"))
+        expressions.append((col_name, 'unique_values', f"COUNT(DISTINCT {placeholders[col_name]})"))
+
+    identifier_params = build_identifier_params(table_name, column_names)
+    aggregates: Dict[str, Dict[str, Any]] = {name: {} for name in column_names}
+    row_count = 0
+
+    # Always run at least one pass so the row count is known
+    for start in range(0, max(len(expressions), 1), MAX_AGGREGATES_PER_SCAN):
+        batch = expressions[start:start + MAX_AGGREGATES_PER_SCAN]
+        select_list = ", ".join(["COUNT(*)"] + [template for _, _, template in batch])
+        row = execute_query_safely(
+            conn,
+            f"SELECT {select_list} FROM {{table}}",
+            identifier_params=identifier_params
+        ).fetchone()
+        row_count = row[0]
+        for (col_name, stat, _), value in zip(batch, row[1:]):
+            aggregates[col_name][stat] = value
+
+    return row_count, aggregates
+
+
+def query_top_values(conn: sqlite3.Connection, table_name: str, col_name: str, all_distinct: bool) -> List[Dict[str, Any]]:
+    """
+    Most common non-null values of one column in SQL; all-distinct columns need no grouping
+    """
+    if all_distinct:
+        rows = execute_query_safely(
+            conn,
+            "SELECT {column}, 1 FROM {table} WHERE {column} IS NOT NULL LIMIT ?",
+            params=(TOP_VALUES_COUNT,),
+            identifier_params={'column': col_name, 'table': table_name}
+        ).fetchall()
+    else:
+        rows = execute_query_safely(
+            conn,
+            """
+            SELECT {column}, COUNT(*) as count
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+            ORDER BY count DESC
+            LIMIT ?
+            """,
+            params=(TOP_VALUES_COUNT,),
+            identifier_params={'column': col_name, 'table': table_name}
+        ).fetchall()
+    return [{"value": val, "count": count} for val, count in rows]
+
+
+def compute_numeric_distribution(
+    conn: sqlite3.Connection,
+    table_name: str,
+    col_name: str,
+    min_value: float,
+    max_value: float
+) -> Dict[str, Any]:
+    """
+    Quantiles and a fixed-bin histogram of a numeric column's values from one typed,
+    batched fetch. Quantiles fall back to a reservoir sample on large columns.
     """
-    Generate statistical insights for table columns
+    # A constant column gets a single bin
+    bins = max(get_histogram_bins(), 1) if max_value > min_value else 1
+    max_exact = get_max_exact_values()
+    edges = np.linspace(float(min_value), float(max_value), bins + 1)
+    histogram = np.zeros(bins, dtype=np.int64)
+
+    cursor = execute_query_safely(
+        conn,
+        "SELECT CAST({column} AS REAL) FROM {table} WHERE typeof({column}) IN ('integer', 'real')",
+        identifier_params={'column': col_name, 'table': table_name}
+    )
+    batches: List[np.ndarray] = []
+    held = 0
+    reservoir: Optional[ReservoirSample] = None
+    while True:
+        rows = cursor.fetchmany(COUNT_BATCH_SIZE)
+        if not rows:
+            break
+        values = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        histogram += np.histogram(values, bins=bins, range=(min_value, max_value))[0]
+
+        if reservoir is None and held + len(values) > max_exact:
+            # Too many values to hold: sample what we have and everything after it
+            reservoir = ReservoirSample(get_reservoir_size())
+            for batch in batches:
+                reservoir.add(batch)
+            batches = []
+        if reservoir is not None:
+            reservoir.add(values)
+        else:
+            batches.append(values)
+            held += len(values)
+
+    sample = reservoir.values() if reservoir is not None else (
+        np.concatenate(batches) if batches else np.empty(0)
+    )
+    if len(sample) == 0:
+        return {}
+
+    quantiles = np.quantile(sample, list(QUANTILES.values()))
+    return {
+        'quantiles': {name: float(value) for name, value in zip(QUANTILES, quantiles)},
+        'quantile_sample_size': len(sample) if reservoir is not None else None,
+        'histogram': [
+            {"lower": float(edges[index]), "upper": float(edges[index + 1]), "count": int(count)}
+            for index, count in enumerate(histogram)
+        ],
+    }
+
+
+def numeric_distribution_tasks(table_name: str, insights: List[ColumnInsight]) -> List[Tuple[ColumnInsight, Callable]]:
+    """
+    (insight, task) pairs computing quantiles and histograms of numeric columns with at least one number
+    """
+    tasks = []
+    for insight in insights:
+        if insight.data_type not in NUMERIC_TYPES:
+            continue
+        # MIN/MAX are text when the column holds no numbers or mixes text in
+        if not all(isinstance(v, (int, float)) for v in (insight.min_value, insight.max_value)):
+            continue
+        tasks.append((insight, partial(
+            compute_numeric_distribution,
+            table_name=table_name,
+            col_name=insight.column_name,
+            min_value=insight.min_value,
+            max_value=insight.max_value
+        )))
+    return tasks
+
+
+def get_insights_parallelism() -> int:
+    """
+    Read-only connections (and threads) used for per-column insight work
+    """
+    default = min(4, os.cpu_count() or 1)
+    return max(int(os.environ.get("INSIGHTS_PARALLELISM", str(default))), 1)
+
+
+def open_read_only_connection() -> sqlite3.Connection:
+    """
+    Connection to the user database that refuses writes, usable from a worker thread
+    """
+    conn = sqlite3.connect("db/database.db", check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def run_column_tasks(conn: sqlite3.Connection, tasks: List[Callable]) -> List[Any]:
+    """
+    Run per-column tasks (each called with a connection as its first argument) and
+    return their results in order. With parallelism above 1 they run on a thread
+    pool, each thread borrowing one of a pool of read-only connections. SQLite
+    releases the GIL while stepping, so scans and GROUP BYs overlap.
+    """
+    workers = min(get_insights_parallelism(), len(tasks))
+    if workers <= 1:
+        return [task(conn) for task in tasks]
+
+    pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+    connections = [open_read_only_connection() for _ in range(workers)]
+    for pooled in connections:
+        pool.put(pooled)
+    db_pool_connections.inc("insights", "idle", amount=len(connections))
+
+    def run(task: Callable) -> Any:
+        with db_pool_wait.time("insights"):
+            pooled = pool.get()
+        db_pool_connections.dec("insights", "idle")
+        db_pool_connections.inc("insights", "in_use")
+        try:
+            return task(pooled)
+        finally:
+            db_pool_connections.dec("insights", "in_use")
+            db_pool_connections.inc("insights", "idle")
+            pool.put(pooled)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="insights") as executor:
+            return list(executor.map(run, tasks))
+    finally:
+        for pooled in connections:
+            pooled.close()
+        db_pool_connections.dec("insights", "idle", amount=len(connections))
+
+
+class InsightsCache:
+    """
+    LRU cache of generated insights, keyed by request and valid for one table version.
+    A table's version changes when it is uploaded, appended to or deleted; MAX(rowid)
+    is checked too, so other appends are noticed. With shared versions (several
+    workers) a change made by any worker invalidates the entries of every worker.
+    """
+
+    def __init__(self, max_entries: int, versions: Optional[CacheVersions] = None):
+        self.max_entries = max_entries
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[tuple, List[ColumnInsight]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    def table_version(self, table_name: str) -> int:
+        if self.versions is not None:
+            return self.versions.get(table_scope(table_name))
+        with self._lock:
+            return self._versions.get(table_name, 0)
+
+    def invalidate(self, table_name: str) -> None:
+        if self.versions is not None:
+            self.versions.bump(table_scope(table_name))
+        with self._lock:
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            for key in [key for key in self._entries if key[0] == table_name]:
+                del self._entries[key]
+
+    def get(self, key: tuple, version: tuple) -> Optional[List[ColumnInsight]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            record_cache_lookup("insights", entry is not None and entry[0] == version)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return [insight.model_copy(deep=True) for insight in entry[1]]
+
+    def put(self, key: tuple, version: tuple, insights: List[ColumnInsight]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, [insight.model_copy(deep=True) for insight in insights])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache used by the insights endpoint
+insights_cache = InsightsCache(
+    int(os.environ.get("INSIGHTS_CACHE_SIZE", "128")),
+    versions=cache_versions if is_multi_worker() else None
+)
+
+
+def invalidate_table_insights(table_name: str) -> None:
+    """
+    Drop cached insights of a table whose data changed
+    """
+    insights_cache.invalidate(table_name)
+
+
+def generate_insights(
+    table_name: str,
+    column_names: Optional[List[str]] = None,
+    approximate: bool = False,
+    distribution: bool = False
+) -> List[ColumnInsight]:
+    """
+    Generate statistical insights for table columns.
+    With approximate=True, distinct counts and top values come from sketches.
+    With distribution=True, numeric columns also get quantiles and a histogram.
+    Results are cached until the table changes.
     """
     try:
         # Validate table name
         validate_identifier(table_name, "table")
-        
+
+        # Validate provided column names
+        for col in column_names or []:
+            try:
+                validate_identifier(col, "column")
+            except SQLSecurityError:
+                raise Exception(f"Invalid column name: {col}")
+
         conn = sqlite3.connect("db/database.db")
-        
+        cache_key = (table_name, tuple(column_names or ()), approximate, distribution)
+
         # Get table schema using safe query execution
         cursor_info = execute_query_safely(
             conn,
@@ -24,101 +515,133 @@ def generate_insights(table_name: str, column_names: Optional[List[str]] = None)
             identifier_params={'table': table_name}
         )
         columns_info = cursor_info.fetchall()
-        
+
         # If no specific columns requested, analyze all
         if not column_names:
             column_names = [col[1] for col in columns_info]
-        else:
-            # Validate provided column names
-            for col in column_names:
-                try:
-                    validate_identifier(col, "column")
-                except SQLSecurityError:
-                    raise Exception(f"Invalid column name: {col}")
-        
-        insights = []
-        
+
+        columns = []
         for col_info in columns_info:
             col_name = col_info[1]
             col_type = col_info[2]
-            
+
             if col_name not in column_names:
                 continue
-            
+
             # Validate column name
             try:
                 validate_identifier(col_name, "column")
             except SQLSecurityError:
                 # Skip columns with invalid names
                 continue
-            
-            # Basic statistics using safe query execution
-            cursor_distinct = execute_query_safely(
-                conn,
-                "SELECT COUNT(DISTINCT {column}) FROM {table}",
-                identifier_params={'column': col_name, 'table': table_name}
-            )
-            unique_values = cursor_distinct.fetchone()[0]
-            
-            cursor_null = execute_query_safely(
-                conn,
-                "SELECT COUNT(*) FROM {table} WHERE {column} IS NULL",
-                identifier_params={'table': table_name, 'column': col_name}
-            )
-            null_count = cursor_null.fetchone()[0]
-            
-            insight = ColumnInsight(
+
+            columns.append((col_name, col_type))
+
+        if not columns:
+            conn.close()
+            return []
+
+        # Repeated requests for an unchanged table are answered from the cache
+        version = (insights_cache.table_version(table_name), get_max_rowid(conn, table_name))
+        cached = insights_cache.get(cache_key, version)
+        if cached is not None:
+            conn.close()
+            return cached
+
+        insights = compute_insights(conn, table_name, columns, approximate, distribution, version[1])
+        conn.close()
+        insights_cache.put(cache_key, version, insights)
+        return insights
+
+    except Exception as e:
+        raise Exception(f"Error generating insights: {str(e)}")
+
+
+def compute_insights(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: List[Tuple[str, str]],
+    approximate: bool,
+    distribution: bool,
+    max_rowid: Optional[int]
+) -> List[ColumnInsight]:
+    """
+    Insights for validated (name, type) columns: from precomputed stats when possible,
+    otherwise from the shared scans plus per-column follow-up work in parallel
+    """
+    # Precomputed stats answer in O(columns) while they still describe the table
+    stored = load_fresh_column_stats(table_name, max_rowid)
+    stats_usable = stored is not None and all(
+        name in stored and (approximate or stored[name]['exact']) for name, _ in columns
+    )
+    record_cache_lookup("column_stats", stats_usable)
+    if stats_usable:
+        insights = [
+            ColumnInsight(
                 column_name=col_name,
                 data_type=col_type,
-                unique_values=unique_values,
-                null_count=null_count
-            )
-            
-            # Type-specific insights
-            if col_type in ['INTEGER', 'REAL', 'NUMERIC']:
-                # Numeric insights using safe query execution
-                cursor_stats = execute_query_safely(
-                    conn,
-                    """
-                    SELECT 
-                        MIN({column}) as min_val,
-                        MAX({column}) as max_val,
-                        AVG({column}) as avg_val
-                    FROM {table}
-                    WHERE {column} IS NOT NULL
-                    """,
-                    identifier_params={'column': col_name, 'table': table_name}
-                )
-                result = cursor_stats.fetchone()
-                if result:
-                    insight.min_value = result[0]
-                    insight.max_value = result[1]
-                    insight.avg_value = result[2]
-            
-            # Most common values (for all types) using safe query execution
-            cursor_common = execute_query_safely(
-                conn,
-                """
-                SELECT {column}, COUNT(*) as count
-                FROM {table}
-                WHERE {column} IS NOT NULL
-                GROUP BY {column}
-                ORDER BY count DESC
-                LIMIT 5
-                """,
-                identifier_params={'column': col_name, 'table': table_name}
+                **build_stats_insight_fields(stored[col_name], col_type in NUMERIC_TYPES)
             )
-            most_common = cursor_common.fetchall()
-            if most_common:
-                insight.most_common = [
-                    {"value": val, "count": count} 
-                    for val, count in most_common
-                ]
-            
-            insights.append(insight)
-        
-        conn.close()
+            for col_name, col_type in columns
+        ]
+        if distribution:
+            distribution_tasks = numeric_distribution_tasks(table_name, insights)
+            results = run_column_tasks(conn, [task for _, task in distribution_tasks])
+            for (insight, _), result in zip(distribution_tasks, results):
+                for field, value in result.items():
+                    setattr(insight, field, value)
         return insights
-        
-    except Exception as e:
-        raise Exception(f"Error generating insights: {str(e)}")
\ No newline at end of file
+
+    # Pass 1: null counts, distinct counts and top values, counted in memory or sketched
+    if approximate:
+        counts = sketch_column_values(conn, table_name, [name for name, _ in columns])
+    else:
+        counts = count_column_values(conn, table_name, [name for name, _ in columns])
+    uncounted = [name for name, _ in columns if counts[name] is None]
+
+    # Pass 2: row count, numeric stats, and counts for columns too diverse to count in memory
+    numeric = [name for name, col_type in columns if col_type in NUMERIC_TYPES]
+    row_count, aggregates = compute_column_aggregates(conn, table_name, numeric, uncounted)
+
+    insights = []
+    for col_name, col_type in columns:
+        stats = aggregates.get(col_name, {})
+        column_counts = counts[col_name] or stats
+        insight = ColumnInsight(
+            column_name=col_name,
+            data_type=col_type,
+            unique_values=column_counts['unique_values'],
+            null_count=column_counts['null_count'],
+            min_value=stats.get('min_value'),
+            max_value=stats.get('max_value'),
+            avg_value=stats.get('avg_value'),
+            approximate=approximate,
+            unique_values_error=column_counts.get('unique_values_error'),
+            most_common_error=column_counts.get('most_common_error')
+        )
+        if counts[col_name] and counts[col_name]['most_common']:
+            insight.most_common = counts[col_name]['most_common']
+        insights.append(insight)
+
+    # Per-column follow-up work: SQL top values for uncounted columns, then distributions
+    insights_by_name = {insight.column_name: insight for insight in insights}
+    follow_ups: List[Tuple[ColumnInsight, str, Callable]] = []
+    for col_name in uncounted:
+        stats = aggregates[col_name]
+        all_distinct = stats['unique_values'] == row_count - stats['null_count']
+        follow_ups.append((insights_by_name[col_name], 'most_common', partial(
+            query_top_values, table_name=table_name, col_name=col_name, all_distinct=all_distinct
+        )))
+    if distribution:
+        for insight, task in numeric_distribution_tasks(table_name, insights):
+            follow_ups.append((insight, None, task))
+
+    results = run_column_tasks(conn, [task for _, _, task in follow_ups])
+    for (insight, field, _), result in zip(follow_ups, results):
+        if field is not None:
+            setattr(insight, field, result or None)
+        else:
+            for name, value in result.items():
+                setattr(insight, name, value)
+
+    return insights
@@ -0,0 +1,86 @@
+"""
+Deferred imports for the dependencies that dominate server startup.
+
+pandas, numpy and the OpenAI and Anthropic SDKs account for most of the time
+it takes to import server.py. Startup only needs FastAPI and the query path,
+so these modules are reached through small facades:
+- core.providers    OpenAI and Anthropic client classes
+- core.ingest       Upload converters, column statistics and insights
+
+Each facade entry is a LazyCallable. It imports its target on the first call
+and forwards every call after that, so a worker answers its first request
+without waiting for pandas. Tests can still patch the names where they are
+used, e.g. core.llm_processor.OpenAI.
+
+After startup, the server imports the deferred modules on a background
+thread. The first upload or LLM call therefore does not pay for the import
+either, unless it arrives within the first second or so.
+
+Configuration (environment variables):
+- PRELOAD_DEFERRED_IMPORTS    "false" skips the background import after startup (default true)
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Imported by the background preload, heaviest first
+DEFERRED_MODULES = ("core.file_processor", "core.insights", "openai", "anthropic")
+
+
+class LazyCallable:
+    """Stand-in for a function or class that imports it on first call."""
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._target: Optional[Callable[..., Any]] = None
+
+    def load(self) -> Callable[..., Any]:
+        # The import system serializes concurrent imports, so a race only repeats the getattr
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self.module), self.name)
+        return self._target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._target is not None else "deferred"
+        return f"<LazyCallable {self.module}.{self.name} ({state})>"
+
+
+def preload_deferred_modules(modules: Sequence[str] = DEFERRED_MODULES) -> None:
+    """
+    Import the deferred modules now; a module that fails to import is logged and skipped
+    """
+    started = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"[WARNING] Preloading {module} failed: {str(e)}")
+    logger.info(f"[INFO] Deferred modules preloaded in {time.perf_counter() - started:.2f}s")
+
+
+def is_preload_enabled() -> bool:
+    """
+    Whether deferred modules are imported in the background after startup (PRELOAD_DEFERRED_IMPORTS, default true)
+    """
+    return os.environ.get("PRELOAD_DEFERRED_IMPORTS", "true").lower() == "true"
+
+
+def start_preload() -> Optional[threading.Thread]:
+    """
+    Start the background preload if enabled; returns the thread
+    """
+    if not is_preload_enabled():
+        return None
+    thread = threading.Thread(target=preload_deferred_modules, name="deferred-imports", daemon=True)
+    thread.start()
+    return thread
@@ -1,30 +1,73 @@
 import os
-from typing import Dict, Any
-from openai import OpenAI
-from anthropic import Anthropic
+import time
+from typing import Dict, Any, Iterator, List, Optional
+from core.providers import OpenAI, Anthropic
 from core.data_models import QueryRequest
+from core.llm_router import router
+from core.metrics import record_llm_tokens
+from core.query_budget import is_budget_error
+from core.llm_stub import (
+    is_stub_enabled,
+    simulate_latency,
+    stub_sql_for_query,
+    stub_stream_tokens,
+    stub_natural_language_query
+)
+
+def format_examples_for_prompt(examples: Optional[List[Dict[str, str]]]) -> str:
+    """
+    Format previously successful (question, SQL) pairs as few-shot examples
+    """
+    if not examples:
+        return ""
+
+    lines = ["Examples of similar questions that were answered successfully:", ""]
+    for example in examples:
+        lines.append(f"Question: {example['question']}")
+        lines.append(f"SQL: {example['sql']}")
+        lines.append("")
+
+    return "\n".join(lines) + "\n"
 
-def generate_sql_with_openai(query_text: str, schema_info: Dict[str, Any]) -> str:
+def format_repair_for_prompt(repair_context: Optional[Dict[str, str]]) -> str:
     """
-    Generate SQL query using OpenAI API
+    Describe a failed attempt (its SQL and the SQLite error) so the provider can fix it
     """
-    try:
-        # Get API key from environment
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-        client = OpenAI(api_key=api_key)
-        
-        # Format schema for prompt
-        schema_description = format_schema_for_prompt(schema_info)
-        
-        # Create prompt
-        prompt = f"""Given the following database schema:
+    if not repair_context:
+        return ""
+
+    budget_hint = ""
+    if is_budget_error(repair_context['error']):
+        budget_hint = "The query was too expensive: avoid cartesian joins, join on keys and filter or aggregate early.\n"
+
+    return f"""
+A previous attempt produced this SQL, which failed:
+{repair_context['sql']}
+
+SQLite error: {repair_context['error']}
+{budget_hint}
+Return a corrected SQL query that answers the question and avoids this error.
+"""
+
+def build_sql_prompt(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Build the natural language to SQL prompt shared by all providers
+    """
+    # Format schema for prompt
+    schema_description = format_schema_for_prompt(schema_info)
+    examples_description = format_examples_for_prompt(examples)
+    repair_description = format_repair_for_prompt(repair_context)
+
+    return f"""Given the following database schema:
 
 {schema_description}
 
-Convert this natural language query to SQL: "{query_text}"
+{examples_description}Convert this natural language query to SQL: "{query_text}"
 
 Rules:
 - Return ONLY the SQL query, no explanations
@@ -35,8 +78,52 @@ Rules:
 - For multi-table queries, use proper JOIN conditions to avoid Cartesian products
 - Limit results to reasonable amounts (e.g., add LIMIT 100 for large result sets)
 - When joining tables, use meaningful relationships between tables
-
+{repair_description}
 SQL Query:"""
+
+def clean_sql_response(sql: str) -> str:
+    """
+    Clean up LLM output (remove markdown if present)
+    """
+    sql = sql.strip()
+    if sql.startswith("```sql"):
+        sql = sql[6:]
+    if sql.startswith("```"):
+        sql = sql[3:]
+    if sql.endswith("```"):
+        sql = sql[:-3]
+
+    return sql.strip()
+
+def _record_usage(provider: str, response: Any) -> None:
+    """
+    Add a completion's reported token usage to the LLM token metrics
+    """
+    usage = getattr(response, "usage", None)
+    if provider == "openai":
+        record_llm_tokens(provider, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+    else:
+        record_llm_tokens(provider, getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None))
+
+def generate_sql_with_openai(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Generate SQL query using OpenAI API
+    """
+    try:
+        # Get API key from environment
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+        
+        client = OpenAI(api_key=api_key)
+        
+        # Create prompt
+        prompt = build_sql_prompt(query_text, schema_info, examples, repair_context)
         
         # Call OpenAI API
         response = client.chat.completions.create(
@@ -49,22 +136,20 @@ SQL Query:"""
             max_tokens=500
         )
         
+        _record_usage("openai", response)
         sql = response.choices[0].message.content.strip()
         
-        # Clean up the SQL (remove markdown if present)
-        if sql.startswith("```sql"):
-            sql = sql[6:]
-        if sql.startswith("```"):
-            sql = sql[3:]
-        if sql.endswith("```"):
-            sql = sql[:-3]
-        
-        return sql.strip()
+        return clean_sql_response(sql)
         
     except Exception as e:
         raise Exception(f"Error generating SQL with OpenAI: {str(e)}")
 
-def generate_sql_with_anthropic(query_text: str, schema_info: Dict[str, Any]) -> str:
+def generate_sql_with_anthropic(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> str:
     """
     Generate SQL query using Anthropic API
     """
@@ -76,27 +161,8 @@ def generate_sql_with_anthropic(query_text: str, schema_info: Dict[str, Any]) ->
         
         client = Anthropic(api_key=api_key)
         
-        # Format schema for prompt
-        schema_description = format_schema_for_prompt(schema_info)
-        
         # Create prompt
-        prompt = f"""Given the following database schema:
-
-{schema_description}
-
-Convert this natural language query to SQL: "{query_text}"
-
-Rules:
-- Return ONLY the SQL query, no explanations
-- Use proper SQLite syntax
-- Handle date/time queries appropriately (e.g., "last week" = date('now', '-7 days'))
-- Be careful with column names and table names
-- If the query is ambiguous, make reasonable assumptions
-- For multi-table queries, use proper JOIN conditions to avoid Cartesian products
-- Limit results to reasonable amounts (e.g., add LIMIT 100 for large result sets)
-- When joining tables, use meaningful relationships between tables
-
-SQL Query:"""
+        prompt = build_sql_prompt(query_text, schema_info, examples, repair_context)
         
         # Call Anthropic API
         response = client.messages.create(
@@ -108,21 +174,130 @@ SQL Query:"""
             ]
         )
         
+        _record_usage("anthropic", response)
         sql = response.content[0].text.strip()
         
-        # Clean up the SQL (remove markdown if present)
-        if sql.startswith("```sql"):
-            sql = sql[6:]
-        if sql.startswith("```"):
-            sql = sql[3:]
-        if sql.endswith("```"):
-            sql = sql[:-3]
-        
-        return sql.strip()
+        return clean_sql_response(sql)
         
     except Exception as e:
         raise Exception(f"Error generating SQL with Anthropic: {str(e)}")
 
+def stream_sql_with_openai(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Stream SQL query tokens from the OpenAI API as they arrive
+    """
+    try:
+        # Get API key from environment
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+
+        client = OpenAI(api_key=api_key)
+
+        # Create prompt
+        prompt = build_sql_prompt(query_text, schema_info, examples, repair_context)
+
+        # Call OpenAI API in streaming mode
+        stream = client.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=[
+                {"role": "system", "content": "You are a SQL expert. Convert natural language to SQL queries."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=500,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        for chunk in stream:
+            # With include_usage, the final chunk has no choices and carries the token counts
+            if getattr(chunk, "usage", None):
+                _record_usage("openai", chunk)
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+
+    except Exception as e:
+        raise Exception(f"Error streaming SQL with OpenAI: {str(e)}")
+
+def stream_sql_with_anthropic(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Stream SQL query tokens from the Anthropic API as they arrive
+    """
+    try:
+        # Get API key from environment
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+
+        client = Anthropic(api_key=api_key)
+
+        # Create prompt
+        prompt = build_sql_prompt(query_text, schema_info, examples, repair_context)
+
+        # Call Anthropic API in streaming mode
+        stream = client.messages.create(
+            model="claude-3-haiku-20240307",
+            max_tokens=500,
+            temperature=0.1,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+
+        for event in stream:
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+            # Prompt tokens arrive with message_start, the final output count with message_delta
+            elif event.type == "message_start":
+                record_llm_tokens("anthropic", getattr(getattr(event.message, "usage", None), "input_tokens", None), None)
+            elif event.type == "message_delta":
+                record_llm_tokens("anthropic", None, getattr(getattr(event, "usage", None), "output_tokens", None))
+
+    except Exception as e:
+        raise Exception(f"Error streaming SQL with Anthropic: {str(e)}")
+
+def generate_sql_with_stub(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Generate SQL query using the deterministic local stub (no network calls).
+    Examples and repair context are accepted for signature parity and ignored.
+    """
+    try:
+        simulate_latency(query_text)
+        return stub_sql_for_query(query_text, schema_info)
+    except Exception as e:
+        raise Exception(f"Error generating SQL with stub: {str(e)}")
+
+def stream_sql_with_stub(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Stream SQL query tokens from the deterministic local stub
+    """
+    yield from stub_stream_tokens(generate_sql_with_stub(query_text, schema_info, examples, repair_context))
+
 def format_schema_for_prompt(schema_info: Dict[str, Any]) -> str:
     """
     Format database schema for LLM prompt
@@ -141,25 +316,95 @@ def format_schema_for_prompt(schema_info: Dict[str, Any]) -> str:
     
     return "\n".join(lines)
 
-def generate_sql(request: QueryRequest, schema_info: Dict[str, Any]) -> str:
+def get_sql_provider_candidates(request: QueryRequest) -> List[str]:
     """
-    Route to appropriate LLM provider based on API key availability and request preference.
+    Providers eligible for a request, in priority order.
     Priority: 1) OpenAI API key exists, 2) Anthropic API key exists, 3) request.llm_provider
     """
-    openai_key = os.environ.get("OPENAI_API_KEY")
-    anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
+    candidates = []
+    if os.environ.get("OPENAI_API_KEY"):
+        candidates.append("openai")
+    if os.environ.get("ANTHROPIC_API_KEY"):
+        candidates.append("anthropic")
+
+    # Fall back to request preference if neither key is available
+    if not candidates:
+        candidates.append("openai" if request.llm_provider == "openai" else "anthropic")
+
+    return candidates
+
+def build_prompt_options(
+    examples: Optional[List[Dict[str, str]]],
+    repair_context: Optional[Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    Keyword arguments for provider calls, omitting anything not in use
+    """
+    prompt_options = {}
+    if examples:
+        prompt_options['examples'] = examples
+    if repair_context:
+        prompt_options['repair_context'] = repair_context
+    return prompt_options
+
+def generate_sql(
+    request: QueryRequest,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Route to the fastest healthy LLM provider among those with API keys (see llm_router).
+    With no latency history this follows get_sql_provider_candidates priority order.
+    The stub provider (LLM_PROVIDER=stub or llm_provider="stub") bypasses routing entirely.
+    Optional few-shot examples and a failed attempt to repair are injected into the prompt.
+    """
+    prompt_options = build_prompt_options(examples, repair_context)
 
-    # Check API key availability first (OpenAI priority)
-    if openai_key:
-        return generate_sql_with_openai(request.query, schema_info)
-    elif anthropic_key:
-        return generate_sql_with_anthropic(request.query, schema_info)
+    if is_stub_enabled() or request.llm_provider == "stub":
+        return generate_sql_with_stub(request.query, schema_info, **prompt_options)
 
-    # Fall back to request preference if both keys available or neither available
-    if request.llm_provider == "openai":
-        return generate_sql_with_openai(request.query, schema_info)
-    else:
-        return generate_sql_with_anthropic(request.query, schema_info)
+    def invoke(provider: str) -> str:
+        if provider == "openai":
+            return generate_sql_with_openai(request.query, schema_info, **prompt_options)
+        return generate_sql_with_anthropic(request.query, schema_info, **prompt_options)
+
+    return router.call(get_sql_provider_candidates(request), invoke)
+
+def _track_stream(provider: str, tokens: Iterator[str]) -> Iterator[str]:
+    """
+    Record a streamed call's total latency and outcome with the router
+    """
+    start = time.perf_counter()
+    try:
+        yield from tokens
+    except Exception:
+        router.record_failure(provider)
+        raise
+    router.record_success(provider, time.perf_counter() - start)
+
+def generate_sql_stream(
+    request: QueryRequest,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None,
+    repair_context: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Streaming variant of generate_sql. Yields raw SQL tokens as the provider emits them;
+    callers should pass the joined text through clean_sql_response before executing it.
+    Streams from the best ranked provider; streams are neither hedged nor failed over.
+    """
+    prompt_options = build_prompt_options(examples, repair_context)
+
+    if is_stub_enabled() or request.llm_provider == "stub":
+        return stream_sql_with_stub(request.query, schema_info, **prompt_options)
+
+    candidates = get_sql_provider_candidates(request)
+    provider = (router.rank(candidates) or candidates)[0]
+
+    if provider == "openai":
+        return _track_stream(provider, stream_sql_with_openai(request.query, schema_info, **prompt_options))
+    return _track_stream(provider, stream_sql_with_anthropic(request.query, schema_info, **prompt_options))
 
 def generate_query_with_openai(schema_info: Dict[str, Any]) -> str:
     """
@@ -204,6 +449,7 @@ Natural Language Query:"""
             max_tokens=100
         )
 
+        _record_usage("openai", response)
         query = response.choices[0].message.content.strip()
 
         # Remove quotes if present
@@ -259,6 +505,7 @@ Natural Language Query:"""
             ]
         )
 
+        _record_usage("anthropic", response)
         query = response.content[0].text.strip()
 
         # Remove quotes if present
@@ -280,6 +527,9 @@ def generate_natural_language_query(schema_info: Dict[str, Any]) -> str:
     if not schema_info.get('tables'):
         raise ValueError("No tables available in database")
 
+    if is_stub_enabled():
+        return stub_natural_language_query(schema_info)
+
     openai_key = os.environ.get("OPENAI_API_KEY")
     anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
 
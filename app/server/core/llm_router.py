@@ -0,0 +1,266 @@
+"""
+Latency-aware routing across LLM providers.
+
+Keeps a rolling window of latencies and outcomes per provider and sends each
+request to the fastest healthy provider. Providers without enough samples keep
+their configured priority order, so a cold router behaves exactly like the
+static OpenAI-then-Anthropic routing.
+
+- Circuit breaker: after `failure_threshold` consecutive failures a provider is
+  skipped for `cooldown_seconds`, then allowed a single trial call (half-open).
+- Failover: if the chosen provider fails, the next candidate is tried.
+- Hedging (opt-in): if the primary has not answered within its observed p95,
+  the next candidate is fired as well and the first success wins.
+
+Configuration (environment variables):
+- LLM_ROUTER_WINDOW               Samples kept per provider (default 100)
+- LLM_ROUTER_MIN_SAMPLES          Samples needed before latency is trusted (default 5)
+- LLM_ROUTER_ERROR_RATE           Error rate above which a provider is deprioritized (default 0.5)
+- LLM_CIRCUIT_FAILURE_THRESHOLD   Consecutive failures that open the circuit (default 3)
+- LLM_CIRCUIT_COOLDOWN_SECONDS    Seconds before an open circuit allows a trial (default 30)
+- LLM_HEDGE_ENABLED               "true" to enable hedged requests (default false)
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .metrics import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a list of values (None when empty)
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ProviderStats:
+    """Rolling latency/outcome window and circuit breaker state for one provider."""
+
+    def __init__(self, window_size: int):
+        self.latencies: Deque[float] = deque(maxlen=window_size)
+        self.outcomes: Deque[bool] = deque(maxlen=window_size)
+        self.consecutive_failures = 0
+        self.circuit_opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    def p50(self) -> Optional[float]:
+        return percentile(list(self.latencies), 0.50)
+
+    def p95(self) -> Optional[float]:
+        return percentile(list(self.latencies), 0.95)
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class ProviderRouter:
+    """Chooses, hedges and tracks LLM provider calls."""
+
+    def __init__(
+        self,
+        window_size: int = 100,
+        min_samples: int = 5,
+        error_rate_threshold: float = 0.5,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        hedge_enabled: bool = False,
+    ):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.error_rate_threshold = error_rate_threshold
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.hedge_enabled = hedge_enabled
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "ProviderRouter":
+        return cls(
+            window_size=int(os.environ.get("LLM_ROUTER_WINDOW", "100")),
+            min_samples=int(os.environ.get("LLM_ROUTER_MIN_SAMPLES", "5")),
+            error_rate_threshold=float(os.environ.get("LLM_ROUTER_ERROR_RATE", "0.5")),
+            failure_threshold=int(os.environ.get("LLM_CIRCUIT_FAILURE_THRESHOLD", "3")),
+            cooldown_seconds=float(os.environ.get("LLM_CIRCUIT_COOLDOWN_SECONDS", "30")),
+            hedge_enabled=os.environ.get("LLM_HEDGE_ENABLED", "false").lower() == "true",
+        )
+
+    def _get_stats(self, provider: str) -> ProviderStats:
+        if provider not in self._stats:
+            self._stats[provider] = ProviderStats(self.window_size)
+        return self._stats[provider]
+
+    def reset(self) -> None:
+        """Forget all collected statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    def record_success(self, provider: str, latency_seconds: float) -> None:
+        record_llm_call(provider, latency_seconds, success=True)
+        with self._lock:
+            stats = self._get_stats(provider)
+            stats.latencies.append(latency_seconds)
+            stats.outcomes.append(True)
+            stats.consecutive_failures = 0
+            stats.circuit_opened_at = None
+            stats.trial_in_flight = False
+
+    def record_failure(self, provider: str) -> None:
+        record_llm_call(provider, None, success=False)
+        with self._lock:
+            stats = self._get_stats(provider)
+            stats.outcomes.append(False)
+            stats.consecutive_failures += 1
+            stats.trial_in_flight = False
+            if stats.consecutive_failures >= self.failure_threshold:
+                if stats.circuit_opened_at is None:
+                    logger.warning(f"[WARNING] LLM provider circuit opened: {provider}")
+                stats.circuit_opened_at = time.monotonic()
+
+    def _is_available(self, stats: ProviderStats, now: float) -> bool:
+        if stats.circuit_opened_at is None:
+            return True
+        # Half-open: allow a single trial call once the cooldown has elapsed
+        return now - stats.circuit_opened_at >= self.cooldown_seconds and not stats.trial_in_flight
+
+    def rank(self, candidates: List[str]) -> List[str]:
+        """
+        Order candidates fastest-healthy first, dropping those with an open circuit.
+        Providers with too few samples keep their relative priority order.
+        """
+        now = time.monotonic()
+        with self._lock:
+            scored = []
+            for priority, provider in enumerate(candidates):
+                stats = self._get_stats(provider)
+                if not self._is_available(stats, now):
+                    continue
+                unhealthy = stats.error_rate() > self.error_rate_threshold
+                p50 = stats.p50() if len(stats.latencies) >= self.min_samples else None
+                scored.append((unhealthy, p50 if p50 is not None else float("inf"), priority, provider))
+        return [provider for *_, provider in sorted(scored)]
+
+    def _claim(self, provider: str) -> None:
+        """Mark a half-open provider's trial call as in flight."""
+        with self._lock:
+            stats = self._get_stats(provider)
+            if stats.circuit_opened_at is not None:
+                stats.trial_in_flight = True
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """
+        Seconds to wait on the primary before hedging (its p95), or None if unknown
+        """
+        with self._lock:
+            stats = self._get_stats(provider)
+            if len(stats.latencies) < self.min_samples:
+                return None
+            return stats.p95()
+
+    def _timed_call(self, provider: str, invoke: Callable[[str], Any]) -> Any:
+        self._claim(provider)
+        start = time.perf_counter()
+        try:
+            result = invoke(provider)
+        except Exception:
+            self.record_failure(provider)
+            raise
+        self.record_success(provider, time.perf_counter() - start)
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def call(self, candidates: List[str], invoke: Callable[[str], Any]) -> Any:
+        """
+        Call invoke(provider) on the best candidate, failing over (and optionally
+        hedging) to the others. Raises the last error if every provider fails.
+        """
+        ranked = self.rank(candidates)
+        if not ranked:
+            # Every circuit is open; try the configured priority order anyway
+            ranked = list(candidates)
+
+        if self.hedge_enabled and len(ranked) > 1:
+            return self._call_hedged(ranked, invoke)
+
+        last_error: Optional[Exception] = None
+        for provider in ranked:
+            try:
+                return self._timed_call(provider, invoke)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[WARNING] LLM provider {provider} failed: {str(e)}")
+        raise last_error
+
+    def _call_hedged(self, ranked: List[str], invoke: Callable[[str], Any]) -> Any:
+        executor = self._get_executor()
+        pending: Dict[Future, str] = {}
+        remaining = list(ranked)
+        last_error: Optional[Exception] = None
+
+        def launch() -> None:
+            provider = remaining.pop(0)
+            pending[executor.submit(self._timed_call, provider, invoke)] = provider
+
+        launch()
+        while pending:
+            # Wait for the newest request's p95 before firing the next provider
+            delay = self.hedge_delay(list(pending.values())[-1]) if remaining else None
+            done, _ = wait(list(pending), timeout=delay, return_when=FIRST_COMPLETED)
+
+            if not done:
+                logger.info(f"[INFO] Hedging LLM request to {remaining[0]}")
+                launch()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"[WARNING] LLM provider {provider} failed: {str(e)}")
+
+            if not pending and remaining:
+                launch()
+
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider latency, error rate and circuit state."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                provider: {
+                    "samples": len(stats.latencies),
+                    "p50_ms": stats.p50() * 1000 if stats.latencies else None,
+                    "p95_ms": stats.p95() * 1000 if stats.latencies else None,
+                    "error_rate": stats.error_rate(),
+                    "circuit_open": not self._is_available(stats, now),
+                }
+                for provider, stats in self._stats.items()
+            }
+
+
+# Shared router used by llm_processor
+router = ProviderRouter.from_env()
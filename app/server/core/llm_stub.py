@@ -0,0 +1,142 @@
+"""
+Deterministic local LLM stand-in for benchmarking and offline testing.
+
+Returns SQL from a fixture map (question -> SQL) or, failing that, from a few
+simple rules over the schema. Output depends only on the question, the schema
+and the fixtures, so load tests of the full server pipeline are reproducible.
+
+Configuration (environment variables):
+- LLM_PROVIDER=stub          Route all SQL generation to the stub
+- LLM_STUB_FIXTURES          Path to a JSON object mapping questions to SQL
+- LLM_STUB_LATENCY_MS        Synthetic latency added to every call (default 0)
+- LLM_STUB_JITTER_MS         Extra latency in [0, jitter), seeded by the question
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+STUB_PROVIDER = "stub"
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for fixture lookup (case and whitespace insensitive)
+    """
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+@lru_cache(maxsize=8)
+def load_stub_fixtures(path: Optional[str]) -> Dict[str, str]:
+    """
+    Load the question -> SQL fixture map from a JSON file
+    """
+    if not path:
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    if not isinstance(fixtures, dict):
+        raise ValueError("LLM stub fixtures must be a JSON object mapping questions to SQL")
+
+    return {normalize_question(question): sql for question, sql in fixtures.items()}
+
+
+def is_stub_enabled() -> bool:
+    """
+    Check whether the stub provider has been forced via LLM_PROVIDER
+    """
+    return os.environ.get("LLM_PROVIDER", "").lower() == STUB_PROVIDER
+
+
+def simulate_latency(query_text: str) -> None:
+    """
+    Sleep for the configured synthetic latency. Jitter is seeded by the question
+    so the same question always costs the same amount of time.
+    """
+    latency_ms = float(os.environ.get("LLM_STUB_LATENCY_MS", "0") or 0)
+    jitter_ms = float(os.environ.get("LLM_STUB_JITTER_MS", "0") or 0)
+
+    if jitter_ms > 0:
+        seed = int(hashlib.md5(query_text.encode("utf-8")).hexdigest()[:8], 16)
+        latency_ms += random.Random(seed).uniform(0, jitter_ms)
+
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+
+def _find_table(words: set, tables: Dict[str, Any]) -> str:
+    """
+    Pick the table mentioned in the question, falling back to the first table by name
+    """
+    for table_name in sorted(tables):
+        candidates = {table_name.lower(), table_name.lower().rstrip("s")}
+        if candidates & words:
+            return table_name
+    return sorted(tables)[0]
+
+
+def _find_column(words: set, columns: Dict[str, str], numeric_only: bool = False) -> Optional[str]:
+    """
+    Pick the first column mentioned in the question
+    """
+    for col_name, col_type in columns.items():
+        if numeric_only and col_type.upper() not in ("INTEGER", "REAL", "NUMERIC"):
+            continue
+        if col_name.lower() in words:
+            return col_name
+    return None
+
+
+def stub_sql_for_query(query_text: str, schema_info: Dict[str, Any]) -> str:
+    """
+    Produce SQL for a question from fixtures or simple schema-driven rules
+    """
+    fixtures = load_stub_fixtures(os.environ.get("LLM_STUB_FIXTURES"))
+    fixture_sql = fixtures.get(normalize_question(query_text))
+    if fixture_sql:
+        return fixture_sql
+
+    tables = schema_info.get("tables", {})
+    if not tables:
+        raise ValueError("No tables available in database")
+
+    words = set(re.findall(r"[a-z0-9_]+", query_text.lower()))
+    table_name = _find_table(words, tables)
+    columns = tables[table_name].get("columns", {})
+
+    if words & {"count", "many", "number"}:
+        return f"SELECT COUNT(*) AS count FROM {table_name}"
+
+    if words & {"average", "avg", "mean"}:
+        column = _find_column(words, columns, numeric_only=True)
+        if column:
+            return f"SELECT AVG({column}) AS average_{column} FROM {table_name}"
+
+    return f"SELECT * FROM {table_name} LIMIT 100"
+
+
+def stub_stream_tokens(sql: str) -> Iterator[str]:
+    """
+    Split SQL into word-sized tokens the way a streaming provider would emit them
+    """
+    for token in re.findall(r"\S+\s*", sql):
+        yield token
+
+
+def stub_natural_language_query(schema_info: Dict[str, Any]) -> str:
+    """
+    Produce a deterministic natural language question for the first table
+    """
+    tables = schema_info.get("tables", {})
+    if not tables:
+        raise ValueError("No tables available in database")
+
+    table_name = sorted(tables)[0]
+    return f"Show me the first 10 rows from {table_name}"
@@ -0,0 +1,373 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept in plain dicts keyed by label values.
+Each metric has its own lock. An observation costs one lock acquisition and a
+bisect over the bucket bounds, a microsecond or two, so the request path
+records metrics unconditionally. GET /metrics renders every registered metric.
+
+What is recorded:
+- http_request_duration_seconds    Per route template, method and status (MetricsMiddleware)
+- http_requests_in_flight          Requests being served right now
+- request_phase_duration_seconds   Per phase: schema_fetch, prompt_examples, llm_generate,
+                                   sql_validate, sql_execute, serialize, ingest_decode,
+                                   ingest_flatten, ingest_dataframe, ingest_write,
+                                   ingest_index, ingest_stats, ingest_metadata, writer_wait
+- llm_requests_total / llm_request_duration_seconds / llm_tokens_total   Per provider
+- cache_requests_total / cache_hit_ratio    Per cache (insights, column_stats)
+- db_pool_connections / db_pool_wait_seconds    Read-only insights connection pool
+
+Configuration (environment variables):
+- METRICS_ENABLED    "false" turns off request timing and the /metrics endpoint (default true)
+"""
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Seconds; spans fast cache hits to slow LLM calls and large ingests
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def is_metrics_enabled() -> bool:
+    """
+    Whether request timing and /metrics are enabled
+    """
+    return os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label_value(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """Base class: name, help text, label names and a lock."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labelvalues: Sequence[str]) -> LabelValues:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labelvalues)}")
+        return tuple(str(value) for value in labelvalues)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labelvalues), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+            for key, value in sorted(self.snapshot().items())
+        ]
+
+
+class Gauge(Metric):
+    """Value that goes up and down, set directly or computed by a collect function at render time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def value(self, *labelvalues: str) -> float:
+        return self.snapshot().get(self._key(labelvalues), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        if self._collect is not None:
+            return self._collect()
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+            for key, value in sorted(self.snapshot().items())
+        ]
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram with sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        key = self._key(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labelvalues))
+            return sum(entry[0]) if entry else 0
+
+    def sum(self, *labelvalues: str) -> float:
+        with self._lock:
+            entry = self._values.get(self._key(labelvalues))
+            return entry[1] if entry else 0.0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            entries = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = []
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in sorted(entries.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Shared registry exposed by GET /metrics
+registry = MetricsRegistry()
+
+process_start_time = registry.register(Gauge(
+    "process_start_time_seconds", "Start time of the process since the Unix epoch in seconds"
+))
+process_start_time.set(time.time())
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template, method and status",
+    ("method", "route", "status")
+))
+requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+phase_duration = registry.register(Histogram(
+    "request_phase_duration_seconds", "Time spent in each phase of request handling and ingest",
+    ("phase",)
+))
+llm_requests = registry.register(Counter(
+    "llm_requests_total", "LLM provider calls by outcome", ("provider", "outcome")
+))
+llm_latency = registry.register(Histogram(
+    "llm_request_duration_seconds", "LLM provider call latency", ("provider",)
+))
+llm_tokens = registry.register(Counter(
+    "llm_tokens_total", "LLM tokens reported by providers", ("provider", "kind")
+))
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups by result", ("cache", "result")
+))
+
+
+def collect_cache_hit_ratio() -> Dict[LabelValues, float]:
+    lookups: Dict[str, List[float]] = {}
+    for (cache, result), count in cache_requests.snapshot().items():
+        totals = lookups.setdefault(cache, [0.0, 0.0])
+        totals[0 if result == "hit" else 1] += count
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in lookups.items() if hits + misses}
+
+
+cache_hit_ratio = registry.register(Gauge(
+    "cache_hit_ratio", "Fraction of cache lookups that hit since start", ("cache",), collect=collect_cache_hit_ratio
+))
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Pooled database connections by state", ("pool", "state")
+))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled database connection", ("pool",),
+    buckets=(0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+))
+
+
+def time_phase(phase: str):
+    """
+    Context manager recording the duration of one request or ingest phase
+    """
+    return phase_duration.time(phase)
+
+
+def observe_phase(phase: str, seconds: float) -> None:
+    """
+    Record a phase duration measured by the caller
+    """
+    phase_duration.observe(seconds, phase)
+
+
+def record_llm_call(provider: str, latency_seconds: Optional[float], success: bool) -> None:
+    """
+    Count an LLM call and, for successes, record its latency
+    """
+    llm_requests.inc(provider, "success" if success else "failure")
+    if success and latency_seconds is not None:
+        llm_latency.observe(latency_seconds, provider)
+
+
+def record_llm_tokens(provider: str, prompt_tokens: object, completion_tokens: object) -> None:
+    """
+    Add provider-reported token usage; values that are not integers are ignored
+    """
+    for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if isinstance(count, int) and not isinstance(count, bool):
+            llm_tokens.inc(provider, kind, amount=count)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """
+    Count a cache hit or miss
+    """
+    cache_requests.inc(cache, "hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    """
+    All registered metrics in the Prometheus text format
+    """
+    return registry.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template, method and status."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            # The router stores the matched route in the scope; the template keeps label cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            request_duration.observe(time.perf_counter() - start, scope["method"], route_path, str(status[0]))
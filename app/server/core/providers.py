@@ -0,0 +1,11 @@
+"""
+LLM provider SDK clients, imported on first use (see core/lazy_imports.py).
+
+The openai and anthropic packages are only imported when the first client is
+created.
+"""
+
+from .lazy_imports import LazyCallable
+
+OpenAI = LazyCallable("openai", "OpenAI")
+Anthropic = LazyCallable("anthropic", "Anthropic")
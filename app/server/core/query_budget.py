@@ -0,0 +1,129 @@
+"""
+Per-query resource budgets for user SQL.
+
+A progress handler installed on the connection runs every
+`PROGRESS_HANDLER_INTERVAL` SQLite VM instructions and interrupts the query once
+its time or instruction count exceeds the budget. Time is charged while
+SQLite executes and fetches; a streaming caller pauses the budget while a
+page waits at the client, so a slow reader is not billed. The interrupted
+query fails with QueryBudgetExceeded, which callers report as a structured
+"budget_exceeded" error instead of pinning a worker and the database. Result
+rows beyond the configured maximum are dropped and the result is marked
+truncated.
+
+Configuration (environment variables):
+- SQL_QUERY_TIMEOUT_MS         Time limit per query, including fetching (default 10000, 0 disables)
+- SQL_QUERY_MAX_INSTRUCTIONS   SQLite VM instruction limit per query (default 100000000, 0 disables)
+- SQL_MAX_RESULT_ROWS          Rows returned before the result is truncated (default 10000, 0 disables)
+"""
+
+import os
+import sqlite3
+import time
+from typing import Optional
+
+# Error code reported to clients and the repair loop
+BUDGET_EXCEEDED_ERROR_CODE = "budget_exceeded"
+BUDGET_EXCEEDED_PREFIX = "Budget exceeded"
+
+# VM instructions between progress handler callbacks
+PROGRESS_HANDLER_INTERVAL = 10000
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a query is interrupted for exceeding its time or instruction budget."""
+
+    error_code = BUDGET_EXCEEDED_ERROR_CODE
+
+
+def get_query_timeout_ms() -> float:
+    """
+    Time limit per user query in milliseconds (0 disables)
+    """
+    return float(os.environ.get("SQL_QUERY_TIMEOUT_MS", "10000"))
+
+
+def get_max_instructions() -> int:
+    """
+    SQLite VM instruction limit per user query (0 disables)
+    """
+    return int(os.environ.get("SQL_QUERY_MAX_INSTRUCTIONS", "100000000"))
+
+
+def get_max_result_rows() -> int:
+    """
+    Maximum rows returned for a user query before truncation (0 disables)
+    """
+    return int(os.environ.get("SQL_MAX_RESULT_ROWS", "10000"))
+
+
+class QueryBudget:
+    """
+    Progress handler enforcing a time and instruction budget on one connection.
+    The clock starts when the budget is installed and stops while paused.
+    """
+
+    def __init__(self, timeout_ms: float, max_instructions: int):
+        self.timeout_ms = timeout_ms
+        self.max_instructions = max_instructions
+        self.started_at: Optional[float] = time.perf_counter()
+        self.spent_ms = 0.0
+        self.instructions = 0
+        self.exceeded: Optional[str] = None
+
+    def elapsed_ms(self) -> float:
+        if self.started_at is None:
+            return self.spent_ms
+        return self.spent_ms + (time.perf_counter() - self.started_at) * 1000
+
+    def pause(self) -> None:
+        """
+        Stop charging time, e.g. while a result page is handed to the caller
+        """
+        if self.started_at is not None:
+            self.spent_ms = self.elapsed_ms()
+            self.started_at = None
+
+    def resume(self) -> None:
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def __call__(self) -> int:
+        self.instructions += PROGRESS_HANDLER_INTERVAL
+        if self.max_instructions and self.instructions > self.max_instructions:
+            self.exceeded = f"query exceeded {self.max_instructions} VM instructions"
+            return 1
+        if self.timeout_ms and self.elapsed_ms() > self.timeout_ms:
+            self.exceeded = f"query exceeded the {self.timeout_ms:g} ms time limit"
+            return 1
+        return 0
+
+    def raise_if_exceeded(self) -> None:
+        """
+        Turn an interrupt caused by this budget into QueryBudgetExceeded
+        """
+        if self.exceeded:
+            raise QueryBudgetExceeded(self.exceeded)
+
+
+def install_query_budget(conn: sqlite3.Connection) -> QueryBudget:
+    """
+    Enforce the configured time and instruction budget on a connection.
+
+    Args:
+        conn: SQLite connection that will run a user query
+
+    Returns:
+        QueryBudget: The installed budget (call raise_if_exceeded after a failure)
+    """
+    budget = QueryBudget(get_query_timeout_ms(), get_max_instructions())
+    if budget.timeout_ms or budget.max_instructions:
+        conn.set_progress_handler(budget, PROGRESS_HANDLER_INTERVAL)
+    return budget
+
+
+def is_budget_error(error: Optional[str]) -> bool:
+    """
+    Whether an error message reports an exceeded query budget
+    """
+    return bool(error) and error.startswith(BUDGET_EXCEEDED_PREFIX)
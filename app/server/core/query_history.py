@@ -0,0 +1,218 @@
+"""
+Query history store and few-shot example retrieval.
+
+Every natural language query is recorded as a (question, SQL, success) triple in
+a small SQLite database kept apart from user data. Successful questions are kept
+in an in-memory TF-IDF inverted index so the most similar past questions can be
+found in time proportional to the posting lists touched, not the history size.
+Examples whose SQL references tables missing from the current schema are skipped.
+Before each lookup the index picks up rows other workers have recorded; a
+PRAGMA data_version check keeps that to one statement when nothing changed.
+
+Configuration (environment variables):
+- QUERY_HISTORY_DB         History database path (default db/query_history.db)
+- QUERY_HISTORY_EXAMPLES   Number of examples to inject into prompts (default 3, 0 disables)
+"""
+
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from core.sql_lexer import analyze_sql
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was",
+    "were", "me", "my", "show", "give", "list", "what", "which", "who", "with", "by",
+    "all", "from", "that", "this", "be", "do", "does", "please", "find", "get",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize_question(question: str) -> List[str]:
+    """
+    Lowercase word tokens with stopwords removed and plural 's' stripped
+    """
+    tokens = []
+    for word in WORD_PATTERN.findall(question.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def extract_table_references(sql: str) -> Set[str]:
+    """
+    Table names referenced after FROM/JOIN in a SQL query
+    """
+    return set(analyze_sql(sql).tables)
+
+
+class QueryHistoryStore:
+    """Persistent query history with an in-memory similarity index over successful questions."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._last_id = 0
+        # example id -> {'question', 'sql', 'tables', 'terms'}
+        self._examples: Dict[int, Dict[str, Any]] = {}
+        # token -> example ids containing it
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._seen: Dict[tuple, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                error TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        return conn
+
+    def _index(self, example_id: int, question: str, sql: str) -> None:
+        key = (" ".join(tokenize_question(question)), sql.strip())
+        if key in self._seen:
+            return
+        self._seen[key] = example_id
+
+        term_counts = Counter(tokenize_question(question))
+        self._examples[example_id] = {
+            'question': question,
+            'sql': sql,
+            'tables': extract_table_references(sql),
+            'terms': term_counts,
+        }
+        for token in term_counts:
+            self._postings[token].add(example_id)
+
+    def _ensure_loaded(self) -> None:
+        # Persistent connection: data_version only changes when another connection commits
+        if self._conn is None:
+            self._conn = self._connect()
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        rows = self._conn.execute(
+            "SELECT id, question, sql FROM query_history WHERE success = 1 AND id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for example_id, question, sql in rows:
+            # Rows this store recorded itself are already indexed and skipped as duplicates
+            self._index(example_id, question, sql)
+            self._last_id = example_id
+        self._data_version = data_version
+
+    def record(self, question: str, sql: str, success: bool, error: Optional[str] = None) -> None:
+        """
+        Persist a query outcome; successful ones become retrievable examples
+        """
+        if not question or not sql:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            conn = self._connect()
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO query_history (question, sql, success, error, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (question, sql, int(success), error, datetime.now().isoformat()),
+                )
+                conn.commit()
+                example_id = cursor.lastrowid
+            finally:
+                conn.close()
+            if success:
+                self._index(example_id, question, sql)
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + len(self._examples) / (1 + len(self._postings.get(token, ()))))
+
+    def find_examples(self, question: str, schema_info: Dict[str, Any], k: int = 3) -> List[Dict[str, str]]:
+        """
+        Top-k successful (question, SQL) pairs most similar to the question (TF-IDF cosine),
+        restricted to examples whose tables all exist in the current schema
+        """
+        if k <= 0:
+            return []
+        with self._lock:
+            self._ensure_loaded()
+            query_terms = Counter(tokenize_question(question))
+            if not query_terms or not self._examples:
+                return []
+
+            available_tables = {name.lower() for name in schema_info.get('tables', {})}
+            query_weights = {t: c * self._idf(t) for t, c in query_terms.items()}
+            query_norm = math.sqrt(sum(w * w for w in query_weights.values())) or 1.0
+
+            scores: Dict[int, float] = defaultdict(float)
+            for token, weight in query_weights.items():
+                for example_id in self._postings.get(token, ()):
+                    scores[example_id] += weight * self._examples[example_id]['terms'][token] * self._idf(token)
+
+            ranked = []
+            for example_id, dot in scores.items():
+                example = self._examples[example_id]
+                if not {t.lower() for t in example['tables']} <= available_tables:
+                    continue
+                example_norm = math.sqrt(sum(
+                    (c * self._idf(t)) ** 2 for t, c in example['terms'].items()
+                )) or 1.0
+                ranked.append((dot / (query_norm * example_norm), example_id))
+
+            ranked.sort(key=lambda item: (-item[0], -item[1]))
+            return [
+                {'question': self._examples[example_id]['question'], 'sql': self._examples[example_id]['sql']}
+                for _, example_id in ranked[:k]
+            ]
+
+
+def get_example_count() -> int:
+    """
+    Number of few-shot examples to inject into SQL generation prompts
+    """
+    return int(os.environ.get("QUERY_HISTORY_EXAMPLES", "3"))
+
+
+# Shared store used by the query endpoints
+query_history = QueryHistoryStore(os.environ.get("QUERY_HISTORY_DB", "db/query_history.db"))
+
+
+def find_prompt_examples(question: str, schema_info: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Few-shot examples for a question; history problems never fail the query
+    """
+    try:
+        return query_history.find_examples(question, schema_info, get_example_count())
+    except Exception as e:
+        logger.warning(f"[WARNING] Query history lookup failed: {str(e)}")
+        return []
+
+
+def record_query_outcome(question: str, sql: str, success: bool, error: Optional[str] = None) -> None:
+    """
+    Record a query outcome; history problems never fail the query
+    """
+    try:
+        query_history.record(question, sql, success, error)
+    except Exception as e:
+        logger.warning(f"[WARNING] Query history record failed: {str(e)}")
@@ -0,0 +1,137 @@
+"""
+Server-Sent Events pipeline for natural language queries.
+
+Streams SQL tokens as the LLM produces them, then executes the completed SQL
+and streams result pages. Event sequence:
+
+- token:   {"text": "..."}                 one per provider chunk
+- sql:     {"sql": "...", "attempt": n}    the cleaned, complete SQL
+- repair:  {"attempt": n, "error": "..."}  the SQL failed; token/sql events follow again
+- results: {"columns": [...], "results": [...], "page": n}   at least one, empty when no rows match
+- done:    {"row_count": n, "execution_time_ms": t, "attempts": n, "repair_time_ms": t, "truncated": b}
+- error:   {"error": "...", "error_code": c}  terminates the stream; error_code is
+           "budget_exceeded" when the query ran out of time or instructions
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator
+
+from core.data_models import QueryRequest
+from core.llm_processor import generate_sql_stream, clean_sql_response
+from core.sql_processor import iter_sql_results, get_database_schema
+from core.sql_security import SQLSecurityError
+from core.query_history import find_prompt_examples, record_query_outcome
+from core.sql_repair import can_attempt_repair
+from core.query_budget import QueryBudgetExceeded, BUDGET_EXCEEDED_PREFIX
+from core.index_advisor import observe_executed_query
+from core.metrics import time_phase
+from core.slow_query_log import observe_query_timing
+
+logger = logging.getLogger(__name__)
+
+# Rows per `results` event
+DEFAULT_PAGE_SIZE = 500
+
+
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format a single Server-Sent Event frame
+    """
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def stream_natural_language_query(
+    request: QueryRequest,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> Iterator[str]:
+    """
+    Generate SQL for the request and execute it, yielding SSE frames as work progresses
+    """
+    sql = ""
+    try:
+        # Get database schema
+        with time_phase("schema_fetch"):
+            schema_info = get_database_schema()
+
+        # Retrieve similar successful queries as few-shot examples
+        with time_phase("prompt_examples"):
+            examples = find_prompt_examples(request.query, schema_info)
+
+        started_at = time.perf_counter()
+        repair_started_at = None
+        repair_context = None
+        attempts = 0
+
+        while True:
+            attempts += 1
+
+            # Forward SQL tokens as they arrive
+            chunks = []
+            for text in generate_sql_stream(request, schema_info, examples, repair_context):
+                chunks.append(text)
+                yield format_sse_event("token", {"text": text})
+
+            sql = clean_sql_response("".join(chunks))
+            yield format_sse_event("sql", {"sql": sql, "attempt": attempts})
+
+            # Execute SQL query and stream result pages
+            start_time = datetime.now()
+            row_count = 0
+            pages_sent = 0
+            truncated = False
+            try:
+                for page in iter_sql_results(sql, page_size):
+                    row_count += len(page['results'])
+                    yield format_sse_event("results", {
+                        "columns": page['columns'],
+                        "results": page['results'],
+                        "page": pages_sent
+                    })
+                    pages_sent += 1
+                    truncated = page['truncated']
+            except SQLSecurityError:
+                raise
+            except Exception as e:
+                error = f"{BUDGET_EXCEEDED_PREFIX}: {str(e)}" if isinstance(e, QueryBudgetExceeded) else str(e)
+                # Results already sent cannot be taken back, so only repair before the first page
+                if pages_sent or not can_attempt_repair(attempts, started_at, error):
+                    raise
+                record_query_outcome(request.query, sql, False, error)
+                if repair_started_at is None:
+                    repair_started_at = time.perf_counter()
+                repair_context = {'sql': sql, 'error': error}
+                yield format_sse_event("repair", {"attempt": attempts + 1, "error": error})
+                continue
+            break
+
+        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        repair_time = (time.perf_counter() - repair_started_at) * 1000 if repair_started_at else 0.0
+        record_query_outcome(request.query, sql, True)
+        observe_executed_query(sql)
+        observe_query_timing(sql, execution_time, row_count, total_ms=(time.perf_counter() - started_at) * 1000)
+
+        yield format_sse_event("done", {
+            "row_count": row_count,
+            "execution_time_ms": execution_time,
+            "attempts": attempts,
+            "repair_time_ms": repair_time,
+            "truncated": truncated
+        })
+        logger.info(f"[SUCCESS] Query streamed: SQL={sql}, rows={row_count}, time={execution_time}ms")
+    except SQLSecurityError as e:
+        logger.error(f"[ERROR] Query stream failed: SQL={sql}, {str(e)}")
+        record_query_outcome(request.query, sql, False, str(e))
+        yield format_sse_event("error", {"error": f"Security error: {str(e)}", "error_code": None})
+    except QueryBudgetExceeded as e:
+        error = f"{BUDGET_EXCEEDED_PREFIX}: {str(e)}"
+        logger.error(f"[ERROR] Query stream failed: SQL={sql}, {error}")
+        record_query_outcome(request.query, sql, False, error)
+        yield format_sse_event("error", {"error": error, "error_code": e.error_code})
+    except Exception as e:
+        logger.error(f"[ERROR] Query stream failed: SQL={sql}, {str(e)}")
+        record_query_outcome(request.query, sql, False, str(e))
+        yield format_sse_event("error", {"error": str(e), "error_code": None})
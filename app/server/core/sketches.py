@@ -0,0 +1,240 @@
+"""
+Streaming sketches for approximate column statistics.
+
+- HyperLogLog estimates distinct counts in 2^precision one-byte registers
+  (relative standard error 1.04 / sqrt(2^precision)).
+- CountMinSketch estimates value frequencies. With width w and depth d,
+  estimates never undercount, and overcount by more than e/w * N with
+  probability at most e^-d.
+- TopKSketch pairs a Count-Min sketch with a bounded candidate set to track
+  the most frequent values.
+- ReservoirSample keeps a uniform random sample of a numeric stream.
+
+Values are hashed in batches with pandas' stable 64-bit hash, so sketches
+built in different processes can be merged and persisted.
+"""
+
+import math
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+UINT64_BITS = 64
+
+# Default sketch sizes: ~1.6% distinct-count error, overcounts within 0.13%
+# of the total count with 99.3% confidence
+HLL_PRECISION = 12
+COUNT_MIN_WIDTH = 2048
+COUNT_MIN_DEPTH = 5
+
+
+def hash_values(values: Sequence[Any]) -> np.ndarray:
+    """
+    Stable 64-bit hashes of non-null values. Numbers hash by their float value,
+    so 1 and 1.0 count as one value, matching SQLite's comparison rules.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint64)
+    if isinstance(values[0], (int, float, np.number)) and not isinstance(values[0], (bool, np.bool_)):
+        array = np.asarray(values)
+        if array.dtype.kind in "iuf":
+            return pd.util.hash_array(array.astype(np.float64))
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class HyperLogLog:
+    """Distinct-count sketch with vectorized register updates."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of estimate()."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(UINT64_BITS - self.precision)).astype(np.int64)
+        # Rank = leading zeros of the remaining bits + 1; a sentinel bit caps it
+        remaining = (hashes << np.uint64(self.precision)) | np.uint64(1 << (self.precision - 1))
+        rank = (UINT64_BITS - np.floor(np.log2(remaining.astype(np.float64)))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls(int(math.log2(len(data))))
+        sketch.registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return sketch
+
+
+class CountMinSketch:
+    """Frequency sketch; rows are indexed by double hashing one 64-bit hash."""
+
+    def __init__(self, width: int = COUNT_MIN_WIDTH, depth: int = COUNT_MIN_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    @property
+    def epsilon(self) -> float:
+        """Overcount bound as a fraction of total()."""
+        return math.e / self.width
+
+    @property
+    def confidence(self) -> float:
+        """Probability that an estimate is within epsilon * total of the truth."""
+        return 1 - math.exp(-self.depth)
+
+    @property
+    def error_bound(self) -> int:
+        """Maximum overcount of any estimate at the sketch's confidence."""
+        return int(math.ceil(self.epsilon * self.total))
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64).reshape(-1, 1)
+        return ((low + rows * high) % np.uint64(self.width)).astype(np.int64)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], minlength=self.width)
+        self.total += len(hashes)
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth).reshape(-1, 1), columns].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        self.table += other.table
+        self.total += other.total
+
+    def to_bytes(self) -> bytes:
+        # Mostly-zero counters compress well
+        return zlib.compress(self.table.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes, depth: int = COUNT_MIN_DEPTH) -> "CountMinSketch":
+        table = np.frombuffer(zlib.decompress(data), dtype=np.int64).reshape(depth, -1).copy()
+        sketch = cls(table.shape[1], depth)
+        sketch.table = table
+        # Every row counts each value once
+        sketch.total = int(table[0].sum())
+        return sketch
+
+
+class TopKSketch:
+    """Most frequent values: Count-Min estimates over a bounded candidate set."""
+
+    def __init__(
+        self,
+        k: int = 5,
+        width: int = COUNT_MIN_WIDTH,
+        depth: int = COUNT_MIN_DEPTH,
+        candidate_factor: int = 4
+    ):
+        self.k = k
+        self.capacity = k * candidate_factor
+        self.counts = CountMinSketch(width, depth)
+        self.candidates: Dict[int, Any] = {}  # hash -> value
+
+    def add(self, values: Sequence[Any], hashes: np.ndarray) -> None:
+        """
+        Add a batch of non-null values with their hashes (from hash_values)
+        """
+        if len(values) == 0:
+            return
+        self.counts.add_hashes(hashes)
+
+        # The batch's own heavy hitters compete with the existing candidates.
+        # Candidates are keyed by the batch's hashes so estimates hit the same counters.
+        batch_top = pd.Series(hashes).value_counts().index[:self.capacity]
+        for value_hash in batch_top:
+            value_hash = int(value_hash)
+            if value_hash not in self.candidates:
+                position = int(np.flatnonzero(hashes == np.uint64(value_hash))[0])
+                self.candidates[value_hash] = values[position]
+        self._prune()
+
+    def merge(self, other: "TopKSketch") -> None:
+        self.counts.merge(other.counts)
+        for value_hash, value in other.candidates.items():
+            self.candidates.setdefault(value_hash, value)
+        self._prune()
+
+    def _prune(self) -> None:
+        if len(self.candidates) <= self.capacity:
+            return
+        ranked = self._ranked()
+        self.candidates = {value_hash: value for value_hash, value, _ in ranked[:self.capacity]}
+
+    def _ranked(self) -> List[Tuple[int, Any, int]]:
+        if not self.candidates:
+            return []
+        hashes = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        estimates = self.counts.estimate_hashes(hashes)
+        ranked = [
+            (value_hash, value, int(count))
+            for (value_hash, value), count in zip(self.candidates.items(), estimates)
+        ]
+        ranked.sort(key=lambda item: -item[2])
+        return ranked
+
+    def top(self) -> List[Dict[str, Any]]:
+        return [{"value": value, "count": count} for _, value, count in self._ranked()[:self.k]]
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample of a numeric stream (Algorithm R, vectorized per batch)."""
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        self.size = size
+        self.sample = np.empty(size, dtype=np.float64)
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, values: np.ndarray) -> None:
+        # Fill the reservoir first
+        filled = min(self.seen, self.size)
+        take = min(self.size - filled, len(values))
+        self.sample[filled:filled + take] = values[:take]
+        self.seen += take
+        rest = values[take:]
+        if len(rest) == 0:
+            return
+
+        # Item i (0-based, over the whole stream) replaces a random slot with probability size / (i + 1).
+        # Later items in the batch win repeated slots, as they would sequentially.
+        positions = np.arange(self.seen, self.seen + len(rest), dtype=np.float64)
+        slots = (self._rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+        keep = slots < self.size
+        self.sample[slots[keep]] = rest[keep]
+        self.seen += len(rest)
+
+    def values(self) -> np.ndarray:
+        return self.sample[:min(self.seen, self.size)]
@@ -0,0 +1,285 @@
+"""
+Slow-query log grouped by normalized SQL fingerprint.
+
+A generated query whose SQLite execution takes longer than
+SLOW_QUERY_THRESHOLD_MS is recorded with these fields:
+- the fingerprint from core.sql_lexer. Queries that differ only in literals
+  and formatting share one fingerprint.
+- the SQL itself.
+- a one-line summary of its EXPLAIN QUERY PLAN.
+- the row count.
+- the execution, LLM generation and total durations.
+
+Fast queries cost one comparison. The plan capture and the insert run on a
+single background thread, as with the index advisor, so the response does not
+wait for them.
+
+Entries are kept in a small SQLite database apart from user data, shared by
+every worker. It works as a ring buffer: each insert deletes entries older
+than the newest SLOW_QUERY_BUFFER_SIZE in the same transaction, so the
+table stays bounded. GET /api/slow-queries lists the most recent entries and
+aggregates the retained ones into the top fingerprints by total execution time.
+
+Configuration (environment variables):
+- SLOW_QUERY_LOG_ENABLED     "false" disables the log (default true)
+- SLOW_QUERY_THRESHOLD_MS    Execution time above which a query is logged (default 200)
+- SLOW_QUERY_BUFFER_SIZE     Most recent slow queries kept and listed (default 200)
+- SLOW_QUERY_LOG_DB          Log database path (default db/slow_queries.db)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .sql_lexer import fingerprint_sql
+from .sql_security import install_read_only_authorizer
+
+logger = logging.getLogger(__name__)
+
+# Columns of a logged entry, in slow_queries column order
+ENTRY_FIELDS = ('fingerprint', 'sql', 'plan', 'row_count', 'execution_ms', 'llm_ms', 'total_ms', 'error', 'created_at')
+
+
+def summarize_query_plan(plan_rows: List[tuple]) -> str:
+    """
+    One-line summary of EXPLAIN QUERY PLAN rows, e.g. "SCAN orders; SEARCH users USING INDEX ..."
+    """
+    return "; ".join(row[3] for row in plan_rows)
+
+
+class SlowQueryLog:
+    """Persistent log of queries slower than a threshold."""
+
+    def __init__(
+        self,
+        db_path: str,
+        threshold_ms: float = 200.0,
+        buffer_size: int = 200,
+        database_path: str = "db/database.db"
+    ):
+        self.db_path = db_path
+        self.threshold_ms = threshold_ms
+        self.database_path = database_path
+        self._lock = threading.Lock()
+        self.buffer_size = max(buffer_size, 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "SlowQueryLog":
+        return cls(
+            db_path=os.environ.get("SLOW_QUERY_LOG_DB", "db/slow_queries.db"),
+            threshold_ms=float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200")),
+            buffer_size=int(os.environ.get("SLOW_QUERY_BUFFER_SIZE", "200")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fingerprint TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                plan TEXT,
+                row_count INTEGER NOT NULL,
+                execution_ms REAL NOT NULL,
+                llm_ms REAL,
+                total_ms REAL,
+                error TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_slow_queries_fingerprint ON slow_queries (fingerprint)")
+        return conn
+
+    def is_slow(self, execution_ms: float) -> bool:
+        return execution_ms >= self.threshold_ms
+
+    def explain(self, sql: str) -> Optional[str]:
+        """
+        Plan summary for a query, or None if it cannot be explained
+        """
+        conn = sqlite3.connect(self.database_path)
+        try:
+            # The query text is user-controlled: explain it under the same read-only rules it ran with
+            install_read_only_authorizer(conn)
+            return summarize_query_plan(conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    def record(
+        self,
+        sql: str,
+        execution_ms: float,
+        row_count: int,
+        llm_ms: Optional[float] = None,
+        total_ms: Optional[float] = None,
+        error: Optional[str] = None,
+        plan: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Log a slow query to the database, dropping entries beyond the buffer size
+        """
+        entry = {
+            'fingerprint': fingerprint_sql(sql),
+            'sql': sql,
+            'plan': plan,
+            'row_count': row_count,
+            'execution_ms': execution_ms,
+            'llm_ms': llm_ms,
+            'total_ms': total_ms,
+            'error': error,
+            'created_at': datetime.now().isoformat(),
+        }
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(
+                    "INSERT INTO slow_queries (fingerprint, sql, plan, row_count, execution_ms, llm_ms, total_ms, error, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    tuple(entry[key] for key in ENTRY_FIELDS)
+                )
+                # AUTOINCREMENT ids only grow, so this keeps the newest buffer_size entries
+                conn.execute("DELETE FROM slow_queries WHERE id <= ?", (cursor.lastrowid - self.buffer_size,))
+                conn.commit()
+            finally:
+                conn.close()
+        logger.warning(f"[WARNING] Slow query ({execution_ms:.0f}ms, {row_count} rows): {entry['fingerprint']}")
+        return entry
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+            return self._executor
+
+    def queue_depth(self) -> int:
+        """
+        Slow queries queued or being recorded on the background thread
+        """
+        with self._lock:
+            return self._pending
+
+    def _task_done(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def observe(self, sql: str, execution_ms: float, row_count: int, **durations: Any) -> None:
+        """
+        Log a query on the background thread if it was slow, capturing its plan first
+        """
+        if not self.is_slow(execution_ms):
+            return
+
+        def run() -> None:
+            try:
+                self.record(sql, execution_ms, row_count, plan=self.explain(sql), **durations)
+            except Exception as e:
+                logger.warning(f"[WARNING] Slow query log failed: {str(e)}")
+
+        executor = self._get_executor()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._task_done)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Most recent slow queries from every worker, newest first
+        """
+        if not os.path.exists(self.db_path):
+            return []
+        limit = min(limit, self.buffer_size) if limit else self.buffer_size
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    f"SELECT {', '.join(ENTRY_FIELDS)} FROM slow_queries ORDER BY id DESC LIMIT ?",
+                    (limit,)
+                ).fetchall()
+            finally:
+                conn.close()
+        return [dict(zip(ENTRY_FIELDS, row)) for row in rows]
+
+    def top_fingerprints(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Fingerprints ordered by total execution time, with their latest SQL and plan
+        """
+        if not os.path.exists(self.db_path):
+            return []
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute("""
+                    SELECT s.fingerprint, g.count, g.total_ms, g.avg_ms, g.max_ms, g.avg_rows, g.last_seen, s.sql, s.plan
+                    FROM (
+                        SELECT fingerprint, COUNT(*) AS count, SUM(execution_ms) AS total_ms,
+                               AVG(execution_ms) AS avg_ms, MAX(execution_ms) AS max_ms,
+                               AVG(row_count) AS avg_rows, MAX(created_at) AS last_seen, MAX(id) AS last_id
+                        FROM slow_queries
+                        GROUP BY fingerprint
+                    ) AS g
+                    JOIN slow_queries AS s ON s.id = g.last_id
+                    ORDER BY g.total_ms DESC
+                    LIMIT ?
+                """, (limit,)).fetchall()
+            finally:
+                conn.close()
+        return [
+            {
+                'fingerprint': fingerprint,
+                'count': count,
+                'total_ms': total_ms,
+                'avg_ms': avg_ms,
+                'max_ms': max_ms,
+                'avg_rows': avg_rows,
+                'last_seen': last_seen,
+                'sample_sql': sql,
+                'plan': plan,
+            }
+            for fingerprint, count, total_ms, avg_ms, max_ms, avg_rows, last_seen, sql, plan in rows
+        ]
+
+
+def is_slow_query_log_enabled() -> bool:
+    """
+    Whether slow queries are logged (SLOW_QUERY_LOG_ENABLED, default true)
+    """
+    return os.environ.get("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+
+
+# Shared log used by the query endpoints
+slow_query_log = SlowQueryLog.from_env()
+
+
+def observe_query_timing(
+    sql: str,
+    execution_ms: float,
+    row_count: int,
+    llm_ms: Optional[float] = None,
+    total_ms: Optional[float] = None,
+    error: Optional[str] = None
+) -> None:
+    """
+    Hand an executed query's timings to the slow-query log; log problems never fail the query
+    """
+    if not sql or not is_slow_query_log_enabled():
+        return
+    try:
+        slow_query_log.observe(sql, execution_ms, row_count, llm_ms=llm_ms, total_ms=total_ms, error=error)
+    except Exception as e:
+        logger.warning(f"[WARNING] Slow query log failed: {str(e)}")
@@ -0,0 +1,284 @@
+"""
+Single-pass SQL lexer.
+
+Splits a SQL string into tokens in one linear scan, correctly skipping string
+literals, quoted identifiers and comments. The analysis built on top of it
+(statement type and count, comments, referenced tables and a normalized
+fingerprint) is shared by query validation, cache keys and slow-query grouping,
+so each query is scanned once no matter how many consumers look at it.
+
+Fingerprints replace literals with ?, uppercase words, strip identifier quoting
+and comments, collapse whitespace and collapse lists of literals, e.g.
+
+    select * from Users where id in (1, 2, 3) and name = 'x'
+    -> SELECT * FROM USERS WHERE ID IN (?+) AND NAME = ?
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Tuple
+
+# Token types
+WORD = "word"
+QUOTED_IDENTIFIER = "quoted_identifier"
+STRING = "string"
+NUMBER = "number"
+BLOB = "blob"
+PARAMETER = "parameter"
+OPERATOR = "operator"
+PUNCTUATION = "punctuation"
+SEMICOLON = "semicolon"
+COMMENT = "comment"
+
+LITERAL_TYPES = {STRING, NUMBER, BLOB, PARAMETER}
+
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+NUMBER_PATTERN = re.compile(r"0[xX][0-9A-Fa-f]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+PARAMETER_PATTERN = re.compile(r"\?\d*|[:@$][A-Za-z0-9_]+")
+OPERATOR_PATTERN = re.compile(r"->>|->|<=|>=|<>|!=|==|\|\||<<|>>|[-+*/%<>=~&|!]")
+LITERAL_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+QUOTE_CLOSERS = {'"': '"', "`": "`", "[": "]"}
+
+# Keywords that end a FROM clause's table list
+FROM_CLAUSE_TERMINATORS = {
+    "WHERE", "GROUP", "ORDER", "LIMIT", "HAVING", "UNION", "INTERSECT", "EXCEPT",
+    "WINDOW", "OFFSET",
+}
+
+
+class Token(NamedTuple):
+    type: str
+    value: str
+    position: int
+
+
+@dataclass(frozen=True)
+class SQLAnalysis:
+    """Everything consumers need from one lexer pass over a query."""
+    tokens: Tuple[Token, ...]
+    statement_type: str          # First keyword of the first statement, uppercased ("" if none)
+    statement_count: int         # Non-empty statements separated by ';'
+    has_comments: bool
+    tables: FrozenSet[str]       # Tables referenced after FROM/JOIN (CTE names excluded)
+    fingerprint: str
+
+
+def _scan_quoted(sql: str, start: int, closer: str) -> int:
+    """
+    Index just past a quoted run starting at `start` (doubled closers are escapes)
+    """
+    i = start + 1
+    length = len(sql)
+    while i < length:
+        if sql[i] == closer:
+            if closer != "]" and i + 1 < length and sql[i + 1] == closer:
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    # Unterminated: consume the rest and let SQLite report the error
+    return length
+
+
+def tokenize(sql: str) -> List[Token]:
+    """
+    Split SQL into tokens in a single linear pass (whitespace is dropped)
+    """
+    tokens = []
+    i = 0
+    length = len(sql)
+
+    while i < length:
+        char = sql[i]
+
+        if char.isspace():
+            i += 1
+            continue
+
+        if char == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = length if end == -1 else end
+            tokens.append(Token(COMMENT, sql[i:end], i))
+            i = end
+            continue
+
+        if char == "/" and sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = length if end == -1 else end + 2
+            tokens.append(Token(COMMENT, sql[i:end], i))
+            i = end
+            continue
+
+        if char == "'":
+            end = _scan_quoted(sql, i, "'")
+            tokens.append(Token(STRING, sql[i:end], i))
+            i = end
+            continue
+
+        if char in "xX" and i + 1 < length and sql[i + 1] == "'":
+            end = _scan_quoted(sql, i + 1, "'")
+            tokens.append(Token(BLOB, sql[i:end], i))
+            i = end
+            continue
+
+        if char in QUOTE_CLOSERS:
+            end = _scan_quoted(sql, i, QUOTE_CLOSERS[char])
+            tokens.append(Token(QUOTED_IDENTIFIER, sql[i:end], i))
+            i = end
+            continue
+
+        if char.isdigit() or (char == "." and i + 1 < length and sql[i + 1].isdigit()):
+            match = NUMBER_PATTERN.match(sql, i)
+            tokens.append(Token(NUMBER, match.group(0), i))
+            i = match.end()
+            continue
+
+        if char.isalpha() or char == "_":
+            match = WORD_PATTERN.match(sql, i)
+            tokens.append(Token(WORD, match.group(0), i))
+            i = match.end()
+            continue
+
+        if char in "?:@$":
+            match = PARAMETER_PATTERN.match(sql, i)
+            if match:
+                tokens.append(Token(PARAMETER, match.group(0), i))
+                i = match.end()
+                continue
+
+        if char == ";":
+            tokens.append(Token(SEMICOLON, char, i))
+            i += 1
+            continue
+
+        if char in "(),.":
+            tokens.append(Token(PUNCTUATION, char, i))
+            i += 1
+            continue
+
+        match = OPERATOR_PATTERN.match(sql, i)
+        value = match.group(0) if match else char
+        tokens.append(Token(OPERATOR, value, i))
+        i += len(value)
+
+    return tokens
+
+
+def unquote_identifier(value: str) -> str:
+    """
+    Strip "", ``, or [] quoting from an identifier
+    """
+    if value[:1] in QUOTE_CLOSERS:
+        closer = QUOTE_CLOSERS[value[0]]
+        inner = value[1:-1] if value.endswith(closer) else value[1:]
+        return inner.replace(closer * 2, closer) if closer != "]" else inner
+    return value
+
+
+@lru_cache(maxsize=1024)
+def analyze_sql(sql: str) -> SQLAnalysis:
+    """
+    Lex a query once and derive statement type/count, comments, tables and fingerprint
+    """
+    tokens = tokenize(sql)
+
+    statement_type = ""
+    statement_count = 0
+    statement_has_tokens = False
+    has_comments = False
+    tables = set()
+    cte_names = set()
+    fingerprint_parts = []
+
+    depth = 0
+    from_depth = None          # Paren depth of the FROM clause currently being read
+    expect_table = False
+
+    for index, token in enumerate(tokens):
+        if token.type == COMMENT:
+            has_comments = True
+            continue
+
+        if token.type == SEMICOLON:
+            if statement_has_tokens:
+                fingerprint_parts.append(";")
+            statement_has_tokens = False
+            from_depth = None
+            expect_table = False
+            continue
+
+        if not statement_has_tokens:
+            statement_has_tokens = True
+            statement_count += 1
+            if not statement_type and token.type == WORD:
+                statement_type = token.value.upper()
+
+        # Fingerprint
+        if token.type in LITERAL_TYPES:
+            fingerprint_parts.append("?")
+        elif token.type == WORD:
+            fingerprint_parts.append(token.value.upper())
+        elif token.type == QUOTED_IDENTIFIER:
+            fingerprint_parts.append(unquote_identifier(token.value).upper())
+        else:
+            fingerprint_parts.append(token.value)
+
+        # Referenced tables
+        upper = token.value.upper() if token.type == WORD else None
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            if from_depth is not None and depth == from_depth:
+                from_depth = None
+            depth -= 1
+
+        if expect_table and token.type in (WORD, QUOTED_IDENTIFIER):
+            tables.add(unquote_identifier(token.value))
+            expect_table = False
+            continue
+        expect_table = False
+
+        if upper == "FROM":
+            from_depth = depth
+            expect_table = True
+        elif upper == "JOIN":
+            expect_table = True
+        elif token.value == "," and from_depth == depth:
+            expect_table = True
+        elif upper in FROM_CLAUSE_TERMINATORS and from_depth == depth:
+            from_depth = None
+
+        # CTE names: <name> AS (
+        if (
+            token.type in (WORD, QUOTED_IDENTIFIER)
+            and index + 2 < len(tokens)
+            and tokens[index + 1].value.upper() == "AS"
+            and tokens[index + 2].value == "("
+        ):
+            cte_names.add(unquote_identifier(token.value).lower())
+
+    # Drop a trailing statement separator
+    while fingerprint_parts and fingerprint_parts[-1] == ";":
+        fingerprint_parts.pop()
+
+    fingerprint = " ".join(fingerprint_parts)
+    fingerprint = fingerprint.replace("( ", "(").replace(" )", ")").replace(" ,", ",").replace(" . ", ".")
+    fingerprint = LITERAL_LIST_PATTERN.sub("(?+)", fingerprint)
+
+    return SQLAnalysis(
+        tokens=tuple(tokens),
+        statement_type=statement_type,
+        statement_count=statement_count,
+        has_comments=has_comments,
+        tables=frozenset(name for name in tables if name.lower() not in cte_names),
+        fingerprint=fingerprint,
+    )
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Normalized fingerprint grouping queries that differ only in literals and formatting
+    """
+    return analyze_sql(sql).fingerprint
@@ -1,18 +1,37 @@
 import sqlite3
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from .sql_security import (
     execute_query_safely, 
-    validate_sql_query, 
+    validate_user_query,
+    install_read_only_authorizer,
     SQLSecurityError
 )
+from .metrics import time_phase
+from .query_budget import (
+    install_query_budget,
+    get_max_result_rows,
+    QueryBudgetExceeded,
+    BUDGET_EXCEEDED_PREFIX
+)
+
+def raise_if_denied(authorizer) -> None:
+    """
+    Turn an authorizer denial into a SQLSecurityError
+    """
+    if authorizer.denied:
+        raise SQLSecurityError(f"Query not permitted: {authorizer.denied[0]}")
 
 def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
     """
-    Execute SQL query with safety checks
+    Execute SQL query with safety checks and resource budgets.
+
+    Results beyond SQL_MAX_RESULT_ROWS are dropped and 'truncated' is set. Queries
+    interrupted by the time or instruction budget fail with error_code 'budget_exceeded'.
     """
     try:
-        # Validate the SQL query for dangerous operations
-        validate_sql_query(sql_query)
+        # Cheap structural validation (single read-only statement)
+        with time_phase("sql_validate"):
+            validate_user_query(sql_query)
         
         # Connect to database
         conn = sqlite3.connect("db/database.db")
@@ -20,13 +39,28 @@ def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
         
         # Execute query safely
         # Note: Since this is a user-provided complete SQL query,
-        # we can't use parameterization. The validate_sql_query
-        # function provides protection against dangerous operations.
+        # we can't use parameterization. The read-only authorizer
+        # enforces that the statement only reads user tables, and the
+        # budget interrupts runaway queries.
+        authorizer = install_read_only_authorizer(conn)
+        budget = install_query_budget(conn)
+        max_rows = get_max_result_rows()
         cursor = conn.cursor()
-        cursor.execute(sql_query)
+        try:
+            with time_phase("sql_execute"):
+                cursor.execute(sql_query)
+                
+                # Get results, one row past the cap to detect truncation
+                rows = cursor.fetchmany(max_rows + 1) if max_rows else cursor.fetchall()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise_if_denied(authorizer)
+            budget.raise_if_exceeded()
+            raise
         
-        # Get results
-        rows = cursor.fetchall()
+        truncated = bool(max_rows) and len(rows) > max_rows
+        if truncated:
+            rows = rows[:max_rows]
         
         # Convert rows to dictionaries
         results = []
@@ -42,22 +76,90 @@ def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
         return {
             'results': results,
             'columns': columns,
-            'error': None
+            'truncated': truncated,
+            'error': None,
+            'error_code': None
         }
     
     except SQLSecurityError as e:
         return {
             'results': [],
             'columns': [],
-            'error': f"Security error: {str(e)}"
+            'truncated': False,
+            'error': f"Security error: {str(e)}",
+            'error_code': None
+        }
+    except QueryBudgetExceeded as e:
+        return {
+            'results': [],
+            'columns': [],
+            'truncated': False,
+            'error': f"{BUDGET_EXCEEDED_PREFIX}: {str(e)}",
+            'error_code': e.error_code
         }
     except Exception as e:
         return {
             'results': [],
             'columns': [],
-            'error': str(e)
+            'truncated': False,
+            'error': str(e),
+            'error_code': None
         }
 
+def iter_sql_results(sql_query: str, page_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """
+    Execute SQL query with safety checks and resource budgets, yielding results page by page.
+
+    Each page is a dict with 'columns', 'results' and 'truncated' keys; 'truncated' is
+    True on the last page when rows beyond SQL_MAX_RESULT_ROWS were dropped. A query
+    that returns no rows yields one empty page, so callers still get its columns. Unlike
+    execute_sql_safely, errors are raised (SQLSecurityError, QueryBudgetExceeded or
+    sqlite3.Error) so streaming callers can report them in-band.
+    """
+    # Cheap structural validation (single read-only statement)
+    validate_user_query(sql_query)
+
+    conn = sqlite3.connect("db/database.db")
+    try:
+        authorizer = install_read_only_authorizer(conn)
+        budget = install_query_budget(conn)
+        max_rows = get_max_result_rows()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql_query)
+            columns = [desc[0] for desc in cursor.description or []]
+
+            remaining = max_rows
+            pages = 0
+            while True:
+                size = min(page_size, remaining) if max_rows else page_size
+                rows = cursor.fetchmany(size) if size else []
+                if not rows:
+                    if not pages:
+                        yield {'columns': columns, 'results': [], 'truncated': False}
+                    break
+                pages += 1
+                remaining -= len(rows)
+                # At the cap, look one row ahead to tell a full result from a truncated one
+                truncated = bool(max_rows) and remaining <= 0 and bool(cursor.fetchmany(1))
+                page = {
+                    'columns': columns,
+                    'results': [dict(zip(columns, row)) for row in rows],
+                    'truncated': truncated
+                }
+                # Only execute and fetch count against the time budget, not the caller's work between pages
+                budget.pause()
+                yield page
+                budget.resume()
+                if max_rows and remaining <= 0:
+                    break
+        except sqlite3.DatabaseError:
+            raise_if_denied(authorizer)
+            budget.raise_if_exceeded()
+            raise
+    finally:
+        conn.close()
+
 def get_database_schema() -> Dict[str, Any]:
     """
     Get complete database schema information
@@ -0,0 +1,116 @@
+"""
+Bounded SQL repair loop for natural language queries.
+
+When generated SQL fails in SQLite (unknown column, syntax error, ...), the
+failing SQL and the error are sent back to the provider together with the
+schema that was already fetched, instead of returning the error to the user.
+Security rejections are never repaired.
+
+Configuration (environment variables):
+- SQL_REPAIR_MAX_ATTEMPTS     Total generation attempts, including the first (default 3)
+- SQL_REPAIR_TIME_BUDGET_MS   No new repair is started after this much time (default 15000)
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from core.data_models import QueryRequest
+from core.llm_processor import generate_sql
+from core.sql_processor import execute_sql_safely
+from core.query_history import record_query_outcome
+from core.index_advisor import observe_executed_query
+from core.metrics import time_phase
+from core.slow_query_log import observe_query_timing
+
+logger = logging.getLogger(__name__)
+
+SECURITY_ERROR_PREFIX = "Security error"
+
+
+def get_repair_budget() -> Dict[str, float]:
+    """
+    Attempt and time limits for the repair loop
+    """
+    return {
+        'max_attempts': max(1, int(os.environ.get("SQL_REPAIR_MAX_ATTEMPTS", "3"))),
+        'time_budget_ms': float(os.environ.get("SQL_REPAIR_TIME_BUDGET_MS", "15000")),
+    }
+
+
+def is_repairable_error(error: Optional[str]) -> bool:
+    """
+    Whether an execution error is worth sending back to the provider
+    """
+    return bool(error) and not error.startswith(SECURITY_ERROR_PREFIX)
+
+
+def can_attempt_repair(attempts: int, started_at: float, error: Optional[str]) -> bool:
+    """
+    Whether another repair attempt fits in the configured budget
+    """
+    budget = get_repair_budget()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    return (
+        is_repairable_error(error)
+        and attempts < budget['max_attempts']
+        and elapsed_ms < budget['time_budget_ms']
+    )
+
+
+def generate_and_execute_sql(
+    request: QueryRequest,
+    schema_info: Dict[str, Any],
+    examples: Optional[List[Dict[str, str]]] = None
+) -> Dict[str, Any]:
+    """
+    Generate SQL and execute it, repairing failures within the retry and time budget.
+
+    Returns a dict with 'sql', 'result' (from execute_sql_safely), 'attempts',
+    'execution_time_ms' (last execution) and 'repair_time_ms' (time spent after
+    the first attempt failed).
+    """
+    started_at = time.perf_counter()
+    repair_started_at: Optional[float] = None
+    repair_context: Optional[Dict[str, str]] = None
+    attempts = 0
+
+    while True:
+        attempts += 1
+        generation_start = time.perf_counter()
+        with time_phase("llm_generate"):
+            sql = generate_sql(request, schema_info, examples, repair_context)
+
+        execution_start = time.perf_counter()
+        result = execute_sql_safely(sql)
+        execution_time = (time.perf_counter() - execution_start) * 1000
+        record_query_outcome(request.query, sql, result['error'] is None, result['error'])
+        observe_query_timing(
+            sql,
+            execution_time,
+            len(result.get('results') or []),
+            llm_ms=(execution_start - generation_start) * 1000,
+            total_ms=(time.perf_counter() - started_at) * 1000,
+            error=result['error']
+        )
+
+        if result['error'] is None or not can_attempt_repair(attempts, started_at, result['error']):
+            break
+
+        logger.info(f"[INFO] Repairing SQL (attempt {attempts + 1}): SQL={sql}, error={result['error']}")
+        if repair_started_at is None:
+            repair_started_at = execution_start + execution_time / 1000
+        repair_context = {'sql': sql, 'error': result['error']}
+
+    repair_time = (time.perf_counter() - repair_started_at) * 1000 if repair_started_at else 0.0
+    if result['error'] is None:
+        observe_executed_query(sql)
+
+    return {
+        'sql': sql,
+        'result': result,
+        'attempts': attempts,
+        'execution_time_ms': execution_time,
+        'repair_time_ms': repair_time,
+    }
@@ -4,10 +4,17 @@ Provides functions for safe SQL query execution, identifier validation,
 and proper escaping mechanisms.
 """
 
+import os
 import re
 import sqlite3
 from typing import Any, List, Tuple, Optional, Union
 
+from .sql_lexer import analyze_sql
+
+
+# Statement types that require allow_ddl=True in execute_query_safely
+DDL_STATEMENT_KEYWORDS = {"DROP", "CREATE", "ALTER", "TRUNCATE"}
+
 
 class SQLSecurityError(Exception):
     """Raised when SQL security validation fails."""
@@ -130,11 +137,7 @@ def execute_query_safely(
     # Validate query for dangerous operations unless DDL is explicitly allowed
     if not allow_ddl:
         # Check for DDL operations
-        query_upper = query.upper().strip()
-        if any(
-            query_upper.startswith(ddl)
-            for ddl in ["DROP", "CREATE", "ALTER", "TRUNCATE"]
-        ):
+        if analyze_sql(query).statement_type in DDL_STATEMENT_KEYWORDS:
             raise SQLSecurityError(
                 "DDL operations are not allowed without explicit permission. "
                 "Use allow_ddl=True if this is intentional."
@@ -150,9 +153,37 @@ def execute_query_safely(
     return cursor
 
 
+# Dangerous operations, matched against the lexer fingerprint (literals and comments removed)
+DANGEROUS_PATTERNS = [
+    re.compile(pattern) for pattern in [
+        r"\bDROP\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
+        r"\bDELETE\s+FROM\b",
+        r"\bTRUNCATE\s+TABLE\b",
+        r"\bEXEC(?:UTE)?\s*\(",
+        r"\bCREATE\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
+        r"\bALTER\s+TABLE\b",
+        r"\bGRANT\b",
+        r"\bREVOKE\b",
+        r"\bINSERT\s+INTO\b.*\bSELECT\b",  # Prevent INSERT...SELECT
+        r"\bUPDATE\b.*\bSET\b",
+    ]
+]
+
+# Common injection patterns, matched against the raw query
+INJECTION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in [
+        r"'\s*OR\s*'?1'?\s*=\s*'?1",  # 'OR 1=1
+        r'"\s*OR\s*"?1"?\s*=\s*"?1',  # "OR 1=1
+        # r"\bUNION\s+(?:ALL\s+)?SELECT\b",  # UNION SELECT - example injection pattern an llm might unintentionally try
+    ]
+]
+
+
 def validate_sql_query(query: str) -> bool:
     """
     Validate a SQL query to ensure it doesn't contain dangerous operations.
+    Uses a single lexer pass, so keywords, comment markers and semicolons inside
+    string literals are not mistaken for SQL.
 
     Args:
         query: The SQL query to validate
@@ -163,50 +194,141 @@ def validate_sql_query(query: str) -> bool:
     Raises:
         SQLSecurityError: If the query contains dangerous operations
     """
-    # Normalize query for checking
-    normalized_query = query.upper().strip()
+    analysis = analyze_sql(query)
 
-    # List of dangerous operations
-    dangerous_patterns = [
-        r"\bDROP\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
-        r"\bDELETE\s+FROM\b",
-        r"\bTRUNCATE\s+TABLE\b",
-        r"\bEXEC(?:UTE)?\s*\(",
-        r"\bCREATE\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
-        r"\bALTER\s+TABLE\b",
-        r"\bGRANT\b",
-        r"\bREVOKE\b",
-        r"\bINSERT\s+INTO\b.*\bSELECT\b",  # Prevent INSERT...SELECT
-        r"\bUPDATE\b.*\bSET\b",
-        r";\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT)",  # Multiple statements
-    ]
+    if analysis.statement_count > 1:
+        raise SQLSecurityError(
+            "Query contains potentially dangerous operation: multiple statements"
+        )
 
-    for pattern in dangerous_patterns:
-        if re.search(pattern, normalized_query):
+    for pattern in DANGEROUS_PATTERNS:
+        if pattern.search(analysis.fingerprint):
             raise SQLSecurityError(
-                f"Query contains potentially dangerous operation: {pattern}"
+                f"Query contains potentially dangerous operation: {pattern.pattern}"
             )
 
     # Check for comment injection attempts
-    if "--" in query or "/*" in query or "*/" in query:
+    if analysis.has_comments:
         raise SQLSecurityError("Query contains SQL comments which are not allowed")
 
     # Check for common injection patterns
-    injection_patterns = [
-        r"'\s*OR\s*'?1'?\s*=\s*'?1",  # 'OR 1=1
-        r'"\s*OR\s*"?1"?\s*=\s*"?1',  # "OR 1=1
-        # r"\bUNION\s+(?:ALL\s+)?SELECT\b",  # UNION SELECT - example injection pattern an llm might unintentionally try
-        r"'[^']*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)",  # SQL injection after quote and semicolon
-        r'"[^"]*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)',  # SQL injection after quote and semicolon
-    ]
-
-    for pattern in injection_patterns:
-        if re.search(pattern, normalized_query, re.IGNORECASE):
+    for pattern in INJECTION_PATTERNS:
+        if pattern.search(query):
             raise SQLSecurityError("Query contains potential SQL injection pattern")
 
     return True
 
 
+# Statement types a user query may start with
+READ_ONLY_STATEMENT_KEYWORDS = {"SELECT", "WITH", "VALUES"}
+
+# Authorizer actions permitted for read-only user queries
+READ_ONLY_AUTHORIZER_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+# SQL functions that can touch the filesystem or process state
+DENIED_FUNCTIONS = {"load_extension", "readfile", "writefile", "edit", "fts3_tokenizer"}
+
+
+def is_regex_prefilter_enabled() -> bool:
+    """
+    Whether validate_sql_query runs before execution (SQL_REGEX_PREFILTER, default off).
+    The authorizer enforces read-only access either way.
+    """
+    return os.environ.get("SQL_REGEX_PREFILTER", "false").lower() == "true"
+
+
+def check_read_only_statement(query: str) -> bool:
+    """
+    Cheap structural check for user queries, from a single lexer pass: exactly one
+    statement, starting with SELECT, WITH or VALUES. The lexer drops comments
+    before both checks, so model output such as "SELECT ... -- total revenue"
+    passes, while a comment cannot hide a second statement or a leading write.
+    String literals and quoted identifiers are skipped, so "--" or ";" inside
+    them is not rejected. The authorizer still enforces read-only access.
+
+    Args:
+        query: The SQL query to check
+
+    Returns:
+        bool: True if the query passes, raises SQLSecurityError otherwise
+
+    Raises:
+        SQLSecurityError: If the query is not a single read statement
+    """
+    # Statement count and type are computed from the tokens with comments removed
+    analysis = analyze_sql(query)
+
+    if analysis.statement_count > 1:
+        raise SQLSecurityError("Multiple SQL statements are not allowed")
+
+    if analysis.statement_type not in READ_ONLY_STATEMENT_KEYWORDS:
+        raise SQLSecurityError(
+            f"Only read-only queries are allowed; statement starts with '{analysis.statement_type}'"
+        )
+
+    return True
+
+
+class ReadOnlyAuthorizer:
+    """
+    sqlite3 authorizer callback that allows only reads of user tables.
+    Denied actions are recorded so failures can be reported as security errors.
+    """
+
+    def __init__(self):
+        self.denied: List[str] = []
+
+    def __call__(self, action, arg1, arg2, db_name, trigger_or_view):
+        if action not in READ_ONLY_AUTHORIZER_ACTIONS:
+            self.denied.append(f"operation not permitted (authorizer action {action})")
+            return sqlite3.SQLITE_DENY
+
+        if action == sqlite3.SQLITE_READ:
+            if db_name not in (None, "main", "temp") or (arg1 or "").lower().startswith("sqlite_"):
+                self.denied.append(f"read access to '{arg1}' is not permitted")
+                return sqlite3.SQLITE_DENY
+
+        if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in DENIED_FUNCTIONS:
+            self.denied.append(f"function '{arg2}' is not permitted")
+            return sqlite3.SQLITE_DENY
+
+        return sqlite3.SQLITE_OK
+
+
+def install_read_only_authorizer(conn: sqlite3.Connection) -> ReadOnlyAuthorizer:
+    """
+    Restrict a connection to read-only access of user tables.
+
+    Args:
+        conn: SQLite connection that will run user queries
+
+    Returns:
+        ReadOnlyAuthorizer: The installed authorizer (inspect .denied after a failure)
+    """
+    authorizer = ReadOnlyAuthorizer()
+    conn.set_authorizer(authorizer)
+    return authorizer
+
+
+def validate_user_query(query: str) -> bool:
+    """
+    Pre-execution checks for user queries: the structural read-only check, plus
+    the regex prefilter (validate_sql_query) when SQL_REGEX_PREFILTER is enabled.
+
+    Raises:
+        SQLSecurityError: If the query fails validation
+    """
+    check_read_only_statement(query)
+    if is_regex_prefilter_enabled():
+        validate_sql_query(query)
+    return True
+
+
 def sanitize_value_for_like(value: str) -> str:
     """
     Sanitize a value for use in a LIKE clause by escaping special characters.
@@ -0,0 +1,156 @@
+"""
+Table creation times and a cheap version stamp for the user database.
+
+Uploads record when each table was created. Replacing a table starts a new
+creation time, and appending keeps the old one. The times live in a small
+catalog database kept apart from user data. A table that predates the catalog
+gets the time it is first seen.
+
+get_database_version() fingerprints db/database.db without opening it through
+SQLite. It reads the file change counter from the database header, plus the
+size and mtime of the database, WAL and rollback journal files. Any
+committed write changes the fingerprint, whether it came from this process or
+another. /api/schema and /api/insights derive their ETags from it, so a
+conditional request for unchanged data gets a 304 before any query runs.
+
+Configuration (environment variables):
+- TABLE_CATALOG_DB    Catalog database path (default db/table_catalog.db)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+DATABASE_PATH = "db/database.db"
+
+# SQLite header: 4-byte big-endian file change counter at offset 24
+CHANGE_COUNTER_OFFSET = 24
+
+
+def get_database_version(db_path: str = DATABASE_PATH) -> str:
+    """
+    Fingerprint of the database files; changes whenever a write is committed
+    """
+    parts = []
+    for path in (db_path, db_path + "-wal", db_path + "-journal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append("-")
+            continue
+        parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    try:
+        with open(db_path, "rb") as f:
+            f.seek(CHANGE_COUNTER_OFFSET)
+            parts.append(f.read(4).hex())
+    except OSError:
+        parts.append("-")
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+class TableCatalog:
+    """Persistent table creation times, kept apart from the user database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_catalog (
+                table_name TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL
+            )
+        """)
+        return conn
+
+    def record_created(self, table_name: str, replace: bool = True) -> None:
+        """
+        Record a table's creation time; with replace=False an existing time is kept
+        """
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute(
+                    f"{verb} INTO table_catalog (table_name, created_at) VALUES (?, ?)",
+                    (table_name, datetime.now().isoformat())
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def created_at(self, table_names: List[str]) -> Dict[str, datetime]:
+        """
+        Creation times of the given tables; tables not yet in the catalog are recorded as created now
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO table_catalog (table_name, created_at) VALUES (?, ?)",
+                    [(name, now) for name in table_names]
+                )
+                conn.commit()
+                rows = conn.execute("SELECT table_name, created_at FROM table_catalog").fetchall()
+            finally:
+                conn.close()
+        wanted = set(table_names)
+        return {name: datetime.fromisoformat(created) for name, created in rows if name in wanted}
+
+    def delete(self, table_name: str) -> None:
+        if not os.path.exists(self.db_path):
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM table_catalog WHERE table_name = ?", (table_name,))
+                conn.commit()
+            finally:
+                conn.close()
+
+
+# Shared catalog used by the upload, schema and delete endpoints
+table_catalog = TableCatalog(os.environ.get("TABLE_CATALOG_DB", "db/table_catalog.db"))
+
+
+def record_table_created(table_name: str, append: bool = False) -> None:
+    """
+    Record an uploaded table's creation time; catalog problems never fail the upload
+    """
+    try:
+        table_catalog.record_created(table_name, replace=not append)
+    except Exception as e:
+        logger.warning(f"[WARNING] Table catalog update failed for {table_name}: {str(e)}")
+
+
+def get_table_created_at(table_names: List[str]) -> Dict[str, datetime]:
+    """
+    Creation times by table name; empty when the catalog cannot be read
+    """
+    try:
+        return table_catalog.created_at(table_names)
+    except Exception as e:
+        logger.warning(f"[WARNING] Table catalog read failed: {str(e)}")
+        return {}
+
+
+def forget_table(table_name: str) -> None:
+    """
+    Drop a deleted table from the catalog; catalog problems never fail the deletion
+    """
+    try:
+        table_catalog.delete(table_name)
+    except Exception as e:
+        logger.warning(f"[WARNING] Table catalog delete failed for {table_name}: {str(e)}")
@@ -1,6 +1,10 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Form, Header, Query, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import List, Optional
 import os
 import sqlite3
 import traceback
@@ -13,18 +17,46 @@ from core.data_models import (
     QueryRequest,
     QueryResponse,
     DatabaseSchemaResponse,
+    DeleteTableResponse,
     InsightsRequest,
     InsightsResponse,
     HealthCheckResponse,
+    LivenessResponse,
+    ReadinessResponse,
+    DatabaseProbe,
+    ProviderHealth,
     TableSchema,
     ColumnInfo,
     GenerateQueryRequest,
-    GenerateQueryResponse
+    GenerateQueryResponse,
+    IndexAdvisorResponse,
+    TableIndexStats,
+    SlowQueryLogResponse,
+    SlowQueryFingerprint,
+    SlowQueryEntry
 )
-from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite, convert_jsonl_to_sqlite
-from core.llm_processor import generate_sql, generate_natural_language_query
-from core.sql_processor import execute_sql_safely, get_database_schema
-from core.insights import generate_insights
+from core.ingest import (
+    convert_csv_to_sqlite,
+    convert_json_to_sqlite,
+    convert_jsonl_to_sqlite,
+    forget_table_stats,
+    generate_insights,
+    invalidate_table_insights,
+)
+from core.llm_processor import generate_natural_language_query
+from core.sql_processor import get_database_schema
+from core.sql_repair import generate_and_execute_sql
+from core.query_stream import stream_natural_language_query
+from core.query_history import find_prompt_examples
+from core.index_advisor import index_advisor
+from core.slow_query_log import slow_query_log
+from core.responses import cache_headers, etag_matches, make_etag, model_response, not_modified
+from core.table_catalog import forget_table, get_database_version, get_table_created_at, record_table_created
+from core.coordination import get_worker_count, prepare_database_for_workers, writer_lock
+from core.compression import CompressionMiddleware, get_compression_settings
+from core.health import health_monitor
+from core.lazy_imports import start_preload
+from core.metrics import MetricsMiddleware, is_metrics_enabled, render_metrics, time_phase
 from core.sql_security import (
     execute_query_safely,
     validate_identifier,
@@ -47,10 +79,19 @@ logging.basicConfig(
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pandas and the provider SDKs are deferred at import; warm them up once the worker is serving
+    start_preload()
+    health_monitor.start()
+    yield
+    health_monitor.stop()
+
 app = FastAPI(
     title="Natural Language SQL Interface",
     description="Convert natural language to SQL queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for frontend
@@ -62,15 +103,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated gzip/brotli/zstd compression for large JSON and streamed results
+compression_settings = get_compression_settings()
+if compression_settings['enabled']:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_settings['minimum_size'],
+        encodings=compression_settings['encodings'],
+    )
+
+# Request timing by route, outermost so it includes compression
+if is_metrics_enabled():
+    app.add_middleware(MetricsMiddleware)
+
 # Global app state
 app_start_time = datetime.now()
 
 # Ensure database directory exists
 os.makedirs("db", exist_ok=True)
 
+def ingest_file(content: bytes, filename: str, table_name: str, append: bool) -> dict:
+    """Convert an uploaded file into a table while holding the database writer lock"""
+    with writer_lock():
+        # Convert to SQLite based on file type
+        if filename.endswith('.csv'):
+            result = convert_csv_to_sqlite(content, table_name, append)
+        elif filename.endswith('.jsonl'):
+            result = convert_jsonl_to_sqlite(content, table_name, append)
+        else:
+            result = convert_json_to_sqlite(content, table_name, append)
+        record_table_created(result['table_name'], append)
+    return result
+
 @app.post("/api/upload", response_model=FileUploadResponse)
-async def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
-    """Upload and convert .json, .jsonl or .csv file to SQLite table"""
+async def upload_file(file: UploadFile = File(...), append: bool = Form(False)) -> Response:
+    """Upload and convert .json, .jsonl or .csv file to SQLite table, optionally appending to it"""
     try:
         # Validate file type
         if not file.filename.endswith(('.csv', '.json', '.jsonl')):
@@ -82,77 +149,112 @@ async def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
         # Read file content
         content = await file.read()
         
-        # Convert to SQLite based on file type
-        if file.filename.endswith('.csv'):
-            result = convert_csv_to_sqlite(content, table_name)
-        elif file.filename.endswith('.jsonl'):
-            result = convert_jsonl_to_sqlite(content, table_name)
-        else:
-            result = convert_json_to_sqlite(content, table_name)
+        # Convert off the event loop: waiting for another worker's write must not stall this one
+        result = await run_in_threadpool(ingest_file, content, file.filename, table_name, append)
         
         response = FileUploadResponse(
             table_name=result['table_name'],
             table_schema=result['schema'],
             row_count=result['row_count'],
-            sample_data=result['sample_data']
+            sample_data=result['sample_data'],
+            indexes=result['indexes']
         )
         logger.info(f"[SUCCESS] File upload: {response}")
-        return response
+        return model_response(response)
     except Exception as e:
         logger.error(f"[ERROR] File upload failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return FileUploadResponse(
+        return model_response(FileUploadResponse(
             table_name="",
             table_schema={},
             row_count=0,
             sample_data=[],
             error=str(e)
-        )
+        ))
 
 @app.post("/api/query", response_model=QueryResponse)
-async def process_natural_language_query(request: QueryRequest) -> QueryResponse:
+async def process_natural_language_query(request: QueryRequest) -> Response:
     """Process natural language query and return SQL results"""
+    attempts = 0
     try:
+        # SQLite reads and the LLM call block, so they run off the event loop like upload and delete
         # Get database schema
-        schema_info = get_database_schema()
+        with time_phase("schema_fetch"):
+            schema_info = await run_in_threadpool(get_database_schema)
         
-        # Generate SQL using routing logic
-        sql = generate_sql(request, schema_info)
+        # Retrieve similar successful queries as few-shot examples
+        with time_phase("prompt_examples"):
+            examples = await run_in_threadpool(find_prompt_examples, request.query, schema_info)
         
-        # Execute SQL query
-        start_time = datetime.now()
-        result = execute_sql_safely(sql)
-        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        # Generate and execute SQL, repairing failures within the retry budget
+        outcome = await run_in_threadpool(generate_and_execute_sql, request, schema_info, examples)
+        sql = outcome['sql']
+        result = outcome['result']
+        attempts = outcome['attempts']
+        
+        if result.get('error_code'):
+            # Structured failures (e.g. budget_exceeded) keep their code for the client
+            logger.error(f"[ERROR] Query processing failed: SQL={sql}, {result['error']}")
+            return model_response(QueryResponse(
+                sql=sql,
+                results=[],
+                columns=[],
+                row_count=0,
+                execution_time_ms=outcome['execution_time_ms'],
+                attempts=attempts,
+                repair_time_ms=outcome['repair_time_ms'],
+                error=result['error'],
+                error_code=result['error_code']
+            ))
         
         if result['error']:
             raise Exception(result['error'])
         
-        response = QueryResponse(
+        # Built from our own execution results, so skip validating every row
+        response = QueryResponse.model_construct(
             sql=sql,
             results=result['results'],
             columns=result['columns'],
             row_count=len(result['results']),
-            execution_time_ms=execution_time
+            execution_time_ms=outcome['execution_time_ms'],
+            attempts=attempts,
+            repair_time_ms=outcome['repair_time_ms'],
+            truncated=result.get('truncated', False)
         )
-        logger.info(f"[SUCCESS] Query processed: SQL={sql}, rows={len(result['results'])}, time={execution_time}ms")
-        return response
+        logger.info(f"[SUCCESS] Query processed: SQL={sql}, rows={len(result['results'])}, time={outcome['execution_time_ms']}ms, attempts={attempts}, truncated={response.truncated}")
+        return model_response(response)
     except Exception as e:
         logger.error(f"[ERROR] Query processing failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return QueryResponse(
+        return model_response(QueryResponse(
             sql="",
             results=[],
             columns=[],
             row_count=0,
             execution_time_ms=0,
+            attempts=attempts,
             error=str(e)
-        )
+        ))
+
+@app.post("/api/query/stream")
+async def process_natural_language_query_stream(request: QueryRequest) -> StreamingResponse:
+    """Stream SQL tokens and result pages for a natural language query as Server-Sent Events"""
+    return StreamingResponse(
+        stream_natural_language_query(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/schema", response_model=DatabaseSchemaResponse)
-async def get_database_schema_endpoint() -> DatabaseSchemaResponse:
+async def get_database_schema_endpoint(if_none_match: Optional[str] = Header(None)) -> Response:
     """Get current database schema and table information"""
+    # Unchanged database files: answer the poll without touching SQLite
+    etag = make_etag("schema", get_database_version())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     try:
-        schema = get_database_schema()
+        schema = await run_in_threadpool(get_database_schema)
+        created_at = await run_in_threadpool(get_table_created_at, list(schema['tables']))
         tables = []
         
         for table_name, table_info in schema['tables'].items():
@@ -169,7 +271,7 @@ async def get_database_schema_endpoint() -> DatabaseSchemaResponse:
                 name=table_name,
                 columns=columns,
                 row_count=table_info.get('row_count', 0),
-                created_at=datetime.now()  # Simplified for v1
+                created_at=created_at.get(table_name) or app_start_time
             ))
         
         response = DatabaseSchemaResponse(
@@ -177,55 +279,86 @@ async def get_database_schema_endpoint() -> DatabaseSchemaResponse:
             total_tables=len(tables)
         )
         logger.info(f"[SUCCESS] Schema retrieved: {len(tables)} tables")
-        return response
+        return model_response(response, headers=cache_headers(etag))
     except Exception as e:
         logger.error(f"[ERROR] Schema retrieval failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return DatabaseSchemaResponse(
+        return model_response(DatabaseSchemaResponse(
             tables=[],
             total_tables=0,
             error=str(e)
-        )
+        ))
 
 @app.post("/api/insights", response_model=InsightsResponse)
-async def generate_insights_endpoint(request: InsightsRequest) -> InsightsResponse:
+async def generate_insights_endpoint(request: InsightsRequest) -> Response:
     """Generate statistical insights for table columns"""
+    return await build_insights_response(request)
+
+@app.get("/api/insights/{table_name}", response_model=InsightsResponse)
+async def get_insights_endpoint(
+    table_name: str,
+    column_names: Optional[List[str]] = Query(None),
+    approximate: bool = False,
+    distribution: bool = False,
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """Generate statistical insights as a cacheable GET, revalidated with If-None-Match"""
+    etag = make_etag("insights", get_database_version(), table_name, column_names, approximate, distribution)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    request = InsightsRequest(
+        table_name=table_name,
+        column_names=column_names,
+        approximate=approximate,
+        distribution=distribution
+    )
+    return await build_insights_response(request, etag)
+
+async def build_insights_response(request: InsightsRequest, etag: Optional[str] = None) -> Response:
+    """Insights response for a request; successful responses carry the ETag if one is given"""
     try:
-        insights = generate_insights(request.table_name, request.column_names)
+        # Table scans and the read-only pool block, so they run off the event loop
+        insights = await run_in_threadpool(
+            generate_insights,
+            request.table_name,
+            request.column_names,
+            request.approximate,
+            request.distribution
+        )
         response = InsightsResponse(
             table_name=request.table_name,
             insights=insights,
             generated_at=datetime.now()
         )
         logger.info(f"[SUCCESS] Insights generated for table: {request.table_name}, insights count: {len(insights)}")
-        return response
+        return model_response(response, headers=cache_headers(etag) if etag else None)
     except Exception as e:
         logger.error(f"[ERROR] Insights generation failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return InsightsResponse(
+        return model_response(InsightsResponse(
             table_name=request.table_name,
             insights=[],
             generated_at=datetime.now(),
             error=str(e)
-        )
+        ))
 
 @app.post("/api/generate-query", response_model=GenerateQueryResponse)
-async def generate_query_endpoint(request: GenerateQueryRequest) -> GenerateQueryResponse:
+async def generate_query_endpoint(request: GenerateQueryRequest) -> Response:
     """Generate natural language query based on database schema"""
     try:
         # Get database schema
-        schema_info = get_database_schema()
+        schema_info = await run_in_threadpool(get_database_schema)
 
         # Validate that at least one table exists
         if not schema_info.get('tables') or len(schema_info['tables']) == 0:
-            return GenerateQueryResponse(
+            return model_response(GenerateQueryResponse(
                 query="",
                 tables_used=[],
                 error="No tables available. Please upload data first."
-            )
+            ))
 
         # Generate natural language query
-        query = generate_natural_language_query(schema_info)
+        query = await run_in_threadpool(generate_natural_language_query, schema_info)
 
         # Extract table names mentioned in the query (simple approach - check if table name appears in query)
         tables_used = []
@@ -238,57 +371,105 @@ async def generate_query_endpoint(request: GenerateQueryRequest) -> GenerateQuer
             tables_used=tables_used
         )
         logger.info(f"[SUCCESS] Query generated: {query}, tables_used: {tables_used}")
-        return response
+        return model_response(response)
     except Exception as e:
         logger.error(f"[ERROR] Query generation failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return GenerateQueryResponse(
+        return model_response(GenerateQueryResponse(
             query="",
             tables_used=[],
             error=str(e)
-        )
+        ))
 
-@app.get("/api/health", response_model=HealthCheckResponse)
-async def health_check() -> HealthCheckResponse:
-    """Health check endpoint with database status"""
+@app.get("/api/indexes", response_model=IndexAdvisorResponse)
+async def get_index_advice() -> Response:
+    """Get per-table full scans, index recommendations and index usage"""
     try:
-        # Check database connection
-        conn = sqlite3.connect("db/database.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        conn.close()
-        
-        uptime = (datetime.now() - app_start_time).total_seconds()
-        
-        response = HealthCheckResponse(
-            status="ok",
-            database_connected=True,
-            tables_count=len(tables),
-            uptime_seconds=uptime
+        snapshot = index_advisor.snapshot()
+        tables = [
+            TableIndexStats(table_name=table_name, **table_stats)
+            for table_name, table_stats in snapshot.items()
+        ]
+        response = IndexAdvisorResponse(
+            tables=tables,
+            auto_create=index_advisor.auto_create
         )
-        logger.info(f"[SUCCESS] Health check: OK, {len(tables)} tables, uptime: {uptime}s")
-        return response
+        logger.info(f"[SUCCESS] Index advice retrieved: {len(tables)} tables")
+        return model_response(response)
     except Exception as e:
-        logger.error(f"[ERROR] Health check failed: {str(e)}")
+        logger.error(f"[ERROR] Index advice retrieval failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return HealthCheckResponse(
-            status="error",
-            database_connected=False,
-            tables_count=0,
-            uptime_seconds=0
-        )
+        return model_response(IndexAdvisorResponse(
+            tables=[],
+            auto_create=index_advisor.auto_create,
+            error=str(e)
+        ))
 
-@app.delete("/api/table/{table_name}")
-async def delete_table(table_name: str):
-    """Delete a table from the database"""
+@app.get("/api/slow-queries", response_model=SlowQueryLogResponse)
+async def get_slow_queries(limit: int = Query(10, ge=1, le=100)) -> Response:
+    """Get the top slow-query fingerprints by total execution time and the most recent slow queries"""
     try:
-        # Validate table name using security module
-        try:
-            validate_identifier(table_name, "table")
-        except SQLSecurityError as e:
-            raise HTTPException(400, str(e))
-        
+        response = SlowQueryLogResponse(
+            threshold_ms=slow_query_log.threshold_ms,
+            fingerprints=[SlowQueryFingerprint(**entry) for entry in slow_query_log.top_fingerprints(limit)],
+            recent=[SlowQueryEntry(**entry) for entry in slow_query_log.recent(limit)]
+        )
+        logger.info(f"[SUCCESS] Slow queries retrieved: {len(response.fingerprints)} fingerprints")
+        return model_response(response)
+    except Exception as e:
+        logger.error(f"[ERROR] Slow query retrieval failed: {str(e)}")
+        logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+        return model_response(SlowQueryLogResponse(
+            threshold_ms=slow_query_log.threshold_ms,
+            fingerprints=[],
+            recent=[],
+            error=str(e)
+        ))
+
+@app.get("/api/health", response_model=HealthCheckResponse)
+async def health_check() -> Response:
+    """Health check endpoint with database status from the cached background probe"""
+    probe = health_monitor.last_probe()
+    uptime = (datetime.now() - app_start_time).total_seconds()
+    return model_response(HealthCheckResponse(
+        status="ok" if probe['connected'] else "error",
+        database_connected=probe['connected'],
+        tables_count=probe['tables_count'],
+        uptime_seconds=uptime if probe['connected'] else 0
+    ))
+
+@app.get("/api/health/live", response_model=LivenessResponse)
+async def liveness() -> Response:
+    """Liveness probe: the worker is up and serving requests"""
+    return model_response(LivenessResponse(
+        status="ok",
+        uptime_seconds=(datetime.now() - app_start_time).total_seconds()
+    ))
+
+@app.get("/api/health/ready", response_model=ReadinessResponse)
+async def readiness() -> Response:
+    """Readiness probe: 503 while the database probe fails or is stale, or background queues are backed up"""
+    state = health_monitor.readiness()
+    response = ReadinessResponse(
+        status="ready" if state['ready'] else "not_ready",
+        reasons=state['reasons'],
+        database=DatabaseProbe(**state['database']),
+        queue_depths=state['queue_depths'],
+        pool_connections=state['pool_connections'],
+        providers=[ProviderHealth(**provider) for provider in state['providers']]
+    )
+    return model_response(response, status_code=200 if state['ready'] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Request, phase, LLM, cache and connection pool metrics in the Prometheus text format"""
+    if not is_metrics_enabled():
+        raise HTTPException(404, "Metrics are disabled")
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def drop_table(table_name: str) -> None:
+    """Drop a user table and everything derived from it while holding the database writer lock"""
+    with writer_lock():
         conn = sqlite3.connect("db/database.db")
         
         # Check if table exists using secure method
@@ -305,10 +486,25 @@ async def delete_table(table_name: str):
         )
         conn.commit()
         conn.close()
+        forget_table_stats(table_name)
+        forget_table(table_name)
+        invalidate_table_insights(table_name)
+
+@app.delete("/api/table/{table_name}", response_model=DeleteTableResponse)
+async def delete_table(table_name: str):
+    """Delete a table from the database"""
+    try:
+        # Validate table name using security module
+        try:
+            validate_identifier(table_name, "table")
+        except SQLSecurityError as e:
+            raise HTTPException(400, str(e))
+        
+        await run_in_threadpool(drop_table, table_name)
         
-        response = {"message": f"Table '{table_name}' deleted successfully"}
+        response = DeleteTableResponse(message=f"Table '{table_name}' deleted successfully")
         logger.info(f"[SUCCESS] Table deleted: {table_name}")
-        return response
+        return model_response(response)
     except HTTPException:
         raise
     except Exception as e:
@@ -318,4 +514,10 @@ async def delete_table(table_name: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    workers = get_worker_count()
+    if workers > 1:
+        # Production mode: no reload, and WAL set once before the workers start
+        prepare_database_for_workers()
+        uvicorn.run("server:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
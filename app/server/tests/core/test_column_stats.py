@@ -0,0 +1,183 @@
+import sqlite3
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from core.column_stats import ColumnStatsStore, compute_column_stats, merge_column_stats
+from core.file_processor import convert_csv_to_sqlite
+from core.insights import generate_insights, insights_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_insights_cache():
+    insights_cache.clear()
+    yield
+    insights_cache.clear()
+
+
+@pytest.fixture
+def stats_db(tmp_path):
+    """
+    File-backed user database plus a private stats store. Only the user database
+    path is redirected, so the stats store keeps its own file.
+    """
+    db_path = str(tmp_path / "test.db")
+    store = ColumnStatsStore(str(tmp_path / "stats.db"))
+    statements = []
+    real_connect = sqlite3.connect
+
+    def connect(path, *args, **kwargs):
+        if path != "db/database.db":
+            return real_connect(path, *args, **kwargs)
+        conn = real_connect(db_path, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    # core.*.sqlite3 is the shared module, so this covers converters and insights alike
+    with patch('core.file_processor.sqlite3.connect', side_effect=connect), \
+            patch('core.column_stats.column_stats', store):
+        yield {'store': store, 'statements': statements, 'path': db_path}
+
+
+def build_orders_csv(start, rows):
+    lines = ["order_id,status,amount,note"]
+    for i in range(start, start + rows):
+        status = ['open', 'open', 'shipped', 'closed'][i % 4] if i % 10 else ''
+        amount = f"{i * 1.5}" if i % 5 else ''
+        lines.append(f"{i},{status},{amount},note {i}")
+    return "\n".join(lines).encode()
+
+
+class TestColumnStats:
+
+    def test_compute_column_stats(self):
+        df = pd.DataFrame({
+            'amount': [1.0, 2.0, None, 2.0],
+            'status': ['a', 'b', 'a', None],
+            'flag': [True, False, True, True],
+        })
+
+        stats = compute_column_stats(df)
+
+        assert stats['amount']['null_count'] == 1
+        assert stats['amount']['unique_values'] == 2
+        assert (stats['amount']['min_value'], stats['amount']['max_value']) == (1.0, 2.0)
+        assert stats['amount']['value_sum'] == 5.0
+        assert stats['status']['most_common'][0] == {'value': 'a', 'count': 2}
+        assert stats['status']['min_value'] is None
+        assert stats['flag']['most_common'][0] == {'value': 1, 'count': 3}
+        assert all(column['exact'] for column in stats.values())
+
+    def test_merge_column_stats(self):
+        existing = compute_column_stats(pd.DataFrame({'x': [1, 2, 2, None]}))['x']
+        added = compute_column_stats(pd.DataFrame({'x': [2, 3, 7]}))['x']
+
+        merged = merge_column_stats(existing, added)
+
+        assert merged['row_count'] == 7
+        assert merged['null_count'] == 1
+        assert (merged['min_value'], merged['max_value'], merged['value_sum']) == (1, 7, 17.0)
+        assert merged['unique_values'] == 4
+        assert merged['most_common'][0] == {'value': 2, 'count': 3}
+        assert not merged['exact']
+
+    def test_merge_rejects_kind_change(self):
+        existing = compute_column_stats(pd.DataFrame({'x': [1, 2]}))['x']
+        added = compute_column_stats(pd.DataFrame({'x': ['a', 'b']}))['x']
+
+        assert merge_column_stats(existing, added) is None
+
+    def test_store_round_trip(self, tmp_path):
+        store = ColumnStatsStore(str(tmp_path / "stats.db"))
+        stats = compute_column_stats(pd.DataFrame({'x': [1, 2, 2], 'y': ['a', None, 'a']}))
+
+        store.save("t", 3, stats)
+        loaded = store.load("t")
+
+        assert loaded['max_rowid'] == 3
+        assert list(loaded['columns']) == ['x', 'y']
+        assert loaded['columns']['y']['most_common'] == [{'value': 'a', 'count': 2}]
+        assert loaded['columns']['x']['distinct'].estimate() == 2
+        assert loaded['columns']['x']['frequent'].top()[0] == {'value': 2, 'count': 2}
+
+        store.delete("t")
+        assert store.load("t") is None
+
+
+class TestStatsBackedInsights:
+
+    def test_insights_match_a_scan(self, stats_db, monkeypatch):
+        convert_csv_to_sqlite(build_orders_csv(1, 40), "orders")
+
+        from_stats = generate_insights("orders")
+        monkeypatch.setenv("COLUMN_STATS_ENABLED", "false")
+        from_scan = generate_insights("orders")
+
+        assert [i.model_dump() for i in from_stats] == [i.model_dump() for i in from_scan]
+        assert not any(i.approximate for i in from_stats)
+
+    def test_insights_do_not_scan_the_table(self, stats_db):
+        convert_csv_to_sqlite(build_orders_csv(1, 40), "orders")
+        stats_db['statements'].clear()
+
+        generate_insights("orders")
+
+        assert [s for s in stats_db['statements'] if "FROM [orders]" in s] == ["SELECT MAX(rowid) FROM [orders]"]
+
+    def test_distribution_mode_scans_only_numeric_columns(self, stats_db):
+        convert_csv_to_sqlite(build_orders_csv(1, 40), "orders")
+        stats_db['statements'].clear()
+
+        insights = {i.column_name: i for i in generate_insights("orders", distribution=True)}
+
+        assert insights['amount'].quantiles['p50'] == 30.0
+        assert sum(b['count'] for b in insights['amount'].histogram) == 32
+        scans = [s for s in stats_db['statements'] if "FROM [orders]" in s and "rowid" not in s]
+        assert len(scans) == 2 and all("CAST" in s for s in scans)
+
+    def test_append_merges_stats(self, stats_db):
+        convert_csv_to_sqlite(build_orders_csv(1, 40), "orders")
+        result = convert_csv_to_sqlite(build_orders_csv(41, 40), "orders", append=True)
+
+        assert result['row_count'] == 80
+        stored = stats_db['store'].load("orders")
+        assert stored['max_rowid'] == 80
+        assert stored['columns']['order_id']['row_count'] == 80
+        assert stored['columns']['status']['null_count'] == 8
+        assert stored['columns']['amount']['max_value'] == 79 * 1.5
+        assert not stored['columns']['status']['exact']
+
+        approximate = {i.column_name: i for i in generate_insights("orders", approximate=True)}
+        exact = {i.column_name: i for i in generate_insights("orders")}
+
+        assert approximate['order_id'].approximate
+        assert approximate['order_id'].unique_values == pytest.approx(80, abs=2)
+        assert approximate['status'].null_count == 8
+        # Exact requests rescan once the stats hold estimates
+        assert not exact['order_id'].approximate
+        assert exact['order_id'].unique_values == 80
+        assert exact['status'].most_common[0] == approximate['status'].most_common[0]
+
+    def test_stale_stats_are_ignored(self, stats_db):
+        convert_csv_to_sqlite(build_orders_csv(1, 40), "orders")
+        conn = sqlite3.connect(stats_db['path'])
+        conn.execute("INSERT INTO orders (order_id) VALUES (999)")
+        conn.commit()
+        conn.close()
+
+        insights = {i.column_name: i for i in generate_insights("orders", ["order_id"])}
+
+        assert insights['order_id'].unique_values == 41
+
+    def test_append_to_table_without_stats_stores_none(self, stats_db):
+        conn = sqlite3.connect(stats_db['path'])
+        conn.execute("CREATE TABLE orders (order_id INTEGER, status TEXT, amount REAL, note TEXT)")
+        conn.execute("INSERT INTO orders VALUES (0, 'open', 1.0, 'old')")
+        conn.commit()
+        conn.close()
+
+        convert_csv_to_sqlite(build_orders_csv(1, 10), "orders", append=True)
+
+        # Stats for only the appended rows would be wrong, so none are stored
+        assert stats_db['store'].load("orders") is None
@@ -0,0 +1,148 @@
+import gzip
+import json
+import zlib
+
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from core.compression import (
+    CompressionMiddleware,
+    compress_body,
+    get_compression_level,
+    get_compression_settings,
+    negotiate_encoding,
+)
+
+LARGE_BODY = json.dumps([{"id": i, "name": f"row {i}", "status": "Delivered"} for i in range(500)]).encode()
+
+
+def decompress(encoding, data):
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return gzip.decompress(data)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=["zstd", "br", "gzip"])
+
+    @app.get("/large")
+    async def large():
+        return Response(LARGE_BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/binary")
+    async def binary():
+        return Response(bytes(4096), media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for i in range(5):
+                yield f"event: row\ndata: {json.dumps({'index': i, 'padding': 'x' * 400})}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def get_raw(client, path, accept_encoding):
+    # iter_raw skips the client's own decoding, so the bytes are what went on the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestNegotiation:
+
+    def test_server_preference_breaks_ties(self):
+        assert negotiate_encoding("gzip, deflate, br, zstd", ["zstd", "br", "gzip"]) == "zstd"
+        assert negotiate_encoding("gzip, br", ["zstd", "br", "gzip"]) == "br"
+
+    def test_client_q_values_win(self):
+        assert negotiate_encoding("zstd;q=0.5, gzip;q=0.9", ["zstd", "br", "gzip"]) == "gzip"
+
+    def test_refused_and_unknown_encodings(self):
+        assert negotiate_encoding("gzip;q=0", ["zstd", "br", "gzip"]) is None
+        assert negotiate_encoding("identity", ["zstd", "br", "gzip"]) is None
+        assert negotiate_encoding("", ["gzip"]) is None
+        assert negotiate_encoding("*", ["br", "gzip"]) == "br"
+
+    def test_levels_drop_as_payloads_grow(self):
+        for encoding in ("gzip", "br", "zstd"):
+            small = get_compression_level(encoding, 10 * 1024)
+            large = get_compression_level(encoding, 50 * 1024 * 1024)
+            assert small > large
+
+    def test_settings_from_environment(self, monkeypatch):
+        monkeypatch.setenv("RESPONSE_COMPRESSION_MIN_SIZE", "2048")
+        monkeypatch.setenv("RESPONSE_COMPRESSION_ENCODINGS", "gzip, bogus, br")
+
+        settings = get_compression_settings()
+
+        assert settings['minimum_size'] == 2048
+        assert settings['encodings'] == ["gzip", "br"]
+
+
+class TestCompressionMiddleware:
+
+    @pytest.mark.parametrize("encoding", ["zstd", "br", "gzip"])
+    def test_round_trip(self, client, encoding):
+        response, raw = get_raw(client, "/large", encoding)
+
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(raw) < len(LARGE_BODY) / 4
+        assert decompress(encoding, raw) == LARGE_BODY
+
+    def test_small_body_passes_through(self, client):
+        response, raw = get_raw(client, "/small", "gzip")
+
+        assert "content-encoding" not in response.headers
+        assert raw == b'{"ok": true}'
+
+    def test_non_text_content_passes_through(self, client):
+        response, raw = get_raw(client, "/binary", "gzip")
+
+        assert "content-encoding" not in response.headers
+        assert len(raw) == 4096
+
+    def test_no_accept_encoding(self, client):
+        response, raw = get_raw(client, "/large", "identity")
+
+        assert "content-encoding" not in response.headers
+        assert raw == LARGE_BODY
+
+    @pytest.mark.parametrize("encoding", ["zstd", "br", "gzip"])
+    def test_streaming_flushes_every_chunk(self, client, encoding):
+        decoders = {
+            "zstd": zstandard.ZstdDecompressor().decompressobj(),
+            "br": brotli.Decompressor(),
+            "gzip": zlib.decompressobj(31),
+        }
+        decoder = decoders[encoding]
+
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": encoding}) as response:
+            assert response.headers["content-encoding"] == encoding
+            assert "content-length" not in response.headers
+            chunks = [chunk for chunk in response.iter_raw() if chunk]
+            # Each compressed chunk decodes to whole events on its own
+            events = [
+                (decoder.process(chunk) if encoding == "br" else decoder.decompress(chunk)).decode()
+                for chunk in chunks
+            ]
+
+        assert all(event.endswith("\n\n") for event in events if event)
+        assert "".join(events).count("event: row") == 5
+
+    def test_compress_body_matches_encoding(self):
+        for encoding in ("zstd", "br", "gzip"):
+            assert decompress(encoding, compress_body(encoding, LARGE_BODY)) == LARGE_BODY
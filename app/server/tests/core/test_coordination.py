@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+
+from core.coordination import CacheVersions, WriterLock, prepare_database_for_workers, writer_lock
+from core.data_models import ColumnInsight
+from core.insights import InsightsCache
+
+
+class TestCacheVersions:
+
+    def test_bumps_are_seen_by_other_workers(self, tmp_path):
+        path = str(tmp_path / "coordination.db")
+        worker_a, worker_b = CacheVersions(path), CacheVersions(path)
+
+        assert worker_b.get("table:orders") == 0
+        assert worker_a.bump("table:orders") == 1
+        assert worker_a.bump("table:orders") == 2
+
+        assert worker_b.get("table:orders") == 2
+        assert worker_b.get("table:users") == 0
+
+    def test_insights_cache_invalidated_by_another_worker(self, tmp_path):
+        path = str(tmp_path / "coordination.db")
+        cache_a = InsightsCache(8, versions=CacheVersions(path))
+        cache_b = InsightsCache(8, versions=CacheVersions(path))
+        key = ("orders", (), False, False)
+        insights = [ColumnInsight(column_name="id", data_type="INTEGER", unique_values=3, null_count=0)]
+
+        cache_b.put(key, (cache_b.table_version("orders"), 3), insights)
+        assert cache_b.get(key, (cache_b.table_version("orders"), 3)) is not None
+
+        # Same row count after a re-upload on the other worker: only the shared version tells them apart
+        cache_a.invalidate("orders")
+
+        assert cache_b.get(key, (cache_b.table_version("orders"), 3)) is None
+
+
+class TestWriterLock:
+
+    def test_excludes_a_second_lock_on_the_same_file(self, tmp_path):
+        path = str(tmp_path / "ingest.lock")
+        first, second = WriterLock(path), WriterLock(path)
+        acquired = threading.Event()
+
+        def write():
+            with second.hold():
+                acquired.set()
+
+        with first.hold():
+            thread = threading.Thread(target=write)
+            thread.start()
+            assert not acquired.wait(0.2)
+
+        assert acquired.wait(5)
+        thread.join()
+
+    def test_single_worker_lock_is_process_local(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "1")
+        monkeypatch.setattr("core.coordination.writer", WriterLock(str(tmp_path / "locks" / "ingest.lock")))
+
+        with writer_lock():
+            pass
+
+        assert not (tmp_path / "locks").exists()
+
+
+def test_prepare_database_for_workers_enables_wal(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "database.db")
+    monkeypatch.setattr("core.coordination.writer", WriterLock(str(tmp_path / "ingest.lock")))
+
+    prepare_database_for_workers(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
@@ -3,6 +3,7 @@ import sqlite3
 from pathlib import Path
 from unittest.mock import patch
 from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite, convert_jsonl_to_sqlite, flatten_json_object, discover_jsonl_fields
+from core.metrics import phase_duration
 
 
 @pytest.fixture
@@ -19,6 +20,12 @@ def test_db():
     conn.close()
 
 
+@pytest.fixture(autouse=True)
+def no_column_stats(monkeypatch):
+    """Keep converter tests away from the shared column stats store (see test_column_stats.py)"""
+    monkeypatch.setenv("COLUMN_STATS_ENABLED", "false")
+
+
 @pytest.fixture
 def test_assets_dir():
     """Get the path to test assets directory"""
@@ -402,4 +409,87 @@ class TestFileProcessor:
         assert jane_data is not None
         assert jane_data['age'] is None
         assert jane_data['city'] == 'NYC'
-        assert jane_data['profile__bio'] == 'Engineer'
\ No newline at end of file
+        assert jane_data['profile__bio'] == 'Engineer'
+    
+    def test_convert_jsonl_to_sqlite_keeps_first_seen_column_order(self, test_db):
+        """Columns follow the order fields first appear in, not set iteration order"""
+        jsonl_data = b'{"b": 1, "a": {"z": 2}}\n{"c": 3, "b": 4}'
+        
+        result = convert_jsonl_to_sqlite(jsonl_data, "test_table")
+        
+        assert list(result['schema']) == ['b', 'a__z', 'c']
+    
+    def test_convert_jsonl_to_sqlite_records_ingest_phases(self, test_db):
+        """Each converter phase is timed in the phase histogram"""
+        phases = ("ingest_decode", "ingest_flatten", "ingest_dataframe", "ingest_write", "ingest_metadata")
+        before = {phase: phase_duration.count(phase) for phase in phases}
+        
+        convert_jsonl_to_sqlite(b'{"id": 1, "user": {"name": "Ann"}}', "test_table")
+        
+        assert all(phase_duration.count(phase) == before[phase] + 1 for phase in phases)
+
+@pytest.fixture
+def file_db(tmp_path):
+    """File-backed test database that stays inspectable after the converter closes its connection"""
+    db_path = str(tmp_path / "test.db")
+    real_connect = sqlite3.connect
+    with patch('core.file_processor.sqlite3.connect', side_effect=lambda *args, **kwargs: real_connect(db_path)):
+        conn = real_connect(db_path)
+        yield conn
+        conn.close()
+
+
+class TestIngestIndexes:
+
+    def build_orders_csv(self, rows):
+        lines = ["order_id,customer_id,status,order_date,amount,note"]
+        for i in range(rows):
+            lines.append(f"{i},{i % 50},{['open', 'shipped', 'closed'][i % 3]},2024-01-{i % 28 + 1:02d},{i * 1.5},note {i}")
+        return "\n".join(lines).encode()
+
+    def list_indexes(self, conn, table_name):
+        return {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+            )
+        }
+
+    def test_indexes_key_date_and_category_columns(self, file_db, monkeypatch):
+        monkeypatch.setenv("INGEST_INDEX_MIN_ROWS", "100")
+        result = convert_csv_to_sqlite(self.build_orders_csv(300), "orders")
+
+        expected = {
+            "ingest_ix_orders_order_id",
+            "ingest_ix_orders_customer_id",
+            "ingest_ix_orders_order_date",
+            "ingest_ix_orders_status",
+        }
+        assert set(result['indexes']) == expected
+        assert self.list_indexes(file_db, "orders") == expected
+        # Unique free text and measures are not indexed
+        assert not any("note" in name or "amount" in name for name in result['indexes'])
+
+        plan = file_db.execute("EXPLAIN QUERY PLAN SELECT * FROM orders WHERE customer_id = 7").fetchall()
+        assert "ingest_ix_orders_customer_id" in plan[0][3]
+
+    def test_small_tables_are_not_indexed(self, file_db, test_assets_dir):
+        with open(test_assets_dir / "test_users.csv", 'rb') as f:
+            result = convert_csv_to_sqlite(f.read(), "users")
+
+        assert result['indexes'] == []
+        assert self.list_indexes(file_db, "users") == set()
+
+    def test_auto_index_can_be_disabled(self, file_db, monkeypatch):
+        monkeypatch.setenv("INGEST_INDEX_MIN_ROWS", "100")
+        monkeypatch.setenv("INGEST_AUTO_INDEX", "false")
+        result = convert_csv_to_sqlite(self.build_orders_csv(300), "orders")
+
+        assert result['indexes'] == []
+
+    def test_max_indexes_per_table(self, file_db, monkeypatch):
+        monkeypatch.setenv("INGEST_INDEX_MIN_ROWS", "100")
+        monkeypatch.setenv("INGEST_INDEX_MAX_PER_TABLE", "2")
+        result = convert_csv_to_sqlite(self.build_orders_csv(300), "orders")
+
+        # Keys win the available slots
+        assert set(result['indexes']) == {"ingest_ix_orders_order_id", "ingest_ix_orders_customer_id"}
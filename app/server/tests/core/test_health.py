@@ -0,0 +1,102 @@
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.health import HealthMonitor
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY)")
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def monitor(db_path):
+    return HealthMonitor(db_path, interval_seconds=0.01)
+
+
+class TestHealthMonitor:
+
+    def test_probe_is_cached(self, monitor, db_path):
+        assert monitor.probe()['tables_count'] == 1
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        conn.close()
+
+        with patch('core.health.sqlite3.connect') as connect:
+            assert monitor.last_probe()['tables_count'] == 1
+        connect.assert_not_called()
+        assert monitor.probe()['tables_count'] == 2
+
+    def test_background_refresh(self, monitor):
+        monitor.start()
+        try:
+            deadline = time.monotonic() + 5
+            while monitor._probe is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            first = monitor.last_probe()['checked_at']
+            while monitor.last_probe()['checked_at'] == first and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+
+        assert monitor.last_probe()['checked_at'] > first
+
+    def test_ready(self, monitor):
+        state = monitor.readiness()
+
+        assert state['ready']
+        assert state['reasons'] == []
+        assert state['database']['connected']
+        assert set(state['queue_depths']) == {'index_advisor', 'slow_query_log', 'requests_in_flight'}
+
+    def test_not_ready_when_database_unavailable(self, tmp_path):
+        state = HealthMonitor(str(tmp_path / "missing" / "database.db")).readiness()
+
+        assert not state['ready']
+        assert state['reasons'][0].startswith("database unavailable")
+
+    def test_not_ready_when_probe_is_stale(self, db_path):
+        state = HealthMonitor(db_path, max_probe_age_seconds=-1).readiness()
+
+        assert not state['ready']
+        assert "old" in state['reasons'][0]
+
+    def test_not_ready_when_queue_backs_up(self, db_path):
+        with patch('core.health.index_advisor.queue_depth', return_value=5):
+            state = HealthMonitor(db_path, max_queue_depth=1).readiness()
+
+        assert state['reasons'] == ["index_advisor queue depth 5 exceeds 1"]
+
+
+class TestHealthEndpoints:
+
+    def test_endpoints(self, monitor, tmp_path):
+        import server
+
+        client = TestClient(server.app)
+        with patch.object(server, 'health_monitor', monitor):
+            health = client.get("/api/health").json()
+            live = client.get("/api/health/live")
+            ready = client.get("/api/health/ready")
+
+        assert (health['status'], health['tables_count']) == ("ok", 1)
+        assert live.status_code == 200
+        assert ready.status_code == 200
+        assert ready.json()['status'] == "ready"
+
+        with patch.object(server, 'health_monitor', HealthMonitor(str(tmp_path / "missing" / "database.db"))):
+            health = client.get("/api/health").json()
+            ready = client.get("/api/health/ready")
+
+        assert health['status'] == "error"
+        assert ready.status_code == 503
+        assert ready.json()['status'] == "not_ready"
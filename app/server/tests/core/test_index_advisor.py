@@ -0,0 +1,197 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from core.index_advisor import (
+    IndexAdvisor,
+    AUTO_INDEX_PREFIX,
+    build_index_name,
+    extract_predicate_columns,
+    parse_query_plan,
+    parse_table_aliases,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """File-backed database with an indexed and an unindexed join column"""
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, city TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, status TEXT, total REAL)")
+    conn.executemany(
+        "INSERT INTO users (name, city) VALUES (?, ?)",
+        [(f"user{i}", f"city{i % 7}") for i in range(200)]
+    )
+    conn.executemany(
+        "INSERT INTO orders (user_id, status, total) VALUES (?, ?, ?)",
+        [(i % 200, "open" if i % 3 else "closed", i * 1.5) for i in range(500)]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def list_indexes(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+
+
+class TestQueryParsing:
+
+    def test_parse_table_aliases(self):
+        aliases = parse_table_aliases(
+            "SELECT * FROM users u JOIN orders AS o ON o.user_id = u.id, products WHERE 1 = 1"
+        )
+
+        assert aliases == {'users': 'users', 'u': 'users', 'orders': 'orders', 'o': 'orders', 'products': 'products'}
+
+    def test_parse_table_aliases_ignores_keywords(self):
+        assert parse_table_aliases("SELECT * FROM users WHERE id = 1") == {'users': 'users'}
+
+    def test_extract_predicate_columns(self):
+        columns = extract_predicate_columns(
+            "SELECT u.name, COUNT(*) FROM users u JOIN orders o ON o.user_id = u.id "
+            "WHERE status IN ('open') AND o.total > 10 AND LOWER(u.city) = 'x' GROUP BY u.name"
+        )
+
+        assert ('o', 'user_id') in columns
+        assert ('u', 'id') in columns
+        assert (None, 'status') in columns
+        assert ('o', 'total') in columns
+        assert ('u', 'name') not in columns
+        assert ('u', 'city') not in columns  # wrapped in a function, not indexable
+
+    def test_parse_query_plan(self):
+        accesses = parse_query_plan([
+            (3, 0, 0, 'SCAN o'),
+            (5, 0, 0, 'SEARCH u USING INTEGER PRIMARY KEY (rowid=?)'),
+            (7, 0, 0, 'SEARCH orders USING INDEX ix_orders_user_id (user_id=?)'),
+            (9, 0, 0, 'SCAN users USING COVERING INDEX ix_users_city'),
+        ])
+
+        assert accesses[0] == {'kind': 'SCAN', 'target': 'o', 'index': None}
+        assert accesses[1]['index'] is None
+        assert accesses[2]['index'] == 'ix_orders_user_id'
+        assert accesses[3] == {'kind': 'SCAN', 'target': 'users', 'index': 'ix_users_city'}
+
+    def test_build_index_name(self):
+        assert build_index_name(AUTO_INDEX_PREFIX, "Orders", "user id") == "auto_ix_orders_user_id"
+
+
+class TestIndexAdvisor:
+
+    def test_recommends_index_for_full_scan(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100)
+
+        recommended = advisor.analyze(
+            "SELECT u.name, o.total FROM orders o JOIN users u ON o.user_id = u.id WHERE o.status = 'open'"
+        )
+
+        assert {'table': 'orders', 'column': 'user_id'} in recommended
+        assert {'table': 'orders', 'column': 'status'} in recommended
+        # users is searched by its primary key, so it is not flagged
+        assert all(r['table'] != 'users' for r in recommended)
+
+        stats = advisor.snapshot()
+        assert stats['orders']['full_scans'] == 1
+        assert {r['column'] for r in stats['orders']['recommendations']} == {'user_id', 'status'}
+        assert stats['orders']['recommendations'][0]['sql'].startswith("CREATE INDEX auto_ix_orders_")
+
+    def test_small_tables_are_not_flagged(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=10000)
+
+        assert advisor.analyze("SELECT * FROM orders WHERE status = 'open'") == []
+        assert advisor.snapshot()['orders']['full_scans'] == 0
+
+    def test_recommendations_only_without_auto_create(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100, min_scans=1)
+
+        advisor.analyze("SELECT * FROM orders WHERE status = 'open'")
+
+        assert not any(name.startswith(AUTO_INDEX_PREFIX) for name in list_indexes(db_path))
+
+    def test_auto_create_after_min_scans(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100, auto_create=True, min_scans=2)
+        query = "SELECT * FROM orders WHERE status = 'open'"
+
+        advisor.analyze(query)
+        assert "auto_ix_orders_status" not in list_indexes(db_path)
+
+        advisor.analyze(query)
+        assert "auto_ix_orders_status" in list_indexes(db_path)
+
+        # The next plan searches through the new index and counts as a hit
+        assert advisor.analyze(query) == []
+        index = next(i for i in advisor.snapshot()['orders']['indexes'] if i['name'] == "auto_ix_orders_status")
+        assert index['auto_created'] is True
+        assert index['hits'] == 1
+        assert index['columns'] == ['status']
+        assert index['created_at'] is not None
+
+    def test_auto_create_respects_per_table_cap(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100, auto_create=True, min_scans=1, max_per_table=1)
+
+        advisor.analyze("SELECT * FROM orders WHERE status = 'open' AND total > 5")
+
+        auto_indexes = [name for name in list_indexes(db_path) if name.startswith(AUTO_INDEX_PREFIX)]
+        assert len(auto_indexes) == 1
+
+    def test_per_table_cap_ignores_tables_sharing_a_prefix(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE orders_archive (id INTEGER PRIMARY KEY, status TEXT)")
+        conn.executemany("INSERT INTO orders_archive (status) VALUES (?)", [("closed",)] * 200)
+        conn.commit()
+        conn.close()
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100, auto_create=True, min_scans=1, max_per_table=1)
+
+        advisor.analyze("SELECT * FROM orders_archive WHERE status = 'open'")
+        advisor.analyze("SELECT * FROM orders WHERE status = 'open'")
+
+        assert {"auto_ix_orders_archive_status", "auto_ix_orders_status"} <= list_indexes(db_path)
+
+    def test_per_table_cap_counts_indexes_from_other_workers(self, db_path):
+        other_worker = IndexAdvisor(db_path=db_path, min_rows=100, auto_create=True, min_scans=1, max_per_table=1)
+        other_worker.analyze("SELECT * FROM orders WHERE status = 'open'")
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100, auto_create=True, min_scans=1, max_per_table=1)
+
+        advisor.analyze("SELECT * FROM orders WHERE total > 5")
+
+        assert "auto_ix_orders_total" not in list_indexes(db_path)
+
+    def test_existing_index_not_recommended(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE INDEX ix_orders_status ON orders (status)")
+        conn.commit()
+        conn.close()
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100)
+
+        recommended = advisor.analyze("SELECT * FROM orders WHERE status = 'open'")
+
+        assert recommended == []
+        assert advisor.snapshot()['orders']['indexes'][0]['hits'] == 1
+
+    def test_explain_runs_read_only(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100)
+
+        with pytest.raises(sqlite3.DatabaseError):
+            advisor.analyze("SELECT name FROM sqlite_master")
+
+    def test_queue_depth_counts_pending_analyses(self, db_path):
+        advisor = IndexAdvisor(db_path=db_path, min_rows=100)
+        release = threading.Event()
+
+        with patch.object(advisor, 'analyze', side_effect=lambda sql: release.wait(5)):
+            for _ in range(3):
+                advisor.observe("SELECT * FROM orders WHERE status = 'open'")
+            assert advisor.queue_depth() == 3
+
+            release.set()
+            advisor._get_executor().submit(lambda: None).result(timeout=5)
+
+        assert advisor.queue_depth() == 0
@@ -0,0 +1,242 @@
+import sqlite3
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core.insights import generate_insights, insights_cache
+
+
+@pytest.fixture(autouse=True)
+def no_column_stats(monkeypatch):
+    """These tests cover the scanning paths; stats-backed answers are in test_column_stats.py"""
+    monkeypatch.setenv("COLUMN_STATS_ENABLED", "false")
+
+
+@pytest.fixture(autouse=True)
+def clear_insights_cache():
+    insights_cache.clear()
+    yield
+    insights_cache.clear()
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    """File-backed test database with numeric, text, unique and empty columns"""
+    db_path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE orders (id INTEGER, status TEXT, amount REAL, note TEXT, empty TEXT)")
+    rows = []
+    for i in range(1, 21):
+        status = ['open', 'open', 'shipped', 'closed'][i % 4] if i != 20 else None
+        amount = float(i) if i % 5 else None
+        rows.append((i, status, amount, f"note {i}", None))
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+    statements = []
+    real_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        conn = real_connect(db_path, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    with patch('core.insights.sqlite3.connect', side_effect=connect):
+        yield statements
+
+
+class TestInsights:
+
+    def test_column_statistics(self, test_db):
+        insights = {i.column_name: i for i in generate_insights("orders")}
+
+        assert list(insights) == ['id', 'status', 'amount', 'note', 'empty']
+
+        amount = insights['amount']
+        assert amount.data_type == 'REAL'
+        assert amount.null_count == 4
+        assert amount.unique_values == 16
+        assert amount.min_value == 1.0
+        assert amount.max_value == 19.0
+        assert amount.avg_value == pytest.approx(sum(i for i in range(1, 21) if i % 5) / 16)
+
+        status = insights['status']
+        assert status.null_count == 1
+        assert status.unique_values == 3
+        assert status.min_value is None
+        assert status.most_common[0] == {'value': 'open', 'count': 9}
+        assert {v['value'] for v in status.most_common} == {'open', 'shipped', 'closed'}
+
+    def test_unique_and_empty_columns(self, test_db):
+        insights = {i.column_name: i for i in generate_insights("orders", ["id", "note", "empty"])}
+
+        assert insights['note'].unique_values == 20
+        assert len(insights['note'].most_common) == 5
+        assert all(v['count'] == 1 for v in insights['note'].most_common)
+
+        assert insights['empty'].null_count == 20
+        assert insights['empty'].unique_values == 0
+        assert insights['empty'].most_common is None
+
+    def test_requested_columns_only(self, test_db):
+        insights = generate_insights("orders", ["status"])
+
+        assert [i.column_name for i in insights] == ['status']
+
+    def test_scans_do_not_grow_with_columns(self, test_db):
+        generate_insights("orders")
+
+        table_scans = [s for s in test_db if "FROM [orders]" in s and "MAX(rowid)" not in s]
+        # One counting pass and one aggregate pass for all five columns
+        assert len(table_scans) == 2
+        assert not any("GROUP BY" in s or "DISTINCT" in s for s in table_scans)
+
+    def test_high_cardinality_columns_fall_back_to_sql(self, test_db):
+        with patch('core.insights.MAX_COUNTED_DISTINCT', 10):
+            insights = {i.column_name: i for i in generate_insights("orders", ["id", "status", "amount"])}
+
+        # id and amount exceed the in-memory limit; both are all-distinct, so no GROUP BY is needed
+        assert insights['id'].unique_values == 20
+        assert insights['amount'].unique_values == 16
+        assert insights['amount'].null_count == 4
+        assert [v['count'] for v in insights['amount'].most_common] == [1] * 5
+        assert insights['status'].most_common[0] == {'value': 'open', 'count': 9}
+        assert sum("LIMIT" in s for s in test_db) == 2
+        assert not any("GROUP BY" in s for s in test_db)
+
+    def test_empty_table(self, test_db, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "test.db"))
+        conn.execute("DELETE FROM orders")
+        conn.commit()
+        conn.close()
+
+        insights = generate_insights("orders", ["status", "amount"])
+
+        assert [(i.null_count, i.unique_values, i.most_common) for i in insights] == [(0, 0, None), (0, 0, None)]
+
+    def test_approximate_mode(self, test_db):
+        insights = {i.column_name: i for i in generate_insights("orders", approximate=True)}
+
+        status = insights['status']
+        assert status.approximate
+        assert status.null_count == 1
+        assert status.unique_values == 3
+        assert status.unique_values_error == pytest.approx(1.04 / 64)
+        assert status.most_common[0] == {'value': 'open', 'count': 9}
+        assert status.most_common_error == 1
+
+        amount = insights['amount']
+        assert amount.unique_values == 16
+        assert amount.null_count == 4
+        assert amount.min_value == 1.0
+        assert amount.max_value == 19.0
+
+        assert insights['empty'].unique_values == 0
+        assert insights['empty'].most_common is None
+        assert insights['empty'].most_common_error == 0
+
+    def test_approximate_mode_never_falls_back_to_sql(self, test_db):
+        with patch('core.insights.MAX_COUNTED_DISTINCT', 10):
+            generate_insights("orders", approximate=True)
+
+        table_scans = [s for s in test_db if "FROM [orders]" in s and "MAX(rowid)" not in s]
+        assert len(table_scans) == 2
+        assert not any("GROUP BY" in s or "DISTINCT" in s or "LIMIT" in s for s in table_scans)
+
+    def test_exact_mode_reports_no_error_bounds(self, test_db):
+        insight = generate_insights("orders", ["status"])[0]
+
+        assert not insight.approximate
+        assert insight.unique_values_error is None
+        assert insight.most_common_error is None
+
+    def test_distribution_mode(self, test_db):
+        insights = {i.column_name: i for i in generate_insights("orders", ["status", "amount"], distribution=True)}
+
+        amounts = [float(i) for i in range(1, 21) if i % 5]
+        amount = insights['amount']
+        assert amount.quantiles == pytest.approx({
+            'p50': np.quantile(amounts, 0.5), 'p90': np.quantile(amounts, 0.9), 'p99': np.quantile(amounts, 0.99)
+        })
+        assert amount.quantile_sample_size is None
+        assert len(amount.histogram) == 20
+        assert amount.histogram[0] == {'lower': 1.0, 'upper': 1.9, 'count': 1}
+        assert amount.histogram[-1]['upper'] == 19.0
+        assert sum(b['count'] for b in amount.histogram) == 16
+
+        assert insights['status'].quantiles is None
+        assert insights['status'].histogram is None
+
+    def test_distribution_mode_samples_large_columns(self, test_db, monkeypatch):
+        monkeypatch.setenv("INSIGHTS_MAX_EXACT_VALUES", "10")
+        monkeypatch.setenv("INSIGHTS_RESERVOIR_SIZE", "8")
+        monkeypatch.setenv("INSIGHTS_HISTOGRAM_BINS", "4")
+
+        amount = generate_insights("orders", ["amount"], distribution=True)[0]
+
+        assert amount.quantile_sample_size == 8
+        assert 1.0 <= amount.quantiles['p50'] <= 19.0
+        # Histograms stay exact
+        assert [b['count'] for b in amount.histogram] == [4, 4, 4, 4]
+
+    def test_distribution_of_constant_and_empty_columns(self, test_db, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "test.db"))
+        conn.execute("CREATE TABLE readings (constant INTEGER, missing REAL)")
+        conn.executemany("INSERT INTO readings VALUES (?, ?)", [(7, None)] * 3)
+        conn.commit()
+        conn.close()
+
+        insights = {i.column_name: i for i in generate_insights("readings", distribution=True)}
+
+        assert insights['constant'].quantiles == {'p50': 7.0, 'p90': 7.0, 'p99': 7.0}
+        assert insights['constant'].histogram == [{'lower': 7.0, 'upper': 7.0, 'count': 3}]
+        assert insights['missing'].histogram is None
+
+    def test_parallel_follow_ups_match_serial(self, test_db, monkeypatch):
+        with patch('core.insights.MAX_COUNTED_DISTINCT', 10):
+            monkeypatch.setenv("INSIGHTS_PARALLELISM", "1")
+            serial = generate_insights("orders", distribution=True)
+            insights_cache.clear()
+            monkeypatch.setenv("INSIGHTS_PARALLELISM", "3")
+            parallel = generate_insights("orders", distribution=True)
+
+        assert [i.model_dump() for i in parallel] == [i.model_dump() for i in serial]
+        # Pooled connections are read-only
+        assert test_db.count("PRAGMA query_only = ON") == 3
+
+    def test_read_only_connections_refuse_writes(self, test_db):
+        from core.insights import open_read_only_connection
+        conn = open_read_only_connection()
+
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM orders")
+        conn.close()
+
+    def test_repeated_requests_are_cached(self, test_db):
+        first = generate_insights("orders")
+        test_db.clear()
+        second = generate_insights("orders")
+
+        assert [i.model_dump() for i in second] == [i.model_dump() for i in first]
+        assert [s for s in test_db if "FROM [orders]" in s] == ["SELECT MAX(rowid) FROM [orders]"]
+
+    def test_cache_is_invalidated_when_the_table_changes(self, test_db, tmp_path):
+        from core.insights import invalidate_table_insights
+        generate_insights("orders", ["id"])
+
+        conn = sqlite3.connect(str(tmp_path / "test.db"))
+        conn.execute("INSERT INTO orders (id) VALUES (21)")
+        conn.commit()
+        conn.close()
+        assert generate_insights("orders", ["id"])[0].unique_values == 21
+
+        conn = sqlite3.connect(str(tmp_path / "test.db"))
+        conn.execute("UPDATE orders SET id = 1")
+        conn.commit()
+        conn.close()
+        # Same MAX(rowid): only an explicit invalidation (uploads and deletes do this) is noticed
+        assert generate_insights("orders", ["id"])[0].unique_values == 21
+        invalidate_table_insights("orders")
+        assert generate_insights("orders", ["id"])[0].unique_values == 1
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from core.lazy_imports import LazyCallable, preload_deferred_modules, start_preload
+from core.sql_lexer import fingerprint_sql
+
+SERVER_DIR = Path(__file__).parent.parent.parent
+
+
+class TestLazyCallable:
+
+    def test_loads_on_first_call(self):
+        lazy = LazyCallable("core.sql_lexer", "fingerprint_sql")
+        assert "deferred" in repr(lazy)
+
+        assert lazy("select 1") == fingerprint_sql("select 1")
+        assert lazy.load() is fingerprint_sql
+        assert "loaded" in repr(lazy)
+
+    def test_preload_skips_modules_that_fail(self, caplog):
+        preload_deferred_modules(("core.no_such_module", "core.sql_lexer"))
+
+        assert "Preloading core.no_such_module failed" in caplog.text
+
+    def test_preload_can_be_disabled(self, monkeypatch):
+        monkeypatch.setenv("PRELOAD_DEFERRED_IMPORTS", "false")
+
+        assert start_preload() is None
+
+
+def test_server_import_defers_heavy_modules():
+    code = (
+        "import sys, server; "
+        "print(','.join(m for m in ('pandas', 'numpy', 'openai', 'anthropic') if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+    )
+
+    assert completed.stdout.strip() == ""
@@ -5,9 +5,14 @@ from core.llm_processor import (
     generate_sql_with_openai, 
     generate_sql_with_anthropic, 
     format_schema_for_prompt,
-    generate_sql
+    generate_sql,
+    stream_sql_with_openai,
+    stream_sql_with_anthropic,
+    generate_sql_stream,
+    clean_sql_response
 )
 from core.data_models import QueryRequest
+from core.metrics import llm_tokens
 
 
 class TestLLMProcessor:
@@ -284,4 +289,105 @@ class TestLLMProcessor:
             result = generate_sql(request, schema_info)
             
             assert result == "SELECT * FROM sales"
-            mock_openai_func.assert_called_once_with("Show sales data", schema_info)
\ No newline at end of file
+            mock_openai_func.assert_called_once_with("Show sales data", schema_info)
+    
+    @patch('core.llm_processor.OpenAI')
+    def test_stream_sql_with_openai_yields_tokens(self, mock_openai_class):
+        # Each streamed chunk's delta content is forwarded as-is
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+
+        chunks = []
+        for text in ["SELECT ", "* FROM ", None, "users"]:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        mock_client.chat.completions.create.return_value = iter(chunks)
+
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            result = list(stream_sql_with_openai("Show all users", {'tables': {}}))
+
+        assert result == ["SELECT ", "* FROM ", "users"]
+        assert mock_client.chat.completions.create.call_args[1]['stream'] is True
+
+    @patch('core.llm_processor.Anthropic')
+    def test_stream_sql_with_anthropic_yields_text_deltas(self, mock_anthropic_class):
+        # Only content_block_delta events carry SQL text
+        mock_client = MagicMock()
+        mock_anthropic_class.return_value = mock_client
+
+        start = MagicMock(type="message_start")
+        delta_1 = MagicMock(type="content_block_delta")
+        delta_1.delta.text = "SELECT * "
+        delta_2 = MagicMock(type="content_block_delta")
+        delta_2.delta.text = "FROM products"
+        stop = MagicMock(type="message_stop")
+        mock_client.messages.create.return_value = iter([start, delta_1, delta_2, stop])
+
+        with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            result = list(stream_sql_with_anthropic("Show all products", {'tables': {}}))
+
+        assert "".join(result) == "SELECT * FROM products"
+
+    @patch('core.llm_processor.OpenAI')
+    def test_stream_sql_with_openai_records_token_usage(self, mock_openai_class):
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+
+        chunk = MagicMock(usage=None)
+        chunk.choices[0].delta.content = "SELECT 1"
+        final = MagicMock(choices=[])
+        final.usage.prompt_tokens = 120
+        final.usage.completion_tokens = 8
+        mock_client.chat.completions.create.return_value = iter([chunk, final])
+        before = (llm_tokens.value("openai", "prompt"), llm_tokens.value("openai", "completion"))
+
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            assert list(stream_sql_with_openai("Show all users", {'tables': {}})) == ["SELECT 1"]
+
+        assert mock_client.chat.completions.create.call_args[1]['stream_options'] == {"include_usage": True}
+        assert llm_tokens.value("openai", "prompt") == before[0] + 120
+        assert llm_tokens.value("openai", "completion") == before[1] + 8
+
+    @patch('core.llm_processor.Anthropic')
+    def test_stream_sql_with_anthropic_records_token_usage(self, mock_anthropic_class):
+        mock_client = MagicMock()
+        mock_anthropic_class.return_value = mock_client
+
+        start = MagicMock(type="message_start")
+        start.message.usage.input_tokens = 95
+        delta = MagicMock(type="content_block_delta")
+        delta.delta.text = "SELECT 1"
+        message_delta = MagicMock(type="message_delta")
+        message_delta.usage.output_tokens = 6
+        mock_client.messages.create.return_value = iter([start, delta, message_delta])
+        before = (llm_tokens.value("anthropic", "prompt"), llm_tokens.value("anthropic", "completion"))
+
+        with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            assert list(stream_sql_with_anthropic("Show all users", {'tables': {}})) == ["SELECT 1"]
+
+        assert llm_tokens.value("anthropic", "prompt") == before[0] + 95
+        assert llm_tokens.value("anthropic", "completion") == before[1] + 6
+
+    def test_stream_sql_with_openai_no_api_key(self):
+        with patch.dict(os.environ, {}, clear=True):
+            with pytest.raises(Exception) as exc_info:
+                list(stream_sql_with_openai("Show all users", {'tables': {}}))
+
+            assert "OPENAI_API_KEY environment variable not set" in str(exc_info.value)
+
+    @patch('core.llm_processor.stream_sql_with_anthropic')
+    def test_generate_sql_stream_routing(self, mock_stream_func):
+        # Streaming follows the same provider priority as generate_sql
+        mock_stream_func.return_value = iter(["SELECT 1"])
+
+        with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'anthropic-key'}, clear=True):
+            request = QueryRequest(query="Count rows", llm_provider="openai")
+            result = list(generate_sql_stream(request, {'tables': {}}))
+
+        assert result == ["SELECT 1"]
+        mock_stream_func.assert_called_once_with("Count rows", {'tables': {}})
+
+    def test_clean_sql_response(self):
+        assert clean_sql_response("```sql\nSELECT 1\n```") == "SELECT 1"
+        assert clean_sql_response("  SELECT 1  ") == "SELECT 1"
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from core.data_models import QueryRequest
+from core.llm_processor import generate_sql
+from core.llm_router import ProviderRouter, percentile
+
+
+def make_router(**kwargs):
+    defaults = dict(min_samples=2, failure_threshold=2, cooldown_seconds=60)
+    defaults.update(kwargs)
+    return ProviderRouter(**defaults)
+
+
+class TestProviderRouter:
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.95) == 95.0
+        assert percentile([], 0.5) is None
+
+    def test_cold_router_keeps_priority_order(self):
+        router = make_router()
+        assert router.rank(["openai", "anthropic"]) == ["openai", "anthropic"]
+
+    def test_prefers_fastest_provider(self):
+        router = make_router()
+        for _ in range(3):
+            router.record_success("openai", 2.0)
+            router.record_success("anthropic", 0.5)
+
+        assert router.rank(["openai", "anthropic"]) == ["anthropic", "openai"]
+
+    def test_high_error_rate_is_deprioritized(self):
+        router = make_router(failure_threshold=100)
+        for _ in range(3):
+            router.record_success("openai", 0.1)
+            router.record_failure("openai")
+            router.record_failure("openai")
+            router.record_success("anthropic", 1.0)
+
+        assert router.rank(["openai", "anthropic"]) == ["anthropic", "openai"]
+
+    def test_circuit_breaker_skips_and_recovers(self):
+        router = make_router(cooldown_seconds=0.05)
+        router.record_failure("openai")
+        router.record_failure("openai")
+
+        assert router.rank(["openai", "anthropic"]) == ["anthropic"]
+        assert router.snapshot()["openai"]["circuit_open"] is True
+
+        time.sleep(0.06)
+        # Half-open: one trial call is allowed again
+        assert "openai" in router.rank(["openai", "anthropic"])
+
+    def test_call_fails_over_to_next_provider(self):
+        router = make_router()
+        calls = []
+
+        def invoke(provider):
+            calls.append(provider)
+            if provider == "openai":
+                raise Exception("rate limited")
+            return "SELECT 1"
+
+        assert router.call(["openai", "anthropic"], invoke) == "SELECT 1"
+        assert calls == ["openai", "anthropic"]
+        assert router.snapshot()["openai"]["error_rate"] == 1.0
+
+    def test_call_raises_when_all_providers_fail(self):
+        router = make_router()
+
+        def invoke(provider):
+            raise Exception(f"{provider} down")
+
+        with pytest.raises(Exception) as exc_info:
+            router.call(["openai", "anthropic"], invoke)
+        assert "anthropic down" in str(exc_info.value)
+
+    def test_hedged_call_fires_second_provider_after_p95(self):
+        router = make_router(hedge_enabled=True)
+        for _ in range(3):
+            router.record_success("openai", 0.01)
+        release = threading.Event()
+
+        def invoke(provider):
+            if provider == "openai":
+                release.wait(1)
+                return "slow"
+            return "fast"
+
+        start = time.perf_counter()
+        result = router.call(["openai", "anthropic"], invoke)
+        release.set()
+
+        assert result == "fast"
+        assert time.perf_counter() - start < 0.5
+
+    def test_hedged_call_without_history_waits_for_primary(self):
+        router = make_router(hedge_enabled=True)
+        calls = []
+
+        def invoke(provider):
+            calls.append(provider)
+            time.sleep(0.02)
+            return provider
+
+        assert router.call(["openai", "anthropic"], invoke) == "openai"
+        assert calls == ["openai"]
+
+    @patch('core.llm_processor.generate_sql_with_anthropic')
+    @patch('core.llm_processor.generate_sql_with_openai')
+    def test_generate_sql_fails_over(self, mock_openai_func, mock_anthropic_func):
+        mock_openai_func.side_effect = Exception("Error generating SQL with OpenAI: timeout")
+        mock_anthropic_func.return_value = "SELECT * FROM users"
+
+        with patch('core.llm_processor.router', make_router()):
+            with patch.dict(os.environ, {'OPENAI_API_KEY': 'openai-key', 'ANTHROPIC_API_KEY': 'anthropic-key'}):
+                result = generate_sql(QueryRequest(query="Show all users"), {'tables': {}})
+
+        assert result == "SELECT * FROM users"
+        mock_anthropic_func.assert_called_once_with("Show all users", {'tables': {}})
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+import pytest
+from unittest.mock import patch
+from core.data_models import QueryRequest
+from core.llm_processor import generate_sql, generate_sql_stream, generate_natural_language_query
+from core.llm_stub import (
+    load_stub_fixtures,
+    normalize_question,
+    simulate_latency,
+    stub_sql_for_query,
+    stub_stream_tokens
+)
+
+
+@pytest.fixture
+def schema_info():
+    return {
+        'tables': {
+            'users': {
+                'columns': {'id': 'INTEGER', 'name': 'TEXT', 'age': 'INTEGER'},
+                'row_count': 3
+            },
+            'products': {
+                'columns': {'id': 'INTEGER', 'price': 'REAL'},
+                'row_count': 2
+            }
+        }
+    }
+
+
+@pytest.fixture
+def fixtures_file(tmp_path):
+    path = tmp_path / "fixtures.json"
+    path.write_text(json.dumps({"Who is the oldest user?": "SELECT * FROM users ORDER BY age DESC LIMIT 1"}))
+    load_stub_fixtures.cache_clear()
+    yield str(path)
+    load_stub_fixtures.cache_clear()
+
+
+class TestLLMStub:
+
+    def test_normalize_question(self):
+        assert normalize_question("  Who is   the OLDEST user? ") == "who is the oldest user"
+
+    def test_fixture_lookup(self, schema_info, fixtures_file):
+        with patch.dict(os.environ, {'LLM_STUB_FIXTURES': fixtures_file}):
+            sql = stub_sql_for_query("who is the oldest user", schema_info)
+
+        assert sql == "SELECT * FROM users ORDER BY age DESC LIMIT 1"
+
+    def test_rules(self, schema_info):
+        with patch.dict(os.environ, {}, clear=True):
+            assert stub_sql_for_query("How many products are there?", schema_info) == \
+                "SELECT COUNT(*) AS count FROM products"
+            assert stub_sql_for_query("What is the average age of users", schema_info) == \
+                "SELECT AVG(age) AS average_age FROM users"
+            assert stub_sql_for_query("Show me everything", schema_info) == \
+                "SELECT * FROM products LIMIT 100"
+
+    def test_no_tables(self):
+        with patch.dict(os.environ, {}, clear=True):
+            with pytest.raises(ValueError):
+                stub_sql_for_query("Show me everything", {'tables': {}})
+
+    def test_stream_tokens_reassemble(self):
+        sql = "SELECT * FROM users LIMIT 100"
+        tokens = list(stub_stream_tokens(sql))
+        assert len(tokens) == 6
+        assert "".join(tokens) == sql
+
+    def test_simulated_latency_is_deterministic(self):
+        with patch('core.llm_stub.time.sleep') as mock_sleep:
+            with patch.dict(os.environ, {'LLM_STUB_LATENCY_MS': '50', 'LLM_STUB_JITTER_MS': '20'}):
+                simulate_latency("same question")
+                simulate_latency("same question")
+
+        first, second = [call.args[0] for call in mock_sleep.call_args_list]
+        assert first == second
+        assert 0.05 <= first < 0.07
+
+    def test_simulated_latency_sleeps(self):
+        with patch.dict(os.environ, {'LLM_STUB_LATENCY_MS': '20'}, clear=True):
+            start = time.perf_counter()
+            simulate_latency("anything")
+            assert time.perf_counter() - start >= 0.02
+
+    @patch('core.llm_processor.generate_sql_with_openai')
+    def test_env_forces_stub_over_api_keys(self, mock_openai_func, schema_info):
+        with patch.dict(os.environ, {'LLM_PROVIDER': 'stub', 'OPENAI_API_KEY': 'openai-key'}, clear=True):
+            sql = generate_sql(QueryRequest(query="How many users"), schema_info)
+            tokens = list(generate_sql_stream(QueryRequest(query="How many users"), schema_info))
+            question = generate_natural_language_query(schema_info)
+
+        assert sql == "SELECT COUNT(*) AS count FROM users"
+        assert "".join(tokens) == sql
+        assert "products" in question
+        mock_openai_func.assert_not_called()
+
+    def test_request_selects_stub(self, schema_info):
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'openai-key'}, clear=True):
+            sql = generate_sql(QueryRequest(query="list users", llm_provider="stub"), schema_info)
+
+        assert sql == "SELECT * FROM users LIMIT 100"
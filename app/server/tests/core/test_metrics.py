@@ -0,0 +1,135 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.llm_router import ProviderRouter
+from core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    cache_hit_ratio,
+    llm_latency,
+    llm_requests,
+    llm_tokens,
+    record_cache_lookup,
+    record_llm_tokens,
+    request_duration,
+)
+
+
+class TestMetricTypes:
+
+    def test_counter_render(self):
+        counter = Counter("jobs_total", "Jobs run", ("queue",))
+        counter.inc("fast")
+        counter.inc("fast", amount=2)
+        counter.inc('sl"ow')
+
+        assert counter.render().splitlines() == [
+            "# HELP jobs_total Jobs run",
+            "# TYPE jobs_total counter",
+            'jobs_total{queue="fast"} 3',
+            'jobs_total{queue="sl\\"ow"} 1',
+        ]
+
+    def test_label_count_is_checked(self):
+        with pytest.raises(ValueError):
+            Counter("jobs_total", "Jobs run", ("queue",)).inc()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/a")
+
+        assert histogram.samples() == [
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 3.65',
+            'latency_seconds_count{route="/a"} 4',
+        ]
+
+    def test_histogram_timer(self):
+        histogram = Histogram("phase_seconds", "Phase", ("phase",))
+        with histogram.time("parse"):
+            pass
+
+        assert histogram.count("parse") == 1
+        assert histogram.sum("parse") > 0
+
+    def test_gauge_collect_function(self):
+        gauge = Gauge("ratio", "Ratio", ("cache",), collect=lambda: {("a",): 0.5})
+
+        assert gauge.samples() == ['ratio{cache="a"} 0.5']
+
+    def test_registry_rejects_duplicates(self):
+        registry = MetricsRegistry()
+        registry.register(Counter("x_total", "X"))
+
+        with pytest.raises(ValueError):
+            registry.register(Counter("x_total", "X again"))
+        assert registry.render().endswith("\n")
+
+
+class TestRecorders:
+
+    def test_cache_hit_ratio(self):
+        for hit in (True, True, True, False):
+            record_cache_lookup("test_cache", hit)
+
+        assert cache_hit_ratio.value("test_cache") == pytest.approx(0.75)
+
+    def test_llm_tokens_ignore_non_integers(self):
+        before = llm_tokens.value("test_provider", "prompt")
+        record_llm_tokens("test_provider", 120, MagicMock())
+
+        assert llm_tokens.value("test_provider", "prompt") == before + 120
+        assert llm_tokens.value("test_provider", "completion") == 0
+
+    def test_router_records_llm_calls(self):
+        router = ProviderRouter()
+        successes = llm_requests.value("metrics_test", "success")
+        failures = llm_requests.value("metrics_test", "failure")
+
+        router.record_success("metrics_test", 0.2)
+        router.record_failure("metrics_test")
+
+        assert llm_requests.value("metrics_test", "success") == successes + 1
+        assert llm_requests.value("metrics_test", "failure") == failures + 1
+        assert llm_latency.count("metrics_test") >= 1
+
+
+class TestMetricsMiddleware:
+
+    def test_requests_are_labelled_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        before = request_duration.count("GET", "/items/{item_id}", "200")
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        assert request_duration.count("GET", "/items/{item_id}", "200") == before + 2
+        assert request_duration.count("GET", "unmatched", "404") >= 1
+
+    def test_metrics_endpoint(self):
+        import server
+
+        client = TestClient(server.app)
+        client.get("/api/does-not-exist")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "# TYPE request_phase_duration_seconds histogram" in response.text
@@ -0,0 +1,77 @@
+import sqlite3
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.query_budget import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    install_query_budget,
+    is_budget_error,
+    PROGRESS_HANDLER_INTERVAL,
+)
+
+RUNAWAY_QUERY = (
+    "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT COUNT(*) FROM n"
+)
+
+
+class TestQueryBudget:
+
+    def test_instruction_budget_interrupts_query(self):
+        conn = sqlite3.connect(':memory:')
+        budget = QueryBudget(timeout_ms=0, max_instructions=PROGRESS_HANDLER_INTERVAL * 5)
+        conn.set_progress_handler(budget, PROGRESS_HANDLER_INTERVAL)
+
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute(RUNAWAY_QUERY).fetchall()
+        conn.close()
+
+        assert "VM instructions" in budget.exceeded
+        with pytest.raises(QueryBudgetExceeded):
+            budget.raise_if_exceeded()
+
+    def test_time_budget_interrupts_query(self):
+        conn = sqlite3.connect(':memory:')
+        budget = QueryBudget(timeout_ms=50, max_instructions=0)
+        conn.set_progress_handler(budget, PROGRESS_HANDLER_INTERVAL)
+
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute(RUNAWAY_QUERY).fetchall()
+        conn.close()
+
+        assert "time limit" in budget.exceeded
+        assert budget.elapsed_ms() >= 50
+
+    def test_paused_time_is_not_charged(self):
+        budget = QueryBudget(timeout_ms=50, max_instructions=0)
+        budget.pause()
+        time.sleep(0.1)
+        budget.resume()
+
+        assert budget.elapsed_ms() < 50
+        assert budget() == 0
+
+    def test_within_budget_not_exceeded(self):
+        conn = sqlite3.connect(':memory:')
+        budget = install_query_budget(conn)
+
+        assert conn.execute("SELECT 1").fetchall() == [(1,)]
+        conn.close()
+
+        assert budget.exceeded is None
+        budget.raise_if_exceeded()
+
+    def test_disabled_budget_installs_no_handler(self, monkeypatch):
+        monkeypatch.setenv("SQL_QUERY_TIMEOUT_MS", "0")
+        monkeypatch.setenv("SQL_QUERY_MAX_INSTRUCTIONS", "0")
+        conn = MagicMock()
+        install_query_budget(conn)
+
+        conn.set_progress_handler.assert_not_called()
+
+    def test_is_budget_error(self):
+        assert is_budget_error("Budget exceeded: query exceeded the 10000 ms time limit")
+        assert not is_budget_error("no such column: foo")
+        assert not is_budget_error(None)
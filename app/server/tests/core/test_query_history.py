@@ -0,0 +1,95 @@
+import os
+import pytest
+from unittest.mock import patch
+from core.data_models import QueryRequest
+from core.llm_processor import build_sql_prompt, generate_sql
+from core.query_history import QueryHistoryStore, extract_table_references, tokenize_question
+
+
+@pytest.fixture
+def store(tmp_path):
+    return QueryHistoryStore(str(tmp_path / "history.db"))
+
+
+@pytest.fixture
+def schema_info():
+    return {
+        'tables': {
+            'users': {'columns': {'id': 'INTEGER', 'age': 'INTEGER'}, 'row_count': 3},
+            'orders': {'columns': {'id': 'INTEGER', 'user_id': 'INTEGER', 'total': 'REAL'}, 'row_count': 5},
+        }
+    }
+
+
+class TestQueryHistory:
+
+    def test_tokenize_question(self):
+        assert tokenize_question("Show me all the Users older than 30") == ["user", "older", "than", "30"]
+
+    def test_extract_table_references(self):
+        sql = "SELECT * FROM users u JOIN [orders] o ON o.user_id = u.id"
+        assert extract_table_references(sql) == {"users", "orders"}
+
+    def test_find_examples_ranks_by_similarity(self, store, schema_info):
+        store.record("How many orders per user", "SELECT user_id, COUNT(*) FROM orders GROUP BY user_id", True)
+        store.record("Users older than 30", "SELECT * FROM users WHERE age > 30", True)
+        store.record("Average order total", "SELECT AVG(total) FROM orders", True)
+
+        examples = store.find_examples("users older than 40", schema_info, k=2)
+
+        assert examples[0] == {'question': "Users older than 30", 'sql': "SELECT * FROM users WHERE age > 30"}
+        assert len(examples) <= 2
+
+    def test_failed_queries_are_not_examples(self, store, schema_info):
+        store.record("Users older than 30", "SELECT * FROM userz WHERE age > 30", False, "no such table: userz")
+
+        assert store.find_examples("users older than 30", schema_info) == []
+
+    def test_examples_for_missing_tables_are_skipped(self, store, schema_info):
+        store.record("Top products by price", "SELECT * FROM products ORDER BY price DESC", True)
+
+        assert store.find_examples("top products by price", schema_info) == []
+
+    def test_duplicates_are_indexed_once(self, store, schema_info):
+        for _ in range(3):
+            store.record("Users older than 30", "SELECT * FROM users WHERE age > 30", True)
+
+        assert len(store.find_examples("users older than 30", schema_info, k=3)) == 1
+
+    def test_history_persists_across_instances(self, store, schema_info):
+        store.record("Users older than 30", "SELECT * FROM users WHERE age > 30", True)
+
+        reloaded = QueryHistoryStore(store.db_path)
+        assert reloaded.find_examples("older users", schema_info)[0]['sql'] == "SELECT * FROM users WHERE age > 30"
+
+    def test_examples_recorded_by_another_worker_are_found(self, store, schema_info):
+        other_worker = QueryHistoryStore(store.db_path)
+        assert store.find_examples("users older than 30", schema_info) == []
+
+        other_worker.record("Users older than 30", "SELECT * FROM users WHERE age > 30", True)
+
+        assert store.find_examples("older users", schema_info)[0]['sql'] == "SELECT * FROM users WHERE age > 30"
+
+    def test_zero_examples_disables_lookup(self, store, schema_info):
+        store.record("Users older than 30", "SELECT * FROM users WHERE age > 30", True)
+
+        assert store.find_examples("users older than 30", schema_info, k=0) == []
+
+    def test_examples_are_injected_into_prompt(self, schema_info):
+        examples = [{'question': "Users older than 30", 'sql': "SELECT * FROM users WHERE age > 30"}]
+
+        prompt = build_sql_prompt("users older than 40", schema_info, examples)
+
+        assert "Question: Users older than 30" in prompt
+        assert "SQL: SELECT * FROM users WHERE age > 30" in prompt
+        assert "examples" not in build_sql_prompt("users older than 40", schema_info).lower()
+
+    @patch('core.llm_processor.generate_sql_with_openai')
+    def test_generate_sql_passes_examples(self, mock_openai_func, schema_info):
+        mock_openai_func.return_value = "SELECT * FROM users WHERE age > 40"
+        examples = [{'question': "Users older than 30", 'sql': "SELECT * FROM users WHERE age > 30"}]
+
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'openai-key'}, clear=True):
+            generate_sql(QueryRequest(query="users older than 40"), schema_info, examples)
+
+        mock_openai_func.assert_called_once_with("users older than 40", schema_info, examples=examples)
@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+from core.data_models import QueryRequest
+from core.query_stream import stream_natural_language_query, format_sse_event
+
+
+def parse_events(frames):
+    """Parse SSE frames into (event, data) tuples"""
+    events = []
+    for frame in frames:
+        lines = frame.strip().split('\n')
+        event = lines[0][len('event: '):]
+        data = json.loads(lines[1][len('data: '):])
+        events.append((event, data))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def query_history():
+    """Keep the query history store and index advisor out of these tests"""
+    with patch('core.query_stream.find_prompt_examples', return_value=[]), \
+            patch('core.query_stream.observe_executed_query'), \
+            patch('core.query_stream.record_query_outcome') as mock_record:
+        yield mock_record
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    """Create a file-backed test database so each connection sees the same data"""
+    db_path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO users (name) VALUES (?)", [('Ann',), ('Ben',), ('Cid',)])
+    conn.commit()
+    conn.close()
+
+    real_connect = sqlite3.connect
+    with patch('core.sql_processor.sqlite3.connect', side_effect=lambda *args, **kwargs: real_connect(db_path)):
+        yield db_path
+
+
+class TestQueryStream:
+
+    def test_format_sse_event(self):
+        frame = format_sse_event("sql", {"sql": "SELECT 1"})
+        assert frame == 'event: sql\ndata: {"sql": "SELECT 1"}\n\n'
+
+    @patch('core.query_stream.get_database_schema')
+    @patch('core.query_stream.generate_sql_stream')
+    def test_stream_tokens_then_result_pages(self, mock_stream, mock_schema, test_db, query_history):
+        mock_schema.return_value = {'tables': {}}
+        mock_stream.return_value = iter(["```sql\nSELECT name ", "FROM users ", "ORDER BY id\n```"])
+
+        request = QueryRequest(query="List users")
+        events = parse_events(stream_natural_language_query(request, page_size=2))
+        names = [name for name, _ in events]
+
+        assert names == ['token', 'token', 'token', 'sql', 'results', 'results', 'done']
+        assert events[3][1]['sql'] == "SELECT name FROM users ORDER BY id"
+        assert events[4][1]['results'] == [{'name': 'Ann'}, {'name': 'Ben'}]
+        assert events[5][1]['page'] == 1
+        assert events[6][1]['row_count'] == 3
+        query_history.assert_called_once_with("List users", "SELECT name FROM users ORDER BY id", True)
+
+    @patch('core.query_stream.get_database_schema')
+    @patch('core.query_stream.generate_sql_stream')
+    def test_stream_zero_rows_sends_columns(self, mock_stream, mock_schema, test_db):
+        mock_schema.return_value = {'tables': {}}
+        mock_stream.return_value = iter(["SELECT id, name FROM users WHERE id > 10"])
+
+        events = parse_events(stream_natural_language_query(QueryRequest(query="Users past ten")))
+
+        assert [name for name, _ in events] == ['token', 'sql', 'results', 'done']
+        assert events[2][1] == {'columns': ['id', 'name'], 'results': [], 'page': 0}
+        assert events[3][1]['row_count'] == 0
+
+    @patch('core.query_stream.get_database_schema')
+    @patch('core.query_stream.generate_sql_stream')
+    def test_stream_reports_security_error(self, mock_stream, mock_schema):
+        mock_schema.return_value = {'tables': {}}
+        mock_stream.return_value = iter(["DROP TABLE users"])
+
+        events = parse_events(stream_natural_language_query(QueryRequest(query="Drop it")))
+
+        assert events[-1][0] == 'error'
+        assert "Security error" in events[-1][1]['error']
+
+    @patch('core.query_stream.get_database_schema')
+    @patch('core.query_stream.generate_sql_stream')
+    def test_stream_reports_provider_error(self, mock_stream, mock_schema):
+        mock_schema.return_value = {'tables': {}}
+        mock_stream.side_effect = Exception("Error streaming SQL with OpenAI: boom")
+
+        events = parse_events(stream_natural_language_query(QueryRequest(query="Anything")))
+
+        assert events == [('error', {'error': "Error streaming SQL with OpenAI: boom", 'error_code': None})]
+
+    @patch('core.query_stream.get_database_schema')
+    @patch('core.query_stream.generate_sql_stream')
+    def test_stream_repairs_failed_sql(self, mock_stream, mock_schema, test_db):
+        mock_schema.return_value = {'tables': {}}
+        mock_stream.side_effect = [iter(["SELECT nme FROM users"]), iter(["SELECT name FROM users"])]
+
+        events = parse_events(stream_natural_language_query(QueryRequest(query="List users")))
+        names = [name for name, _ in events]
+
+        assert names == ['token', 'sql', 'repair', 'token', 'sql', 'results', 'done']
+        assert "no such column" in events[2][1]['error']
+        assert mock_stream.call_args_list[1].args[3]['sql'] == "SELECT nme FROM users"
+        assert events[-1][1]['attempts'] == 2
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+from core.data_models import ColumnInsight, InsightsResponse, QueryResponse
+from core.responses import dumps, etag_matches, make_etag, model_response, not_modified
+
+
+class TestModelResponse:
+
+    def test_matches_pydantic_json(self):
+        response = InsightsResponse(
+            table_name="orders",
+            insights=[ColumnInsight(column_name="amount", data_type="REAL", unique_values=3, null_count=0,
+                                    most_common=[{"value": 1.5, "count": 2}])],
+            generated_at=datetime(2024, 5, 1, 12, 30, 15, 250000)
+        )
+
+        assert json.loads(dumps(response)) == json.loads(response.model_dump_json())
+
+    def test_constructed_models_are_not_revalidated(self):
+        rows = [{"id": i, "name": f"user {i}", "blob": b"\x00ab", "score": np.float64(0.5)} for i in range(3)]
+        response = QueryResponse.model_construct(
+            sql="SELECT * FROM users", results=rows, columns=["id", "name", "blob", "score"],
+            row_count=3, execution_time_ms=1.5
+        )
+
+        body = json.loads(dumps(response))
+
+        assert body["results"][2] == {"id": 2, "name": "user 2", "blob": "\x00ab", "score": 0.5}
+        assert body["attempts"] == 1
+        assert body["error"] is None
+
+    def test_model_response(self):
+        response = model_response(QueryResponse(
+            sql="", results=[], columns=[], row_count=0, execution_time_ms=0, error="boom"
+        ))
+
+        assert response.status_code == 200
+        assert response.media_type == "application/json"
+        assert json.loads(response.body)["error"] == "boom"
+
+
+class TestEtags:
+
+    def test_make_etag_is_stable_and_weak(self):
+        etag = make_etag("schema", "v1")
+
+        assert etag == make_etag("schema", "v1") != make_etag("schema", "v2")
+        assert etag.startswith('W/"')
+
+    def test_etag_matches(self):
+        etag = make_etag("schema", "v1")
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches(make_etag("schema", "v2"), etag)
+
+    def test_not_modified(self):
+        response = not_modified('W/"abc"')
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == 'W/"abc"'
@@ -0,0 +1,132 @@
+import random
+
+import numpy as np
+import pytest
+
+from core.sketches import CountMinSketch, HyperLogLog, ReservoirSample, TopKSketch, hash_values
+
+
+def add_in_batches(values, *sketches, batch_size=1000):
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        hashes = hash_values(batch)
+        for sketch in sketches:
+            if isinstance(sketch, TopKSketch):
+                sketch.add(batch, hashes)
+            else:
+                sketch.add_hashes(hashes)
+
+
+class TestHashValues:
+
+    def test_hashes_are_stable_across_batches(self):
+        assert list(hash_values(['a', 'b'])) == list(hash_values(['b', 'a']))[::-1]
+        assert hash_values([3])[0] == hash_values([1, 2, 3])[2]
+
+    def test_integers_and_equal_floats_hash_alike(self):
+        assert hash_values([1])[0] == hash_values([1.0])[0]
+
+    def test_empty_batch(self):
+        assert len(hash_values([])) == 0
+
+
+class TestHyperLogLog:
+
+    @pytest.mark.parametrize("distinct", [10, 1000, 100000])
+    def test_estimate_within_error_bound(self, distinct):
+        sketch = HyperLogLog(12)
+        values = [f"value {i}" for i in range(distinct)] * 2
+        add_in_batches(values, sketch, batch_size=10000)
+
+        assert abs(sketch.estimate() - distinct) <= max(1, 4 * sketch.relative_error * distinct)
+
+    def test_empty_sketch(self):
+        assert HyperLogLog().estimate() == 0
+
+    def test_merge_matches_single_sketch(self):
+        left, right, combined = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+        add_in_batches(list(range(5000)), left, combined)
+        add_in_batches(list(range(3000, 9000)), right, combined)
+
+        left.merge(right)
+
+        assert np.array_equal(left.registers, combined.registers)
+
+    def test_bytes_round_trip(self):
+        sketch = HyperLogLog(8)
+        add_in_batches(list(range(1000)), sketch)
+
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+
+        assert restored.precision == 8
+        assert restored.estimate() == sketch.estimate()
+
+
+class TestCountMinSketch:
+
+    def test_never_undercounts(self):
+        rng = random.Random(7)
+        values = [rng.randint(0, 5000) for _ in range(50000)]
+        sketch = CountMinSketch(width=256, depth=4)
+        add_in_batches(values, sketch)
+
+        distinct = sorted(set(values))
+        estimates = sketch.estimate_hashes(hash_values(distinct))
+        exact = {v: 0 for v in distinct}
+        for v in values:
+            exact[v] += 1
+
+        assert all(estimate >= exact[v] for v, estimate in zip(distinct, estimates))
+        assert sketch.total == 50000
+        assert sketch.error_bound == int(np.ceil(np.e / 256 * 50000))
+
+    def test_merge_adds_counts(self):
+        left, right = CountMinSketch(64, 3), CountMinSketch(64, 3)
+        add_in_batches(['a'] * 10, left)
+        add_in_batches(['a'] * 5, right)
+
+        left.merge(right)
+
+        assert left.estimate_hashes(hash_values(['a']))[0] >= 15
+        assert left.total == 15
+
+
+class TestTopKSketch:
+
+    def test_finds_heavy_hitters_spread_across_batches(self):
+        rng = random.Random(3)
+        values = [rng.randint(0, 20000) for _ in range(100000)]
+        values += ['heavy'] * 4000 + [-1] * 2000 + [None.__class__.__name__] * 1000
+        rng.shuffle(values)
+        sketch = TopKSketch(k=3, width=2048, depth=5)
+        add_in_batches(values, sketch, batch_size=10000)
+
+        top = sketch.top()
+
+        assert [entry['value'] for entry in top] == ['heavy', -1, 'NoneType']
+        assert 4000 <= top[0]['count'] <= 4000 + sketch.counts.error_bound
+
+    def test_empty_sketch(self):
+        assert TopKSketch().top() == []
+
+
+class TestReservoirSample:
+
+    def test_keeps_everything_until_full(self):
+        sample = ReservoirSample(10, seed=1)
+        sample.add(np.arange(4, dtype=np.float64))
+        sample.add(np.arange(4, 8, dtype=np.float64))
+
+        assert list(sample.values()) == [0, 1, 2, 3, 4, 5, 6, 7]
+
+    def test_sample_is_uniform(self):
+        sample = ReservoirSample(2000, seed=7)
+        for start in range(0, 1000000, 10000):
+            sample.add(np.arange(start, start + 10000, dtype=np.float64))
+
+        values = sample.values()
+        assert sample.seen == 1000000
+        assert len(values) == 2000
+        assert len(np.unique(values)) == 2000
+        assert np.quantile(values, 0.5) == pytest.approx(500000, rel=0.1)
+        assert np.quantile(values, 0.9) == pytest.approx(900000, rel=0.05)
@@ -0,0 +1,144 @@
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.slow_query_log import SlowQueryLog, observe_query_timing, summarize_query_plan
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT, total REAL)")
+    conn.executemany("INSERT INTO orders (status, total) VALUES (?, ?)", [("open", i * 1.5) for i in range(50)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def log(tmp_path, db_path):
+    return SlowQueryLog(str(tmp_path / "slow.db"), threshold_ms=100, buffer_size=3, database_path=db_path)
+
+
+class TestSlowQueryLog:
+
+    def test_threshold(self, log):
+        assert log.is_slow(150)
+        assert not log.is_slow(20)
+
+    def test_explain(self, log):
+        plan = log.explain("SELECT * FROM orders WHERE id = 3")
+
+        assert plan.startswith("SEARCH orders USING INTEGER PRIMARY KEY")
+        assert log.explain("SELECT * FROM missing") is None
+        # The plan is captured under the read-only authorizer
+        assert log.explain("DELETE FROM orders") is None
+
+    def test_summarize_query_plan(self):
+        rows = [(2, 0, 0, "SCAN o"), (5, 0, 0, "SEARCH u USING INTEGER PRIMARY KEY (rowid=?)")]
+
+        assert summarize_query_plan(rows) == "SCAN o; SEARCH u USING INTEGER PRIMARY KEY (rowid=?)"
+
+    def test_recent_lists_the_newest(self, log):
+        for i in range(5):
+            log.record(f"SELECT * FROM orders WHERE id = {i}", 150 + i, 1)
+
+        recent = log.recent()
+
+        assert [entry['execution_ms'] for entry in recent] == [154, 153, 152]
+        assert recent[0]['fingerprint'] == "SELECT * FROM ORDERS WHERE ID = ?"
+
+    def test_log_table_stays_bounded(self, log):
+        for i in range(10):
+            log.record(f"SELECT * FROM orders WHERE id = {i}", 150 + i, 1)
+
+        conn = sqlite3.connect(log.db_path)
+        ids = [row[0] for row in conn.execute("SELECT id FROM slow_queries ORDER BY id")]
+        conn.close()
+
+        assert ids == [8, 9, 10]
+        assert log.top_fingerprints()[0]['count'] == 3
+
+    def test_recent_includes_other_workers(self, log):
+        other_worker = SlowQueryLog(log.db_path, threshold_ms=100, database_path=log.database_path)
+        other_worker.record("SELECT * FROM orders WHERE id = 1", 150, 1)
+
+        assert [entry['sql'] for entry in log.recent()] == ["SELECT * FROM orders WHERE id = 1"]
+
+    def test_recent_without_a_log(self, tmp_path):
+        assert SlowQueryLog(str(tmp_path / "none.db")).recent() == []
+
+    def test_top_fingerprints_by_total_time(self, log):
+        # Room for every entry below; the fixture's buffer keeps only three
+        log = SlowQueryLog(log.db_path, threshold_ms=100, buffer_size=10, database_path=log.database_path)
+        for i in range(3):
+            log.record(f"SELECT * FROM orders WHERE id = {i}", 200, 1, llm_ms=900, total_ms=1100)
+        log.record("SELECT status, SUM(total) FROM orders GROUP BY status", 500, 2, plan="SCAN orders")
+        log.record("SELECT COUNT(*) FROM orders", 120, 1)
+
+        top = log.top_fingerprints(limit=2)
+
+        assert [entry['fingerprint'] for entry in top] == [
+            "SELECT * FROM ORDERS WHERE ID = ?",
+            "SELECT STATUS, SUM (TOTAL) FROM ORDERS GROUP BY STATUS",
+        ]
+        assert top[0]['count'] == 3
+        assert top[0]['total_ms'] == 600
+        assert top[0]['sample_sql'] == "SELECT * FROM orders WHERE id = 2"
+        assert top[1]['plan'] == "SCAN orders"
+
+    def test_top_fingerprints_without_a_log(self, tmp_path):
+        assert SlowQueryLog(str(tmp_path / "none.db")).top_fingerprints() == []
+
+    def test_observe_skips_fast_queries(self, log):
+        with patch.object(log, '_get_executor') as executor:
+            log.observe("SELECT 1", 5, 1)
+
+        executor.assert_not_called()
+
+    def test_observe_records_slow_queries_with_their_plan(self, log):
+        log.observe("SELECT * FROM orders WHERE status = 'open'", 250, 50, llm_ms=800.0, total_ms=1050.0)
+        log._get_executor().submit(lambda: None).result()
+
+        entry = log.recent()[0]
+        assert entry['plan'] == "SCAN orders"
+        assert (entry['row_count'], entry['llm_ms'], entry['total_ms']) == (50, 800.0, 1050.0)
+
+    def test_queue_depth_counts_pending_records(self, log):
+        release = threading.Event()
+
+        with patch.object(log, 'record', side_effect=lambda *args, **kwargs: release.wait(5)):
+            for _ in range(3):
+                log.observe("SELECT * FROM orders", 250, 50)
+            assert log.queue_depth() == 3
+
+            release.set()
+            log._get_executor().submit(lambda: None).result(timeout=5)
+
+        assert log.queue_depth() == 0
+
+    def test_observe_query_timing_can_be_disabled(self, log, monkeypatch):
+        monkeypatch.setenv("SLOW_QUERY_LOG_ENABLED", "false")
+        with patch('core.slow_query_log.slow_query_log', log), patch.object(log, 'observe') as observe:
+            observe_query_timing("SELECT 1", 500, 1)
+
+        observe.assert_not_called()
+
+
+class TestSlowQueryEndpoint:
+
+    def test_endpoint(self, log):
+        import server
+
+        log.record("SELECT * FROM orders WHERE id = 1", 300, 1, llm_ms=10.0, total_ms=320.0)
+        with patch.object(server, 'slow_query_log', log):
+            body = TestClient(server.app).get("/api/slow-queries?limit=5").json()
+
+        assert body['threshold_ms'] == 100
+        assert body['fingerprints'][0]['count'] == 1
+        assert body['recent'][0]['sql'] == "SELECT * FROM orders WHERE id = 1"
+        assert body['error'] is None
@@ -0,0 +1,83 @@
+import pytest
+from core.sql_lexer import (
+    analyze_sql,
+    fingerprint_sql,
+    tokenize,
+    COMMENT,
+    NUMBER,
+    PARAMETER,
+    QUOTED_IDENTIFIER,
+    STRING,
+    WORD,
+)
+from core.sql_security import validate_sql_query, SQLSecurityError
+
+
+class TestSQLLexer:
+
+    def test_tokenize_literals_and_identifiers(self):
+        tokens = tokenize("SELECT \"first name\", [x] FROM t WHERE a = 'it''s' AND b >= 1.5e3 AND c = ?")
+        types = [token.type for token in tokens]
+
+        assert types.count(QUOTED_IDENTIFIER) == 2
+        assert (STRING, "'it''s'") in [(t.type, t.value) for t in tokens]
+        assert (NUMBER, "1.5e3") in [(t.type, t.value) for t in tokens]
+        assert tokens[-1].type == PARAMETER
+        assert (">=") in [t.value for t in tokens]
+
+    def test_comment_markers_inside_literals_are_not_comments(self):
+        tokens = tokenize("SELECT '-- not a comment /* nor this */' FROM t")
+        assert COMMENT not in [token.type for token in tokens]
+
+    def test_comments_are_tokens(self):
+        tokens = tokenize("SELECT 1 -- trailing\n/* block */ FROM t")
+        assert [t.value for t in tokens if t.type == COMMENT] == ["-- trailing", "/* block */"]
+
+    def test_unterminated_string_consumes_rest(self):
+        tokens = tokenize("SELECT 'oops FROM t")
+        assert tokens[-1].type == STRING
+        assert tokens[0].type == WORD
+
+    def test_statement_classification(self):
+        assert analyze_sql("  select 1").statement_type == "SELECT"
+        assert analyze_sql("WITH x AS (SELECT 1) SELECT * FROM x").statement_type == "WITH"
+        assert analyze_sql("SELECT 1;").statement_count == 1
+        assert analyze_sql("SELECT 1; DROP TABLE t").statement_count == 2
+        assert analyze_sql("SELECT ';' FROM t").statement_count == 1
+        assert analyze_sql("").statement_type == ""
+
+    def test_tables(self):
+        analysis = analyze_sql(
+            "WITH recent AS (SELECT * FROM orders) "
+            "SELECT * FROM users u JOIN [products] p ON p.id = u.id, recent r, \"events\" WHERE u.x = 1"
+        )
+        assert analysis.tables == frozenset({"orders", "users", "products", "events"})
+
+    def test_fingerprint_normalizes_literals_and_formatting(self):
+        first = fingerprint_sql("select * from Users where id in (1, 2, 3) and name = 'x'")
+        second = fingerprint_sql("SELECT *\n  FROM users WHERE id IN (7,8) AND name='yy' -- note")
+
+        assert first == "SELECT * FROM USERS WHERE ID IN (?+) AND NAME = ?"
+        assert first == second
+
+    def test_fingerprint_keeps_distinct_shapes_apart(self):
+        assert fingerprint_sql("SELECT a FROM t WHERE b = 1") != fingerprint_sql("SELECT a FROM t WHERE c = 1")
+
+    def test_analysis_is_cached(self):
+        assert analyze_sql("SELECT 42") is analyze_sql("SELECT 42")
+
+
+class TestLexerBackedValidation:
+
+    def test_keywords_inside_literals_are_allowed(self):
+        assert validate_sql_query("SELECT * FROM notes WHERE body = 'please DROP TABLE users; -- now'")
+
+    @pytest.mark.parametrize("query", [
+        "SELECT * FROM users; DROP TABLE users",
+        "SELECT 1 /* hidden */",
+        "UPDATE users SET name = 'x'",
+        "INSERT INTO t SELECT * FROM users",
+    ])
+    def test_dangerous_queries_are_rejected(self, query):
+        with pytest.raises(SQLSecurityError):
+            validate_sql_query(query)
@@ -1,7 +1,10 @@
 import pytest
 import sqlite3
+import time
 from unittest.mock import patch
-from core.sql_processor import execute_sql_safely, get_database_schema
+from core.sql_security import SQLSecurityError
+from core.sql_processor import execute_sql_safely, get_database_schema, iter_sql_results
+from core.query_budget import QueryBudgetExceeded
 
 
 @pytest.fixture
@@ -178,4 +181,78 @@ class TestSQLProcessor:
         for keyword, query in dangerous_operations:
             result = execute_sql_safely(query)
             assert result['error'] is not None
-            # Query should be blocked
\ No newline at end of file
+            # Query should be blocked
+
+    def test_iter_sql_results_pages(self, test_db):
+        pages = list(iter_sql_results("SELECT name FROM users ORDER BY age", page_size=2))
+
+        assert len(pages) == 2
+        assert pages[0]['columns'] == ['name']
+        assert [row['name'] for row in pages[0]['results']] == ['John', 'Jane']
+        assert [row['name'] for row in pages[1]['results']] == ['Bob']
+
+    def test_iter_sql_results_empty_result_keeps_columns(self, test_db):
+        pages = list(iter_sql_results("SELECT name, age FROM users WHERE age > 100"))
+
+        assert pages == [{'columns': ['name', 'age'], 'results': [], 'truncated': False}]
+
+    def test_iter_sql_results_blocks_dangerous_queries(self):
+        with pytest.raises(SQLSecurityError):
+            list(iter_sql_results("DROP TABLE users"))
+
+    def test_execute_sql_safely_truncates_to_max_rows(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_MAX_RESULT_ROWS", "2")
+        result = execute_sql_safely("SELECT name FROM users ORDER BY age")
+
+        assert result['error'] is None
+        assert result['truncated'] is True
+        assert [row['name'] for row in result['results']] == ['John', 'Jane']
+
+    def test_execute_sql_safely_exact_max_rows_not_truncated(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_MAX_RESULT_ROWS", "3")
+        result = execute_sql_safely("SELECT name FROM users")
+
+        assert result['truncated'] is False
+        assert len(result['results']) == 3
+
+    def test_execute_sql_safely_instruction_budget_exceeded(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_QUERY_MAX_INSTRUCTIONS", "50000")
+        result = execute_sql_safely(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) "
+            "SELECT COUNT(*) FROM n"
+        )
+
+        assert result['error_code'] == 'budget_exceeded'
+        assert result['error'].startswith("Budget exceeded")
+        assert result['results'] == []
+
+    def test_iter_sql_results_truncates_to_max_rows(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_MAX_RESULT_ROWS", "2")
+        pages = list(iter_sql_results("SELECT name FROM users ORDER BY age", page_size=5))
+
+        assert len(pages) == 1
+        assert [row['name'] for row in pages[0]['results']] == ['John', 'Jane']
+        assert pages[0]['truncated'] is True
+
+    def test_iter_sql_results_time_between_pages_is_not_charged(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_QUERY_TIMEOUT_MS", "200")
+        monkeypatch.setenv("SQL_MAX_RESULT_ROWS", "0")
+        pages = iter_sql_results(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT 20000) SELECT x FROM n",
+            page_size=5000
+        )
+
+        row_count = 0
+        for page in pages:
+            row_count += len(page['results'])
+            # A slow client: far longer than the budget, but spent outside SQLite
+            time.sleep(0.3)
+
+        assert row_count == 20000
+
+    def test_iter_sql_results_budget_exceeded(self, test_db, monkeypatch):
+        monkeypatch.setenv("SQL_QUERY_MAX_INSTRUCTIONS", "50000")
+        with pytest.raises(QueryBudgetExceeded):
+            list(iter_sql_results(
+                "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) SELECT x FROM n"
+            ))
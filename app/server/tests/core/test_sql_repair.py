@@ -0,0 +1,111 @@
+import os
+import pytest
+from unittest.mock import patch
+from core.data_models import QueryRequest
+from core.llm_processor import build_sql_prompt
+from core.sql_repair import can_attempt_repair, generate_and_execute_sql, is_repairable_error
+
+
+def ok(rows):
+    return {'results': rows, 'columns': list(rows[0].keys()) if rows else [], 'error': None}
+
+
+def failed(error):
+    return {'results': [], 'columns': [], 'error': error}
+
+
+@pytest.fixture(autouse=True)
+def query_history():
+    """Keep the query history store and index advisor out of these tests"""
+    with patch('core.sql_repair.observe_executed_query'), \
+            patch('core.sql_repair.record_query_outcome') as mock_record:
+        yield mock_record
+
+
+class TestSQLRepair:
+
+    def test_is_repairable_error(self):
+        assert is_repairable_error("no such column: agee")
+        assert not is_repairable_error("Security error: DDL not allowed")
+        assert not is_repairable_error(None)
+
+    def test_can_attempt_repair_respects_budget(self):
+        import time
+        with patch.dict(os.environ, {'SQL_REPAIR_MAX_ATTEMPTS': '2', 'SQL_REPAIR_TIME_BUDGET_MS': '1000'}):
+            assert can_attempt_repair(1, time.perf_counter(), "syntax error")
+            assert not can_attempt_repair(2, time.perf_counter(), "syntax error")
+            assert not can_attempt_repair(1, time.perf_counter() - 2, "syntax error")
+
+    @patch('core.sql_repair.execute_sql_safely')
+    @patch('core.sql_repair.generate_sql')
+    def test_repairs_failed_sql(self, mock_generate, mock_execute, query_history):
+        mock_generate.side_effect = ["SELECT agee FROM users", "SELECT age FROM users"]
+        mock_execute.side_effect = [failed("no such column: agee"), ok([{'age': 30}])]
+        schema_info = {'tables': {}}
+        request = QueryRequest(query="user ages")
+
+        outcome = generate_and_execute_sql(request, schema_info)
+
+        assert outcome['sql'] == "SELECT age FROM users"
+        assert outcome['result']['error'] is None
+        assert outcome['attempts'] == 2
+        assert outcome['repair_time_ms'] > 0
+        # The repair reuses the fetched schema and carries the failure
+        second_call = mock_generate.call_args_list[1]
+        assert second_call.args[1] is schema_info
+        assert second_call.args[3] == {'sql': "SELECT agee FROM users", 'error': "no such column: agee"}
+        assert [c.args[2] for c in query_history.call_args_list] == [False, True]
+
+    @patch('core.sql_repair.execute_sql_safely')
+    @patch('core.sql_repair.generate_sql')
+    def test_first_attempt_success(self, mock_generate, mock_execute):
+        mock_generate.return_value = "SELECT 1 AS one"
+        mock_execute.return_value = ok([{'one': 1}])
+
+        outcome = generate_and_execute_sql(QueryRequest(query="one"), {'tables': {}})
+
+        assert outcome['attempts'] == 1
+        assert outcome['repair_time_ms'] == 0
+        assert mock_generate.call_args.args[3] is None
+
+    @patch('core.sql_repair.execute_sql_safely')
+    @patch('core.sql_repair.generate_sql')
+    def test_stops_after_max_attempts(self, mock_generate, mock_execute):
+        mock_generate.return_value = "SELECT * FORM users"
+        mock_execute.return_value = failed("near \"FORM\": syntax error")
+
+        with patch.dict(os.environ, {'SQL_REPAIR_MAX_ATTEMPTS': '3'}):
+            outcome = generate_and_execute_sql(QueryRequest(query="users"), {'tables': {}})
+
+        assert outcome['attempts'] == 3
+        assert outcome['result']['error'] is not None
+        assert mock_generate.call_count == 3
+
+    @patch('core.sql_repair.execute_sql_safely')
+    @patch('core.sql_repair.generate_sql')
+    def test_security_errors_are_not_repaired(self, mock_generate, mock_execute):
+        mock_generate.return_value = "DROP TABLE users"
+        mock_execute.return_value = failed("Security error: Query contains potentially dangerous operation")
+
+        outcome = generate_and_execute_sql(QueryRequest(query="drop users"), {'tables': {}})
+
+        assert outcome['attempts'] == 1
+        mock_generate.assert_called_once()
+
+    def test_repair_context_in_prompt(self):
+        prompt = build_sql_prompt("user ages", {'tables': {}}, repair_context={
+            'sql': "SELECT agee FROM users", 'error': "no such column: agee"
+        })
+
+        assert "SELECT agee FROM users" in prompt
+        assert "SQLite error: no such column: agee" in prompt
+
+    def test_budget_errors_are_repaired_with_hint(self):
+        error = "Budget exceeded: query exceeded 100000000 VM instructions"
+        assert is_repairable_error(error)
+
+        prompt = build_sql_prompt("orders per user", {'tables': {}}, repair_context={
+            'sql': "SELECT * FROM orders, users", 'error': error
+        })
+
+        assert "too expensive" in prompt
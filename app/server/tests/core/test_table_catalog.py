@@ -0,0 +1,107 @@
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from core.table_catalog import TableCatalog, get_database_version
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    store = TableCatalog(str(tmp_path / "catalog.db"))
+    with patch('core.table_catalog.table_catalog', store):
+        yield store
+
+
+@pytest.fixture
+def client(catalog):
+    schema = {'tables': {'orders': {'columns': {'id': 'INTEGER', 'amount': 'REAL'}, 'row_count': 3}}}
+    with patch.object(server, 'get_database_version', return_value="v1") as version, \
+            patch.object(server, 'get_database_schema', return_value=schema) as get_schema, \
+            patch.object(server, 'generate_insights', return_value=[]) as insights:
+        yield {'client': TestClient(server.app), 'version': version, 'schema': get_schema, 'insights': insights}
+
+
+class TestDatabaseVersion:
+
+    def test_changes_on_every_commit(self, tmp_path):
+        db_path = str(tmp_path / "test.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        versions = [get_database_version(db_path)]
+        for i in range(3):
+            conn.execute("INSERT INTO t VALUES (?)", (i,))
+            conn.commit()
+            versions.append(get_database_version(db_path))
+        conn.close()
+
+        assert len(set(versions)) == 4
+        assert get_database_version(db_path) == versions[-1]
+
+    def test_missing_database(self, tmp_path):
+        assert get_database_version(str(tmp_path / "missing.db")) == get_database_version(str(tmp_path / "other.db"))
+
+
+class TestTableCatalog:
+
+    def test_append_keeps_creation_time(self, catalog):
+        catalog.record_created("orders")
+        first = catalog.created_at(["orders"])["orders"]
+
+        catalog.record_created("orders", replace=False)
+        assert catalog.created_at(["orders"])["orders"] == first
+
+        catalog.record_created("orders")
+        assert catalog.created_at(["orders"])["orders"] >= first
+
+    def test_unknown_tables_get_a_stable_first_seen_time(self, catalog):
+        first = catalog.created_at(["legacy"])
+        second = catalog.created_at(["legacy"])
+
+        assert first == second and "legacy" in first
+
+    def test_delete(self, catalog):
+        catalog.record_created("orders")
+        catalog.delete("orders")
+
+        assert catalog.created_at([]) == {}
+
+
+class TestConditionalRequests:
+
+    def test_schema_etag_and_not_modified(self, client):
+        response = client['client'].get("/api/schema")
+        etag = response.headers["etag"]
+        created_at = response.json()["tables"][0]["created_at"]
+
+        assert response.headers["cache-control"] == "no-cache"
+        assert client['client'].get("/api/schema").json()["tables"][0]["created_at"] == created_at
+
+        client['schema'].reset_mock()
+        cached = client['client'].get("/api/schema", headers={"If-None-Match": etag})
+
+        assert cached.status_code == 304
+        assert cached.content == b""
+        client['schema'].assert_not_called()
+
+    def test_schema_etag_changes_with_the_database(self, client):
+        etag = client['client'].get("/api/schema").headers["etag"]
+        client['version'].return_value = "v2"
+
+        response = client['client'].get("/api/schema", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_insights_get_is_conditional(self, client):
+        url = "/api/insights/orders?column_names=amount&distribution=true"
+        response = client['client'].get(url)
+        etag = response.headers["etag"]
+
+        client['insights'].assert_called_once_with("orders", ["amount"], False, True)
+        assert client['client'].get(url, headers={"If-None-Match": etag}).status_code == 304
+        assert client['client'].get("/api/insights/orders", headers={"If-None-Match": etag}).status_code == 200
+        assert client['insights'].call_count == 2
@@ -15,6 +15,8 @@ from core.sql_security import (
     sanitize_value_for_like,
     build_safe_in_clause,
     check_table_exists,
+    check_read_only_statement,
+    install_read_only_authorizer,
     SQLSecurityError
 )
 from core.sql_processor import execute_sql_safely
@@ -196,6 +198,80 @@ class TestSQLSecurityModule:
         conn.close()
 
 
+class TestReadOnlyEnforcement:
+    """Test execution-time enforcement with the SQLite authorizer"""
+
+    def test_check_read_only_statement_allows_reads(self):
+        assert check_read_only_statement("SELECT * FROM users")
+        assert check_read_only_statement("  with t AS (SELECT 1) SELECT * FROM t;")
+        assert check_read_only_statement("SELECT * FROM users WHERE name = 'a--b; /* c */'")
+        assert check_read_only_statement('SELECT "weird--column" FROM users')
+
+    def test_check_read_only_statement_allows_commented_select(self):
+        assert check_read_only_statement("SELECT SUM(price) FROM products -- total revenue")
+        assert check_read_only_statement("/* top users */\nSELECT * FROM users; -- done")
+
+    def test_check_read_only_statement_rejects(self):
+        for query in [
+            "DROP TABLE users",
+            "delete from users",
+            "SELECT * FROM users; DROP TABLE users",
+            "SELECT 'a'; SELECT 'b'",
+            "/* read */ DROP TABLE users",
+            "-- just a select\nDELETE FROM users",
+            "SELECT 1 /* one */; DROP TABLE users",
+        ]:
+            with pytest.raises(SQLSecurityError):
+                check_read_only_statement(query)
+
+    def test_authorizer_allows_reads(self, test_db):
+        conn = sqlite3.connect(test_db)
+        install_read_only_authorizer(conn)
+        rows = conn.execute(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 2) "
+            "SELECT upper(name), x FROM users, n ORDER BY name, x"
+        ).fetchall()
+        conn.close()
+
+        assert rows[0] == ('ALICE', 1)
+        assert len(rows) == 4
+
+    def test_authorizer_denies_writes_and_system_tables(self, test_db):
+        conn = sqlite3.connect(test_db)
+        authorizer = install_read_only_authorizer(conn)
+
+        for query in [
+            "DELETE FROM users",
+            "UPDATE users SET name = 'x'",
+            "INSERT INTO users (name) VALUES ('x')",
+            "CREATE TABLE hacked (id INTEGER)",
+            "DROP TABLE users",
+            "PRAGMA writable_schema = 1",
+            "SELECT sql FROM sqlite_master",
+            "ATTACH DATABASE ':memory:' AS other",
+        ]:
+            with pytest.raises(sqlite3.DatabaseError):
+                conn.execute(query)
+
+        assert len(authorizer.denied) == 8
+        conn.close()
+
+    def test_execute_sql_safely_accepts_comment_markers_in_literals(self, test_db):
+        real_connect = sqlite3.connect
+        with patch('core.sql_processor.sqlite3.connect', side_effect=lambda *a, **k: real_connect(test_db)):
+            result = execute_sql_safely("SELECT name FROM users WHERE email <> '--' ORDER BY name")
+
+        assert result['error'] is None
+        assert [row['name'] for row in result['results']] == ['Alice', 'Bob']
+
+    def test_execute_sql_safely_reports_authorizer_denial(self, test_db):
+        real_connect = sqlite3.connect
+        with patch('core.sql_processor.sqlite3.connect', side_effect=lambda *a, **k: real_connect(test_db)):
+            result = execute_sql_safely("SELECT name FROM sqlite_master")
+
+        assert "Security error" in result['error']
+
+
 class TestSQLProcessorSecurity:
     """Test SQL processor with security enhancements"""
     
@@ -312,22 +388,32 @@ class TestEndToEndSQLInjection:
             assert result['error'] is not None
             assert result['results'] == []
     
-    def test_sql_comment_injection(self):
-        """Test that SQL comments are blocked"""
+    def test_sql_comment_injection(self, test_db):
+        """Test that text inside SQL comments is never executed"""
         queries_with_comments = [
             "SELECT * FROM users -- DROP TABLE users",
             "SELECT * FROM users /* DROP TABLE users */",
             "SELECT * FROM users WHERE id = 1 --' OR 1=1"
         ]
         
-        for query in queries_with_comments:
-            result = execute_sql_safely(query)
+        real_connect = sqlite3.connect
+        with patch('core.sql_processor.sqlite3.connect', side_effect=lambda *a, **k: real_connect(test_db)):
+            for query in queries_with_comments:
+                result = execute_sql_safely(query)
+                assert result['error'] is None
+
+            result = execute_sql_safely("SELECT * FROM users /* read */; DROP TABLE users")
             assert result['error'] is not None
 
+        conn = real_connect(test_db)
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
+        conn.close()
+
 
-def test_integration_upload_malicious_filename(test_db):
+def test_integration_upload_malicious_filename(test_db, monkeypatch):
     """Test that malicious filenames are handled safely during upload"""
     from core.file_processor import convert_csv_to_sqlite
+    monkeypatch.setenv("COLUMN_STATS_ENABLED", "false")
     
     # Create a simple CSV content
     csv_content = b"name,age\nAlice,30\nBob,25"